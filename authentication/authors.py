@@ -0,0 +1,62 @@
+# authors.py
+"""
+Article author snapshots.
+
+Article.author_name / author_title / author_avatar copy the author's display
+fields so article lists are read from the Article table alone. Article.save()
+fills them in; when a User's name or a Profile's title or image changes, the
+signal handlers call schedule(), which collects author ids until the
+transaction commits and then rewrites each author's articles with one UPDATE
+(rows that already match are left alone).
+"""
+import threading
+
+from django.db import transaction
+from django.db.models import Q
+
+from . import changefeed
+from .models import Article, User, author_snapshot
+
+# Fields the snapshot is built from, per sender model.
+SOURCE_FIELDS = {
+    "User": {"first_name", "last_name"},
+    "Profile": {"title", "profile_image"},
+}
+
+_local = threading.local()
+
+
+def _pending():
+    if not hasattr(_local, "pending"):
+        _local.pending = set()
+    return _local.pending
+
+
+def schedule(user_id):
+    """Refreshes the user's articles once the current transaction commits."""
+    _pending().add(user_id)
+    transaction.on_commit(flush)
+
+
+def flush():
+    # The first callback of a transaction takes every pending id; the rest
+    # find nothing to do. Ids from a rolled-back transaction go out with the
+    # next commit, which is harmless since refresh() reads the current rows.
+    user_ids, _local.pending = _pending(), set()
+    if user_ids:
+        refresh(user_ids)
+
+
+def refresh(user_ids):
+    """Rewrites the snapshot on every article by these users. Returns rows updated."""
+    rows = User.objects.filter(pk__in=user_ids).values_list(
+        "pk", "first_name", "last_name", "profile__title", "profile__profile_image",
+    )
+    updated = 0
+    for pk, first_name, last_name, title, image in rows:
+        values = author_snapshot(first_name, last_name, title, image)
+        stale = list(Article.all_objects.filter(author_id=pk).exclude(Q(**values)).values_list("pk", flat=True))
+        if stale:
+            updated += Article.all_objects.filter(pk__in=stale).update(**values)
+            changefeed.log("article", stale)
+    return updated
@@ -0,0 +1,158 @@
+# bulk.py
+"""
+Bulk user administration.
+
+Role changes and chapter moves are one UPDATE ... WHERE id IN (...) each.
+Deletes run in batches of BULK_BATCH_SIZE users, one transaction per batch,
+so locks and undo logs stay bounded while profiles, articles, events and
+tokens cascade. ChapterStats signal handlers are suspended for these
+operations and the affected chapters (and tag counts) are recomputed once per
+batch instead of applying one delta per row.
+
+Requests over BULK_ASYNC_THRESHOLD users (or asking for it) become a BulkJob
+processed in a background thread, which records progress after every batch.
+A job interrupted by a worker restart is resumed from its last batch by
+`manage.py run_bulk_jobs`; every operation is idempotent, so re-running a
+batch is harmless.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import changefeed, recommendations, stats, tags
+from .models import Article, BulkJob, Event, Recommendation, User
+
+logger = logging.getLogger(__name__)
+
+STAFF_ROLES = {"admin", "editor"}
+
+
+def batch_size():
+    return getattr(settings, "BULK_BATCH_SIZE", 500)
+
+
+def async_threshold():
+    return getattr(settings, "BULK_ASYNC_THRESHOLD", 2000)
+
+
+def change_role(user_ids, role):
+    staff = role in STAFF_ROLES
+    updated = User.objects.filter(pk__in=user_ids).update(
+        role=role, is_superuser=staff, is_staff=staff, updated_at=timezone.now(),
+    )
+    changefeed.log("profile", user_ids)
+    return updated
+
+
+def move_to_chapter(user_ids, chapter_id):
+    with transaction.atomic():
+        users = User.objects.filter(pk__in=user_ids)
+        chapters = set(users.exclude(chapter=None).values_list("chapter_id", flat=True).distinct())
+        updated = users.update(chapter_id=chapter_id, updated_at=timezone.now())
+        if chapter_id is not None:
+            chapters.add(chapter_id)
+        transaction.on_commit(lambda: stats.recompute_chapters(chapters))
+        recommendations.schedule(user_ids)
+        changefeed.log("profile", user_ids)
+    return updated
+
+
+def delete_users(user_ids):
+    with transaction.atomic(), stats.suspended():
+        chapters = set(
+            User.objects.filter(pk__in=user_ids).exclude(chapter=None).values_list("chapter_id", flat=True)
+        )
+        chapters.update(Article.objects.filter(author_id__in=user_ids).values_list("chapter_id", flat=True).distinct())
+        chapters.update(Event.objects.filter(created_by_id__in=user_ids).values_list("chapter_id", flat=True).distinct())
+        article_ids = list(Article.all_objects.filter(author_id__in=user_ids).values_list("pk", flat=True))
+        event_ids = list(Event.all_objects.filter(created_by_id__in=user_ids).values_list("pk", flat=True))
+        tag_ids = tags.tag_ids_for(article_ids)
+        # Their own rows cascade; lists that named them are recomputed.
+        listing = set(Recommendation.objects.filter(recommended_id__in=user_ids).values_list("user_id", flat=True))
+        _, deleted = User.objects.filter(pk__in=user_ids).delete()
+        transaction.on_commit(lambda: stats.recompute_chapters(chapters))
+        if tag_ids:
+            transaction.on_commit(lambda: tags.recount(tag_ids))
+        if listing:
+            recommendations.schedule(listing)
+        changefeed.log("profile", user_ids)
+        changefeed.log("article", article_ids)
+        changefeed.log("event", event_ids)
+    return deleted.get(User._meta.label, 0)
+
+
+OPERATIONS = {
+    "role": lambda user_ids, params: change_role(user_ids, params["role"]),
+    "chapter": lambda user_ids, params: move_to_chapter(user_ids, params["chapter"]),
+    "delete": lambda user_ids, params: delete_users(user_ids),
+}
+
+
+def run(action, user_ids, params=None):
+    """
+    Applies the action now and returns the number of users affected. Updates
+    are a single statement; deletes are batched.
+    """
+    operation = OPERATIONS[action]
+    if action != "delete":
+        return operation(user_ids, params or {})
+    size = batch_size()
+    return sum(operation(user_ids[i:i + size], params) for i in range(0, len(user_ids), size))
+
+
+def start_job(action, user_ids, params, created_by=None):
+    job = BulkJob.objects.create(
+        action=action, params=params or {}, user_ids=[str(pk) for pk in user_ids],
+        total=len(user_ids), created_by=created_by,
+    )
+    transaction.on_commit(lambda: _spawn(job.pk))
+    return job
+
+
+def _spawn(job_id):
+    threading.Thread(target=_run_in_thread, args=(job_id,), name=f"bulk-job-{job_id}", daemon=True).start()
+
+
+def _run_in_thread(job_id):
+    try:
+        run_job(job_id)
+    except Exception:
+        logger.exception("Bulk job %s failed.", job_id)
+    finally:
+        connection.close()
+
+
+def run_job(job_id):
+    """Processes a job from its last recorded batch. Returns the job."""
+    job = BulkJob.objects.get(pk=job_id)
+    if job.status == "DONE":
+        return job
+    BulkJob.objects.filter(pk=job.pk).update(status="RUNNING", updated_at=timezone.now())
+
+    operation, size = OPERATIONS[job.action], batch_size()
+    try:
+        while job.processed < job.total:
+            batch = job.user_ids[job.processed:job.processed + size]
+            job.affected += operation(batch, job.params)
+            job.processed += len(batch)
+            BulkJob.objects.filter(pk=job.pk).update(
+                processed=job.processed, affected=job.affected, updated_at=timezone.now(),
+            )
+    except Exception as exc:
+        job.status, job.error = "FAILED", str(exc)
+        job.save(update_fields=["status", "error", "updated_at"])
+        raise
+    job.status, job.finished_at = "DONE", timezone.now()
+    job.save(update_fields=["status", "finished_at", "updated_at"])
+    return job
+
+
+def resumable_jobs(stale_after=timedelta(minutes=10)):
+    """Unfinished jobs whose thread has not reported progress for a while."""
+    return BulkJob.objects.filter(
+        status__in=["PENDING", "RUNNING"], updated_at__lt=timezone.now() - stale_after,
+    ).order_by("created_at")
@@ -0,0 +1,172 @@
+# changefeed.py
+"""
+Delta sync for clients that keep local copies of articles, events, chapters
+and public member profiles.
+
+Model signals call log() on save; the few bulk UPDATEs that bypass them, and
+the code that deletes articles, events or users, call it themselves. log()
+collects (kind, id) pairs until the transaction commits and then appends them
+to ChangeLogEntry with one INSERT. Entries say only *that* something changed;
+read() looks the objects up when a client asks, so an article that was
+soft-deleted, a profile made private and a row that is gone all come back as
+deletions, and an object changed five times is sent once. Event.seats_taken
+is not logged: an RSVP rush would flood the log, and clients read seat counts
+from the RSVP endpoint.
+
+A cursor is "<last entry id>.<unix time of that entry>". read() returns the
+changes after it, from at most `limit` entries per call, in log order, skipping
+entries younger than CHANGE_FEED_LAG_SECONDS so an id is never passed while a
+lower one is still being committed. compact() (the compact_change_log command)
+deletes entries superseded by a newer one for the same object, and everything
+older than CHANGE_FEED_RETENTION_DAYS; a cursor from before that window gets
+reset=True, telling the client to re-fetch everything and continue from the
+cursor it is given.
+"""
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .fastpath import compile_serializer
+from .models import Article, Chapter, ChangeLogEntry, Event, User
+from .serializers import ArticleListSerializer, ChapterSerializer, EventSerializer, UserCardProjection
+
+COMPACT_BATCH_SIZE = 1000
+# Entries are kept this much longer than cursors are honoured, so a cursor at
+# the edge of the window never points past entries that were already deleted.
+COMPACT_MARGIN = timedelta(days=1)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def retention():
+    return timedelta(days=_setting("CHANGE_FEED_RETENTION_DAYS", 30))
+
+
+def lag():
+    return timedelta(seconds=_setting("CHANGE_FEED_LAG_SECONDS", 2))
+
+
+_local = threading.local()
+
+
+def _pending():
+    if not hasattr(_local, "pending"):
+        _local.pending = set()
+    return _local.pending
+
+
+def log(kind, ids):
+    """Records that these objects changed, once the current transaction commits."""
+    _pending().update((kind, pk) for pk in ids)
+    transaction.on_commit(flush)
+
+
+def flush():
+    pairs, _local.pending = _pending(), set()
+    if pairs:
+        ChangeLogEntry.objects.bulk_create(ChangeLogEntry(kind=kind, object_id=pk) for kind, pk in sorted(pairs, key=str))
+
+
+def encode_cursor(entry_id, at):
+    return f"{entry_id}.{int(at.timestamp())}"
+
+
+def decode_cursor(cursor):
+    """(entry id, datetime) or None if the cursor is malformed."""
+    try:
+        entry_id, stamp = cursor.split(".")
+        return int(entry_id), datetime.fromtimestamp(int(stamp), tz=dt_timezone.utc)
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+def head():
+    """A cursor at the newest entry, for clients that just loaded everything."""
+    now = timezone.now()
+    last = ChangeLogEntry.objects.filter(created_at__lte=now - lag()).order_by("-pk").values_list("pk", flat=True).first()
+    return encode_cursor(last or 0, now)
+
+
+def _sources():
+    def compiled(serializer_class):
+        return compile_serializer(serializer_class).serialize
+
+    return {
+        "article": (Article.objects.all(), compiled(ArticleListSerializer)),
+        "event": (Event.objects.all(), compiled(EventSerializer)),
+        "chapter": (Chapter.objects.all(), compiled(ChapterSerializer)),
+        "profile": (User.objects.filter(profile__is_public=True), UserCardProjection().serialize),
+    }
+
+
+def read(cursor, limit=500):
+    """
+    Returns {"cursor", "reset", "has_more", "changes"}; each change is
+    {"kind", "id", "deleted", "data"} with data None for deletions.
+    """
+    position = decode_cursor(cursor) if cursor else None
+    now = timezone.now()
+    if position is None or position[1] < now - retention():
+        return {"cursor": head(), "reset": True, "has_more": False, "changes": []}
+    after, stamp = position
+
+    entries = list(
+        ChangeLogEntry.objects.filter(pk__gt=after, created_at__lte=now - lag())
+        .order_by("pk").values_list("pk", "kind", "object_id", "created_at")[:limit + 1]
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    if entries:
+        stamp = entries[-1][3]
+    elif not has_more:
+        stamp = max(stamp, now - lag())
+
+    # The last entry per object decides its place in the response.
+    latest = {}
+    for pk, kind, object_id, _ in entries:
+        latest.pop((kind, object_id), None)
+        latest[(kind, object_id)] = pk
+    wanted = {}
+    for kind, object_id in latest:
+        wanted.setdefault(kind, []).append(object_id)
+
+    found = {}
+    for kind, (queryset, serialize) in _sources().items():
+        if kind in wanted:
+            for item in serialize(queryset.filter(pk__in=wanted[kind])):
+                found[(kind, str(item["id"]))] = item
+
+    changes = []
+    for kind, object_id in latest:
+        data = found.get((kind, str(object_id)))
+        changes.append({"kind": kind, "id": str(object_id), "deleted": data is None, "data": data})
+    return {
+        "cursor": encode_cursor(entries[-1][0] if entries else after, stamp),
+        "reset": False,
+        "has_more": has_more,
+        "changes": changes,
+    }
+
+
+def compact(now=None, size=COMPACT_BATCH_SIZE):
+    """Deletes superseded and expired entries in batches. Returns how many went."""
+    now = now or timezone.now()
+    newer = ChangeLogEntry.objects.filter(kind=OuterRef("kind"), object_id=OuterRef("object_id"), pk__gt=OuterRef("pk"))
+    # Expired entries go even if nothing superseded them: any cursor that
+    # still needs them is past the retention window and gets a reset.
+    doomed = [
+        ChangeLogEntry.objects.filter(created_at__lt=now - retention() - COMPACT_MARGIN),
+        ChangeLogEntry.objects.filter(Exists(newer)),
+    ]
+    deleted = 0
+    for queryset in doomed:
+        # Ids first: MySQL cannot DELETE with a subquery on the same table.
+        while ids := list(queryset.order_by("pk").values_list("pk", flat=True)[:size]):
+            deleted += ChangeLogEntry.objects.filter(pk__in=ids).delete()[0]
+    return deleted
@@ -0,0 +1,73 @@
+# chapter_cache.py
+"""
+Process-local cache of the (small, rarely changing) Chapter table.
+
+Every worker keeps {id: Chapter} in memory and only reloads it when the
+version token stored in the shared cache backend changes; saving or deleting a
+Chapter writes a new token once the transaction commits. Lookups of known
+ids therefore cost no database queries. The returned Chapter objects are
+shared between requests and must be treated as read-only.
+"""
+import threading
+import uuid
+
+from django.core.cache import cache
+
+from .models import Chapter
+
+VERSION_KEY = "chapters:version"
+
+_lock = threading.Lock()
+_state = (None, {}, [])  # (version, {id: chapter}, [chapters ordered by name])
+
+
+def _current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _load():
+    global _state
+    version = _current_version()
+    if version == _state[0]:
+        return _state
+    with _lock:
+        if version != _state[0]:
+            chapters = list(Chapter.objects.order_by("name"))
+            _state = (version, {chapter.pk: chapter for chapter in chapters}, chapters)
+    return _state
+
+
+def invalidate():
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def parse_id(chapter_id):
+    """Returns chapter_id as a UUID, or None if it is not a valid chapter id."""
+    if chapter_id is None or isinstance(chapter_id, uuid.UUID):
+        return chapter_id
+    try:
+        return uuid.UUID(str(chapter_id))
+    except ValueError:
+        return None
+
+
+def get(chapter_id):
+    chapter_id = parse_id(chapter_id)
+    if chapter_id is None:
+        return None
+    chapter = _load()[1].get(chapter_id)
+    if chapter is None:
+        # Rows written without signals (bulk_create, raw SQL) are not
+        # announced; one query on a miss keeps them from being rejected.
+        chapter = Chapter.objects.filter(pk=chapter_id).first()
+        if chapter is not None:
+            invalidate()
+    return chapter
+
+
+def all_chapters():
+    return list(_load()[2])
@@ -0,0 +1,59 @@
+# content.py
+"""
+Article body processing, run by Article.save().
+
+content_body is what authors submit: HTML from the editor, or plain text
+(blank lines separate paragraphs). render() turns it into what readers get:
+sanitized HTML (nh3 allowlist, links forced to rel="noopener noreferrer
+nofollow"), a plain-text excerpt of at most EXCERPT_LENGTH characters, a
+word count and a SHA-256 of the source, so unchanged bodies are not
+re-rendered.
+"""
+import hashlib
+import html
+import re
+
+import nh3
+
+EXCERPT_LENGTH = 280
+
+_TAG = re.compile(r"<[a-zA-Z!/]")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_BLOCK_END = re.compile(r"</(?:p|div|h[1-6]|li|blockquote|pre|tr|figcaption)>|<br\s*/?>", re.IGNORECASE)
+
+
+def content_hash(body):
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def to_html(body):
+    if _TAG.search(body):
+        return nh3.clean(body, link_rel="noopener noreferrer nofollow")
+    paragraphs = (p.strip() for p in _PARAGRAPH_BREAK.split(body.replace("\r\n", "\n")))
+    return "".join(f"<p>{html.escape(p).replace(chr(10), '<br>')}</p>" for p in paragraphs if p)
+
+
+def to_text(rendered):
+    # Keep block boundaries as spaces so "</p><p>" does not glue words together.
+    return " ".join(html.unescape(nh3.clean(_BLOCK_END.sub(" ", rendered), tags=set())).split())
+
+
+def excerpt(text, length=EXCERPT_LENGTH):
+    if len(text) <= length:
+        return text
+    cut = text[:length - 1]
+    if " " in cut and not text[length - 1].isspace():
+        cut = cut.rsplit(" ", 1)[0]
+    return cut.rstrip(" .,;:-") + "…"
+
+
+def render(body):
+    """Returns the Article fields derived from `body`."""
+    rendered = to_html(body or "")
+    text = to_text(rendered)
+    return {
+        "content_html": rendered,
+        "excerpt": excerpt(text),
+        "word_count": len(text.split()),
+        "content_hash": content_hash(body or ""),
+    }
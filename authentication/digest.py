@@ -0,0 +1,153 @@
+# digest.py
+"""
+Weekly newsletter digest: build once, deliver to every Subscription in batches.
+
+The body is rendered a single time per Digest from the week's new articles and
+the upcoming events. Delivery walks recipients in primary-key order with keyset
+pagination (bounded memory at any list size), reuses one backend connection,
+and records a DigestDelivery row per recipient so a crashed or interrupted run
+can be resumed. Each row is claimed (SENDING) just before its message goes out
+and settled right after, so a crash leaves at most the one message in flight
+unsettled. Such a row is retried once it is older than
+DIGEST_SENDING_TIMEOUT: that recipient may get the digest twice, but nobody
+is silently skipped.
+
+A digest is complete once every recipient has a SENT or FAILED row. Failures
+(often a bad address) are settled rather than retried on every run, so they
+never hold back next week's digest; retry_failed() re-queues them on request.
+"""
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django.utils.html import format_html, format_html_join
+
+from .models import Article, Digest, DigestDelivery, Event, Subscription
+
+MAX_ITEMS = 10
+
+
+def sending_timeout():
+    return timedelta(seconds=getattr(settings, "DIGEST_SENDING_TIMEOUT", 15 * 60))
+
+
+def _link(kind, slug):
+    return f"{settings.FRONTEND_URL.rstrip('/')}/{kind}/{slug}"
+
+
+def build_digest(now=None, days=7, upcoming_days=14):
+    now = now or timezone.now()
+    start = now - timedelta(days=days)
+    articles = list(
+        Article.objects.filter(created_at__gte=start, created_at__lt=now)
+        .order_by("-created_at")
+        .values("title", "slug", "category")[:MAX_ITEMS]
+    )
+    events = list(
+        Event.objects.filter(start_datetime__gte=now, start_datetime__lt=now + timedelta(days=upcoming_days))
+        .order_by("start_datetime")
+        .values("title", "slug", "location", "start_datetime")[:MAX_ITEMS]
+    )
+
+    text = ["New this week on Linq", ""]
+    text += [f"- {a['title']}: {_link('articles', a['slug'])}" for a in articles] or ["No new articles."]
+    text += ["", "Upcoming events", ""]
+    text += [
+        f"- {e['start_datetime']:%a %d %b %H:%M} {e['title']} ({e['location']}): {_link('events', e['slug'])}"
+        for e in events
+    ] or ["No upcoming events."]
+
+    html = format_html(
+        "<h2>New this week on Linq</h2><ul>{}</ul><h2>Upcoming events</h2><ul>{}</ul>",
+        format_html_join("", '<li><a href="{}">{}</a></li>', ((_link("articles", a["slug"]), a["title"]) for a in articles)),
+        format_html_join("", '<li>{} &middot; <a href="{}">{}</a> ({})</li>', (
+            (f"{e['start_datetime']:%a %d %b %H:%M}", _link("events", e["slug"]), e["title"], e["location"])
+            for e in events
+        )),
+    )
+
+    return Digest.objects.create(
+        period_start=start,
+        period_end=now,
+        subject=f"Linq weekly digest, {now:%d %b %Y}",
+        text_body="\n".join(text),
+        html_body=html,
+    )
+
+
+def pending_recipients(digest):
+    """Subscriptions without any delivery row for this digest, in pk order."""
+    delivered = DigestDelivery.objects.filter(digest=digest, subscription=OuterRef("pk"))
+    return Subscription.objects.filter(~Exists(delivered)).order_by("pk").values_list("pk", "email")
+
+
+def retry_failed(digest):
+    return DigestDelivery.objects.filter(digest=digest, status="FAILED").delete()[0]
+
+
+def reclaim_stale(digest, now=None):
+    """Releases rows a crashed run left SENDING, so they are sent again. Returns how many."""
+    cutoff = (now or timezone.now()) - sending_timeout()
+    return DigestDelivery.objects.filter(digest=digest, status="SENDING", updated_at__lt=cutoff).delete()[0]
+
+
+def _claim(digest, subscription_id):
+    """The new SENDING row, or None if another run claimed this recipient first."""
+    try:
+        with transaction.atomic():
+            return DigestDelivery.objects.create(digest=digest, subscription_id=subscription_id, status="SENDING")
+    except IntegrityError:
+        return None
+
+
+def deliver(digest, batch_size=200, connection=None):
+    """Sends the digest to every pending recipient. Returns a summary dict."""
+    connection = connection or get_connection()
+    summary = {"sent": 0, "failed": 0}
+    last_pk = None
+    reclaim_stale(digest)
+
+    with connection:
+        while True:
+            recipients = pending_recipients(digest)
+            if last_pk is not None:
+                recipients = recipients.filter(pk__gt=last_pk)
+            batch = list(recipients[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+
+            for pk, email in batch:
+                delivery = _claim(digest, pk)
+                if delivery is None:
+                    continue
+                message = EmailMultiAlternatives(digest.subject, digest.text_body, to=[email], connection=connection)
+                message.attach_alternative(digest.html_body, "text/html")
+                try:
+                    _send(connection, message)
+                except (smtplib.SMTPException, OSError) as exc:
+                    settled = {"status": "FAILED", "error": str(exc)[:255]}
+                    summary["failed"] += 1
+                else:
+                    settled = {"status": "SENT"}
+                    summary["sent"] += 1
+                DigestDelivery.objects.filter(pk=delivery.pk).update(**settled, updated_at=timezone.now())
+
+    if not pending_recipients(digest).exists() and not digest.deliveries.filter(status="SENDING").exists():
+        digest.completed_at = timezone.now()
+        digest.save(update_fields=["completed_at"])
+    return summary
+
+
+def _send(connection, message):
+    try:
+        connection.send_messages([message])
+    except smtplib.SMTPServerDisconnected:
+        # Long runs outlive SMTP idle timeouts; reconnect once and retry.
+        connection.close()
+        connection.open()
+        connection.send_messages([message])
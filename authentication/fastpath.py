@@ -0,0 +1,187 @@
+# fastpath.py
+"""
+Read-only fast path for list endpoints.
+
+compile_serializer() walks a ModelSerializer's readable fields once and turns
+them into a flat list of values_list() lookups plus a plan that rebuilds the
+nested dicts from each row tuple. Rows never become model instances and DRF's
+per-field get_attribute() machinery is skipped, while the output matches what
+the serializer itself would return (see the differential tests in tests.py).
+
+Only the shapes our serializers use are supported: concrete model fields,
+PrimaryKeyRelatedField, nested ModelSerializers over forward FKs and reverse
+one-to-ones, and plain class attributes such as AbstractBaseUser.is_active.
+Anything else raises UnsupportedSerializer at compile time.
+"""
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.fields import empty
+from rest_framework.response import Response
+
+# Field classes whose to_representation() is the identity for values coming
+# back from the database.
+_IDENTITY_FIELDS = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.ReadOnlyField,
+)
+
+
+class UnsupportedSerializer(Exception):
+    pass
+
+
+def _unsupported(serializer, field_name, reason):
+    return UnsupportedSerializer(
+        f"{type(serializer).__name__}.{field_name}: {reason}"
+    )
+
+
+class CompiledSerializer:
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self.lookups = []
+        self._plan = self._compile(serializer_class(), serializer_class.Meta.model, '')
+
+    def _add_lookup(self, lookup):
+        self.lookups.append(lookup)
+        return len(self.lookups) - 1
+
+    def _compile(self, serializer, model, prefix):
+        if type(serializer).to_representation is not serializers.Serializer.to_representation:
+            raise _unsupported(serializer, 'to_representation', "custom to_representation()")
+
+        plan = []
+        for field in serializer.fields.values():
+            if field.write_only:
+                continue
+            name = field.field_name
+            if field.source == '*' or len(field.source_attrs) != 1:
+                raise _unsupported(serializer, name, f"source '{field.source}'")
+            source = field.source
+
+            try:
+                model_field = model._meta.get_field(source)
+            except FieldDoesNotExist:
+                plan.append(self._compile_attribute(serializer, model, field))
+                continue
+
+            if isinstance(field, serializers.BaseSerializer):
+                if isinstance(field, serializers.ListSerializer) or model_field.many_to_many or model_field.one_to_many:
+                    raise _unsupported(serializer, name, "many=True nesting")
+                # A null FK and a missing reverse one-to-one (a user without a
+                # profile) both render as None, detected through the related pk.
+                pk_index = self._add_lookup(f"{prefix}{source}__pk")
+                child = self._compile(field, model_field.related_model, f"{prefix}{source}__")
+                plan.append((name, 'nested', pk_index, None, child))
+            elif isinstance(field, serializers.PrimaryKeyRelatedField):
+                if not model_field.concrete:
+                    raise _unsupported(serializer, name, "reverse relation")
+                convert = field.pk_field.to_representation if field.pk_field else None
+                plan.append((name, 'value', self._add_lookup(f"{prefix}{source}"), convert, None))
+            elif isinstance(field, serializers.RelatedField):
+                raise _unsupported(serializer, name, type(field).__name__)
+            elif isinstance(field, serializers.FileField):
+                plan.append((name, 'file', self._add_lookup(f"{prefix}{source}"), model_field.storage, None))
+            else:
+                plan.append((name, 'value', self._add_lookup(f"{prefix}{source}"), self._converter(field), None))
+        return plan
+
+    def _compile_attribute(self, serializer, model, field):
+        """Mirrors Field.get_attribute() for names that are not model fields."""
+        name = field.field_name
+        attribute = getattr(model, field.source, empty)
+        if attribute is not empty:
+            if callable(attribute) or isinstance(attribute, property):
+                raise _unsupported(serializer, name, "computed attribute")
+            convert = self._converter(field)
+            return (name, 'const', convert(attribute) if convert else attribute, None, None)
+        if field.default is not empty:
+            return (name, 'const', field.get_default(), None, None)
+        if field.allow_null:
+            return (name, 'const', None, None, None)
+        if not field.required:
+            return (name, 'skip', None, None, None)
+        raise _unsupported(serializer, name, "no such attribute")
+
+    @staticmethod
+    def _converter(field):
+        if isinstance(field, serializers.UUIDField) and field.uuid_format == 'hex_verbose':
+            return str
+        if isinstance(field, serializers.JSONField) and not field.binary:
+            return None
+        if isinstance(field, _IDENTITY_FIELDS):
+            return None
+        return field.to_representation
+
+    def _build(self, plan, row, build_url):
+        data = {}
+        for name, kind, a, b, c in plan:
+            if kind == 'value':
+                value = row[a]
+                data[name] = b(value) if b is not None and value is not None else value
+            elif kind == 'nested':
+                data[name] = None if row[a] is None else self._build(c, row, build_url)
+            elif kind == 'file':
+                value = row[a]
+                data[name] = build_url(b.url(value)) if value else None
+            elif kind == 'const':
+                data[name] = a
+        return data
+
+    def values(self, queryset):
+        return queryset.values_list(*self.lookups)
+
+    def to_representation(self, rows, context=None):
+        request = (context or {}).get('request')
+        build_url = request.build_absolute_uri if request is not None else str
+        plan = self._plan
+        build = self._build
+        return [build(plan, row, build_url) for row in rows]
+
+    def serialize(self, queryset, context=None):
+        return self.to_representation(self.values(queryset), context)
+
+
+@lru_cache(maxsize=None)
+def compile_serializer(serializer_class):
+    return CompiledSerializer(serializer_class)
+
+
+class FastListMixin:
+    """
+    Opt-in for generics.ListAPIView subclasses: list() serializes through the
+    compiled fast path instead of instantiating the serializer per row.
+    """
+    fast_serialization = True
+
+    def get_extra_values(self):
+        """Queryset annotations (e.g. distance_km) to add to every item as they are."""
+        return ()
+
+    def list(self, request, *args, **kwargs):
+        if not self.fast_serialization:
+            return super().list(request, *args, **kwargs)
+
+        compiled = compile_serializer(self.get_serializer_class())
+        queryset = self.filter_queryset(self.get_queryset())
+        extra = tuple(self.get_extra_values())
+        rows = queryset.values_list(*compiled.lookups, *extra) if extra else compiled.values(queryset)
+        context = self.get_serializer_context()
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self._represent(compiled, page, extra, context))
+        return Response(self._represent(compiled, rows, extra, context))
+
+    @staticmethod
+    def _represent(compiled, rows, extra, context):
+        if not extra:
+            return compiled.to_representation(rows, context)
+        rows = list(rows)
+        data = compiled.to_representation(rows, context)
+        for item, row in zip(data, rows):
+            item.update(zip(extra, row[len(compiled.lookups):]))
+        return data
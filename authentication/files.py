@@ -0,0 +1,249 @@
+# files.py
+"""
+Static and media file serving for deployments without a front-end web server.
+
+collectstatic writes content-hashed copies of every static file and, next to
+the compressible ones, gzip and (when the brotli package is installed) brotli
+versions. FileServingMiddleware answers STATIC_URL and MEDIA_URL requests
+before the rest of the middleware stack runs:
+
+* files whose name carries a content hash never change, so they are sent with
+  a one-year immutable Cache-Control; everything else is revalidated through
+  ETag / Last-Modified and gets 304s;
+* the precompressed variant matching Accept-Encoding is sent as-is, nothing
+  is compressed per request;
+* single byte ranges are answered with 206 Partial Content;
+* bodies are returned as open files, so gunicorn hands them to sendfile(2)
+  instead of copying them through Python.
+"""
+import gzip
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotAllowed
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=3600"
+
+# "app.3f2a1b9c8d7e.css" (collectstatic) or "profile_images/9f86d081884c7d65.png"
+# (content-addressed upload): a run of at least 12 hex digits, one of them a
+# letter, forming the last name component before the extension.
+HASHED_NAME = re.compile(r"(?:^|[/._-])(?=[0-9]*[a-f])[0-9a-f]{12,}(?:\.[^./]+)?$")
+
+COMPRESSIBLE = {".css", ".js", ".mjs", ".json", ".map", ".svg", ".txt", ".html", ".xml", ".ico", ".webmanifest"}
+
+# Preferred first.
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+
+def is_hashed(name):
+    return HASHED_NAME.search(name) is not None
+
+
+def compress_file(path):
+    """Writes path.gz (and path.br) when they save at least 5%. Returns the paths written."""
+    with open(path, "rb") as f:
+        data = f.read()
+    variants = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", brotli.compress(data)))
+    written = []
+    for suffix, compressed in variants:
+        if len(compressed) < len(data) * 0.95:
+            with open(path + suffix, "wb") as f:
+                f.write(compressed)
+            written.append(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage that also precompresses the hashed files."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in set(self.hashed_files.values()):
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE:
+                compress_file(self.path(name))
+
+
+def parse_range(header, size):
+    """
+    Returns (first, last) byte positions for a single "bytes=" range, None if
+    the header should be ignored (malformed or multiple ranges), or False if
+    the range cannot be satisfied.
+    """
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            return False
+        return max(0, size - suffix), size - 1
+    first = int(first)
+    if last and int(last) < first:
+        return None
+    if first >= size:
+        return False
+    last = int(last) if last else size - 1
+    return first, min(last, size - 1)
+
+
+class _Slice:
+    """
+    A file limited to `length` bytes from its current position. It keeps
+    fileno() so gunicorn can still sendfile() it; gunicorn starts at the
+    descriptor's offset and sends Content-Length bytes.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def seekable(self):
+        return True
+
+    def seek(self, *args):
+        return self.file.seek(*args)
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def _accepted_encodings(request):
+    accepted = set()
+    for part in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        coding, _, params = part.partition(";")
+        if params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def serve(request, root, path, immutable=None, precompressed=False):
+    """
+    Serves root/path. immutable defaults to whether the name is content-hashed;
+    precompressed looks for .br/.gz siblings.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return HttpResponseNotAllowed(["GET", "HEAD"])
+    try:
+        fullpath = safe_join(root, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    try:
+        st = os.stat(fullpath)
+    except OSError:
+        raise Http404
+    if not stat.S_ISREG(st.st_mode):
+        raise Http404
+
+    content_type = mimetypes.guess_type(fullpath)[0] or "application/octet-stream"
+    if immutable is None:
+        immutable = is_hashed(path)
+    range_header = request.META.get("HTTP_RANGE")
+
+    encoding, source = None, fullpath
+    if precompressed and not range_header:
+        accepted = _accepted_encodings(request)
+        for coding, suffix in ENCODINGS:
+            if coding in accepted and os.path.isfile(fullpath + suffix):
+                encoding, source = coding, fullpath + suffix
+                st = os.stat(source)
+                break
+
+    etag = f'"{st.st_size:x}-{st.st_mtime_ns:x}{"-" + encoding if encoding else ""}"'
+    headers = {
+        "Cache-Control": IMMUTABLE if immutable else REVALIDATE,
+        "ETag": etag,
+        "Last-Modified": http_date(st.st_mtime),
+        "Accept-Ranges": "bytes",
+    }
+    if precompressed:
+        headers["Vary"] = "Accept-Encoding"
+    if encoding:
+        headers["Content-Encoding"] = encoding
+
+    response = get_conditional_response(request, etag=etag, last_modified=int(st.st_mtime))
+    if response is not None:
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    size, status, first, length = st.st_size, 200, 0, st.st_size
+    if range_header:
+        if_range = request.META.get("HTTP_IF_RANGE")
+        span = parse_range(range_header, size) if if_range in (None, etag, headers["Last-Modified"]) else None
+        if span is False:
+            response = HttpResponse(status=416, content_type=content_type)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+        if span:
+            first, last = span
+            status, length = 206, last - first + 1
+            headers["Content-Range"] = f"bytes {first}-{last}/{size}"
+
+    if request.method == "HEAD":
+        response = HttpResponse(status=status, content_type=content_type)
+    else:
+        file = open(source, "rb")
+        if first:
+            file.seek(first)
+        response = FileResponse(_Slice(file, length) if status == 206 else file, status=status, content_type=content_type)
+    for name, value in headers.items():
+        response[name] = value
+    response["Content-Length"] = length
+    return response
+
+
+class FileServingMiddleware:
+    """
+    Serves STATIC_URL from STATIC_ROOT and MEDIA_URL from MEDIA_ROOT. Must sit
+    above GZipMiddleware so file bodies are never compressed per request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.routes = [
+            (url, root, precompressed)
+            for url, root, precompressed in (
+                (settings.STATIC_URL, settings.STATIC_ROOT, True),
+                (settings.MEDIA_URL, settings.MEDIA_ROOT if getattr(settings, "STORAGE_BACKEND", "local") == "local" else None, False),
+            )
+            if url and root and url.startswith("/")
+        ]
+
+    def __call__(self, request):
+        for url, root, precompressed in self.routes:
+            if request.path_info.startswith(url):
+                return serve(request, root, request.path_info[len(url):], precompressed=precompressed)
+        return self.get_response(request)
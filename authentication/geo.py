@@ -0,0 +1,180 @@
+# geo.py
+"""
+Coordinates for profile and event locations, and "near" / "inside" queries.
+
+Profile.location and Event.location stay free text. On a full save,
+locate() looks the text up in a local gazetteer (GEO_GAZETTEER_PATH, a TSV
+shipped in data/; nothing goes over the network) and fills latitude,
+longitude and a GEOHASH_LENGTH-character geohash; unknown places get nulls.
+"DHA Phase 5, Lahore" is tried whole and then part by part, so the first
+known comma-separated part wins.
+
+Queries go through the geohash index first: a bounding box becomes at most
+MAX_CELLS geohash cells (the longest prefix length that keeps the count
+within that), each one an index range, and then an exact latitude/longitude
+range. Radius queries use the radius' bounding box and then the haversine
+distance, computed by the database, to filter and sort. Boxes are clamped at
+the poles and the antimeridian rather than wrapped.
+"""
+import math
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import F, Q, Value
+from django.db.models.functions import ASin, Cos, Power, Radians, Round, Sin, Sqrt
+
+GEOHASH_LENGTH = 9
+MAX_CELLS = 16
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+DEFAULT_RADIUS_KM = 50
+MAX_RADIUS_KM = 500
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_PUNCTUATION = re.compile(r"[^\w\s,]")
+
+
+def _normalize(text):
+    return " ".join(_PUNCTUATION.sub(" ", str(text)).split()).lower()
+
+
+def gazetteer_path():
+    return getattr(settings, "GEO_GAZETTEER_PATH", Path(__file__).resolve().parent / "data" / "gazetteer.tsv")
+
+
+@lru_cache(maxsize=None)
+def _load(path):
+    places = {}
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip() or line.startswith("#"):
+                continue
+            name, lat, lon, *aliases = line.rstrip("\n").split("\t")
+            point = (float(lat), float(lon))
+            for alias in [name, *(aliases[0].split("|") if aliases else [])]:
+                # The first row for a name wins ("Hyderabad" is the Sindh one).
+                places.setdefault(_normalize(alias), point)
+    return places
+
+
+def gazetteer():
+    """{normalized name: (latitude, longitude)}, read once per process."""
+    return _load(str(gazetteer_path()))
+
+
+def geocode(text):
+    """(latitude, longitude) for a place name, or None if it is not in the gazetteer."""
+    text = _normalize(text or "")
+    if not text:
+        return None
+    places = gazetteer()
+    if text in places:
+        return places[text]
+    parts = [part.strip() for part in text.split(",") if part.strip()]
+    for i in range(len(parts)):
+        # "gulberg, lahore, pakistan": the whole tail first, then each part.
+        for candidate in (", ".join(parts[i:]), parts[i]):
+            if candidate in places:
+                return places[candidate]
+    return None
+
+
+def encode(lat, lon, length=GEOHASH_LENGTH):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < length:
+        interval, coordinate = (lon_range, lon) if even else (lat_range, lat)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def locate(instance):
+    """Sets latitude, longitude and geohash from instance.location."""
+    point = geocode(instance.location)
+    if point is None:
+        instance.latitude = instance.longitude = instance.geohash = None
+    else:
+        instance.latitude, instance.longitude = point
+        instance.geohash = encode(*point)
+
+
+def _cell_size(length):
+    bits = 5 * length
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)  # (height, width) in degrees
+
+
+def _clamp(box):
+    min_lat, min_lon, max_lat, max_lon = box
+    return max(min_lat, -90.0), max(min_lon, -180.0), min(max_lat, 90.0), min(max_lon, 180.0)
+
+
+def cells(box):
+    """Geohash prefixes whose cells cover box = (min_lat, min_lon, max_lat, max_lon)."""
+    min_lat, min_lon, max_lat, max_lon = _clamp(box)
+    best = [""]
+    for length in range(1, GEOHASH_LENGTH + 1):
+        height, width = _cell_size(length)
+        rows = range(math.floor((min_lat + 90) / height), math.floor((max_lat + 90) / height) + 1)
+        columns = range(math.floor((min_lon + 180) / width), math.floor((max_lon + 180) / width) + 1)
+        if len(rows) * len(columns) > MAX_CELLS:
+            break
+        best = sorted({
+            encode(
+                min(-90 + (row + 0.5) * height, 90.0), min(-180 + (column + 0.5) * width, 180.0), length,
+            )
+            for row in rows for column in columns
+        })
+    return best
+
+
+def bounding_box(lat, lon, radius_km):
+    dlat = radius_km / KM_PER_DEGREE
+    dlon = min(radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6)), 180.0)
+    return lat - dlat, lon - dlon, lat + dlat, lon + dlon
+
+
+def within(queryset, box, prefix=""):
+    """Rows of `queryset` whose point (at `prefix`latitude/longitude) lies inside box."""
+    min_lat, min_lon, max_lat, max_lon = _clamp(box)
+    cover = Q()
+    for cell in cells(box):
+        # Ranges rather than LIKE so every backend can seek the geohash index.
+        cover |= Q(**{f"{prefix}geohash__gte": cell, f"{prefix}geohash__lt": cell + "~"})
+    return queryset.filter(cover).filter(**{
+        f"{prefix}latitude__gte": min_lat, f"{prefix}latitude__lte": max_lat,
+        f"{prefix}longitude__gte": min_lon, f"{prefix}longitude__lte": max_lon,
+    })
+
+
+def distance_km(lat, lon, prefix=""):
+    """Haversine distance from (lat, lon), as a database expression."""
+    lat0, lon0 = math.radians(lat), math.radians(lon)
+    lat1, lon1 = Radians(F(f"{prefix}latitude")), Radians(F(f"{prefix}longitude"))
+    a = (
+        Power(Sin((lat1 - Value(lat0)) / 2), 2)
+        + Value(math.cos(lat0)) * Cos(lat1) * Power(Sin((lon1 - Value(lon0)) / 2), 2)
+    )
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(a))
+
+
+def nearby(queryset, lat, lon, radius_km, prefix=""):
+    """Rows within radius_km of (lat, lon), annotated with distance_km (to metres), nearest first."""
+    return (
+        within(queryset, bounding_box(lat, lon, radius_km), prefix)
+        .annotate(distance_km=Round(distance_km(lat, lon, prefix), 3))
+        .filter(distance_km__lte=radius_km)
+        .order_by("distance_km")
+    )
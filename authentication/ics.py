@@ -0,0 +1,117 @@
+# ics.py
+"""
+iCalendar (RFC 5545) rendering for event feeds.
+
+Feeds are cached per scope (one chapter, or "all") under a key derived from
+the newest Event.updated_at and the event count in that scope, so any
+create, update or delete yields a new version and the body is rebuilt once.
+"""
+import hashlib
+from datetime import timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from .models import Event
+
+PRODID = "-//Linq//Events//EN"
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def escape_text(value):
+    return (
+        (value or "")
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def fold(line):
+    """Folds a content line to 75 octets, continuation lines start with a space."""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts, limit = [], 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        # Never split inside a multi-byte UTF-8 sequence.
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode("utf-8"))
+        encoded = encoded[cut:]
+        limit = 74
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def format_utc(value):
+    return value.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def render_event(event):
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{event['id']}@linq",
+        f"DTSTAMP:{format_utc(event['updated_at'])}",
+        f"LAST-MODIFIED:{format_utc(event['updated_at'])}",
+        f"DTSTART:{format_utc(event['start_datetime'])}",
+        f"DTEND:{format_utc(event['end_datetime'])}",
+        f"SUMMARY:{escape_text(event['title'])}",
+        f"DESCRIPTION:{escape_text(event['description'])}",
+        f"LOCATION:{escape_text(event['location'])}",
+        f"CATEGORIES:{escape_text(event['category'])}",
+        "END:VEVENT",
+    ]
+    return "".join(fold(line) for line in lines)
+
+
+def feed_queryset(chapter_id=None):
+    queryset = Event.objects.all()
+    if chapter_id is not None:
+        queryset = queryset.filter(chapter_id=chapter_id)
+    return queryset
+
+
+def feed_version(chapter_id=None):
+    """Returns (etag, last_modified) for the scope from a single aggregate query."""
+    stats = feed_queryset(chapter_id).aggregate(last=Max("updated_at"), count=Count("id"))
+    token = f"{chapter_id or 'all'}:{stats['last'].isoformat() if stats['last'] else '-'}:{stats['count']}"
+    return hashlib.sha1(token.encode()).hexdigest(), stats["last"]
+
+
+def cache_key(chapter_id, etag):
+    return f"ics:{chapter_id or 'all'}:{etag}"
+
+
+def stream_feed(chapter_id, name, etag):
+    """
+    Yields the calendar in chunks straight from the database and stores the
+    finished body in the cache, so the next poll at this version is a hit.
+    """
+    chunks = [
+        "BEGIN:VCALENDAR\r\n",
+        "VERSION:2.0\r\n",
+        f"PRODID:{PRODID}\r\n",
+        "CALSCALE:GREGORIAN\r\n",
+        "METHOD:PUBLISH\r\n",
+        fold(f"X-WR-CALNAME:{escape_text(name)}"),
+    ]
+    yield "".join(chunks)
+
+    rows = (
+        feed_queryset(chapter_id)
+        .order_by("start_datetime")
+        .values("id", "title", "description", "category", "location",
+                "start_datetime", "end_datetime", "updated_at")
+        .iterator(chunk_size=500)
+    )
+    for row in rows:
+        chunk = render_event(row)
+        chunks.append(chunk)
+        yield chunk
+
+    chunks.append("END:VCALENDAR\r\n")
+    yield chunks[-1]
+    cache.set(cache_key(chapter_id, etag), "".join(chunks), CACHE_TIMEOUT)
@@ -0,0 +1,134 @@
+# lifecycle.py
+"""
+Article and Event lifecycle: live -> soft-deleted -> archived -> (restored).
+
+The delete endpoints only set deleted_at; the default managers hide such
+rows. archive_all() (the archive_content command, run on a schedule) then
+moves rows out of the hot tables into ArchivedRecord, in batches of
+ARCHIVE_BATCH_SIZE with one transaction each:
+
+* soft-deleted rows older than ARCHIVE_DELETED_DAYS,
+* events that ended more than ARCHIVE_EVENT_MONTHS ago,
+* articles created more than ARCHIVE_ARTICLE_MONTHS ago.
+
+restore() brings soft-deleted or archived rows back as live rows with their
+original ids, timestamps and (unless taken meanwhile) slugs. Archived content
+no longer counts towards ChapterStats or tag counts; both are recomputed for
+what each batch touched. Archiving an event deletes its RSVPs, so a restored
+event starts with every seat free.
+"""
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core import serializers
+from django.db import transaction
+from django.utils import timezone
+
+from . import authors, changefeed, stats, tags
+from .models import ArchivedRecord, Article, Event, unique_slug
+
+MONTH = timedelta(days=30)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def batch_size():
+    return _setting("ARCHIVE_BATCH_SIZE", 500)
+
+
+def candidates(now=None):
+    """[(model, queryset, reason)] of rows due for archiving, in archiving order."""
+    now = now or timezone.now()
+    deleted_before = now - timedelta(days=_setting("ARCHIVE_DELETED_DAYS", 30))
+    return [
+        (Article, Article.all_objects.filter(deleted_at__lt=deleted_before), "deleted"),
+        (Event, Event.all_objects.filter(deleted_at__lt=deleted_before), "deleted"),
+        (Event, Event.all_objects.filter(end_datetime__lt=now - _setting("ARCHIVE_EVENT_MONTHS", 6) * MONTH), "expired"),
+        (Article, Article.all_objects.filter(created_at__lt=now - _setting("ARCHIVE_ARTICLE_MONTHS", 24) * MONTH), "stale"),
+    ]
+
+
+def _row_data(row):
+    # DjangoJSONEncoder would cut datetimes to milliseconds; keep them exact.
+    for name, value in row["fields"].items():
+        if isinstance(value, datetime):
+            row["fields"][name] = value.isoformat()
+    return row
+
+
+def _owner_id(instance):
+    return instance.author_id if isinstance(instance, Article) else instance.created_by_id
+
+
+def archive_batch(model, queryset, reason, size=None):
+    """Moves up to `size` rows of `queryset` into ArchivedRecord. Returns how many moved."""
+    with transaction.atomic(), stats.suspended():
+        rows = list(queryset.select_for_update().order_by("pk")[:size or batch_size()])
+        if not rows:
+            return 0
+        records = [
+            ArchivedRecord(
+                id=row.pk, kind=model._meta.label_lower, reason=reason, chapter_id=row.chapter_id,
+                owner_id=_owner_id(row), data=_row_data(data),
+            )
+            for row, data in zip(rows, serializers.serialize("python", rows))
+        ]
+        ArchivedRecord.objects.bulk_create(records)
+        pks = [row.pk for row in rows]
+        tag_ids = tags.tag_ids_for(pks) if model is Article else set()
+        model.all_objects.filter(pk__in=pks).delete()
+        changefeed.log("article" if model is Article else "event", pks)
+        chapters = {row.chapter_id for row in rows}
+        transaction.on_commit(lambda: stats.recompute_chapters(chapters))
+        if tag_ids:
+            transaction.on_commit(lambda: tags.recount(tag_ids))
+    return len(rows)
+
+
+def archive(model, queryset, reason, size=None):
+    total = 0
+    while moved := archive_batch(model, queryset, reason, size):
+        total += moved
+    return total
+
+
+def archive_all(now=None, size=None):
+    """Archives everything that is due. Returns {(label, reason): count}."""
+    return {
+        (model._meta.label_lower, reason): archive(model, queryset, reason, size)
+        for model, queryset, reason in candidates(now)
+    }
+
+
+def restore(ids):
+    """
+    Makes the given articles/events live again, whether soft-deleted or
+    archived. Returns the number restored; unknown or live ids are ignored.
+    """
+    restored = 0
+    with transaction.atomic():
+        for model in (Article, Event):
+            for instance in model.all_objects.filter(pk__in=ids, deleted_at__isnull=False):
+                instance.restore()
+                restored += 1
+
+        records = list(ArchivedRecord.objects.select_for_update().filter(pk__in=ids))
+        for record in records:
+            obj = next(serializers.deserialize("python", [record.data]))
+            instance = obj.object
+            instance.deleted_at = None
+            if type(instance).all_objects.filter(slug=instance.slug).exists():
+                instance.slug = unique_slug(type(instance), instance.title)
+            if isinstance(instance, Event):
+                # The RSVPs that held these seats were deleted with the row.
+                instance.seats_taken = 0
+            obj.save()
+            if isinstance(instance, Article):
+                authors.schedule(instance.author_id)
+                tags.sync(instance, created=True)
+            # A raw save sends no change-feed entry; archiving logged a deletion.
+            changefeed.log("article" if isinstance(instance, Article) else "event", [instance.pk])
+        ArchivedRecord.objects.filter(pk__in=[record.pk for record in records]).delete()
+    return restored + len(records)
@@ -0,0 +1,48 @@
+"""Synthetic rows for the bench_* commands; callers run inside a rolled-back transaction."""
+import uuid
+from datetime import timedelta
+
+from django.utils import timezone
+
+from authentication.models import Article, Chapter, Event, Profile, User
+
+
+def seed(users=100, articles=100, events=100, chapters=5):
+    run = uuid.uuid4().hex[:8]
+    now = timezone.now()
+    chapter_rows = Chapter.objects.bulk_create(
+        Chapter(name=f"Chapter {i}", slug=f"bench-{run}-{i}") for i in range(chapters)
+    )
+    user_rows = User.objects.bulk_create(
+        User(
+            email=f"bench-{run}-{i}@example.com", first_name=f"First{i}", last_name=f"Last{i}",
+            role="member", chapter=chapter_rows[i % chapters], password="!",
+        )
+        for i in range(users)
+    )
+    Profile.objects.bulk_create(
+        Profile(
+            user=user, title="Engineer", company_name="Linq", bio="Bio " * 40,
+            industry="Software", location="Lahore", skills=["python", "django", "sql"],
+            status="ACTIVE", slug=f"bench-{run}-{i}", profile_image="profile_images/default-avatar.png",
+            certifications=[{"name": "Cert", "year": 2024}], faqs=[{"q": "Why?", "a": "Because."}],
+        )
+        for i, user in enumerate(user_rows)
+    )
+    Article.objects.bulk_create(
+        Article(
+            title=f"Article {i}", slug=f"bench-{run}-{i}", content_body="Lorem ipsum " * 200,
+            tags=["django", "performance"], category="tech",
+            author=user_rows[i % users], chapter=chapter_rows[i % chapters],
+        )
+        for i in range(articles)
+    )
+    Event.objects.bulk_create(
+        Event(
+            title=f"Event {i}", slug=f"bench-{run}-{i}", description="Meetup " * 30, category="meetup",
+            start_datetime=now + timedelta(hours=i), end_datetime=now + timedelta(hours=i + 2),
+            location="Lahore", chapter=chapter_rows[i % chapters], created_by=user_rows[i % users],
+        )
+        for i in range(events)
+    )
+    return run
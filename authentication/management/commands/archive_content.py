@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from authentication import lifecycle
+
+
+class Command(BaseCommand):
+    help = (
+        "Move soft-deleted rows, past events and stale articles out of the hot tables into "
+        "ArchivedRecord (see lifecycle.py). Run on a schedule, e.g. nightly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, help="Rows per transaction (default ARCHIVE_BATCH_SIZE).")
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be archived.")
+        parser.add_argument("--restore", nargs="+", metavar="ID", help="Restore these article/event ids instead.")
+
+    def handle(self, *args, **options):
+        if options["restore"]:
+            restored = lifecycle.restore(options["restore"])
+            self.stdout.write(self.style.SUCCESS(f"Restored {restored} row(s)."))
+            return
+
+        if options["dry_run"]:
+            for model, queryset, reason in lifecycle.candidates():
+                self.stdout.write(f"{model._meta.label_lower} ({reason}): {queryset.count()}")
+            return
+
+        counts = lifecycle.archive_all(size=options["batch_size"])
+        for (label, reason), count in counts.items():
+            self.stdout.write(f"{label} ({reason}): {count}")
+        self.stdout.write(self.style.SUCCESS(f"Archived {sum(counts.values())} row(s)."))
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+
+from authentication.models import Article, Chapter, Event, User
+
+from ._benchdata import seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Time chapter-filtered queries and joins on seeded data (rolled back). "
+        "Run it on a checkout before and after the Chapter key migration to compare."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=20000)
+        parser.add_argument("--chapters", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        repeat = options["repeat"]
+        key_type = Chapter._meta.pk.db_type(connection)
+        self.stdout.write(f"{connection.vendor}: chapter key column type {key_type}")
+
+        with transaction.atomic():
+            run = seed(users=options["rows"], articles=options["rows"], events=options["rows"], chapters=options["chapters"])
+            chapter = Chapter.objects.filter(slug__startswith=f"bench-{run}").first()
+            cases = {
+                "members of chapter": lambda: User.objects.filter(chapter=chapter).count(),
+                "chapter events by date": lambda: list(
+                    Event.objects.filter(chapter=chapter).order_by("start_datetime").values_list("pk")[:100]
+                ),
+                "articles joined to chapter": lambda: list(
+                    Article.objects.filter(chapter__slug=chapter.slug).values_list("pk", "chapter__name")[:100]
+                ),
+                "per-chapter member counts": lambda: list(
+                    Chapter.objects.annotate(n=Count("users")).values_list("pk", "n")
+                ),
+            }
+            for label, query in cases.items():
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    query()
+                    timings.append(time.perf_counter() - start)
+                self.stdout.write(f"{label:<28} best {min(timings) * 1000:>8.3f} ms")
+            transaction.set_rollback(True)
@@ -0,0 +1,58 @@
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.views import static
+
+from authentication import files
+
+
+class Command(BaseCommand):
+    help = "Compare django.views.static.serve with files.serve for media and static requests."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=200)
+        parser.add_argument("--size", type=int, default=2 * 2 ** 20, help="media file size in bytes")
+
+    def handle(self, *args, **options):
+        repeat = options["repeat"]
+        factory = RequestFactory()
+        with tempfile.TemporaryDirectory() as root:
+            media = "photo.9f86d081884c7d65.jpg"
+            with open(os.path.join(root, media), "wb") as f:
+                f.write(os.urandom(options["size"]))
+            asset = "app.3f2a1b9c8d7e.css"
+            with open(os.path.join(root, asset), "w") as f:
+                f.write(".card { margin: 0 auto; padding: 1rem; }\n" * 5000)
+            files.compress_file(os.path.join(root, asset))
+
+            etag = files.serve(factory.get("/"), root, media)["ETag"]
+            cases = [
+                ("media full", media, {}, {}),
+                ("media range 64K", media, {"HTTP_RANGE": "bytes=0-65535"}, {}),
+                ("media revalidate", media, {"HTTP_IF_NONE_MATCH": etag}, {}),
+                ("static br", asset, {"HTTP_ACCEPT_ENCODING": "gzip, br"}, {"precompressed": True}),
+            ]
+            for label, name, headers, kwargs in cases:
+                request = factory.get("/", **headers)
+                stock, stock_bytes, stock_status = self._best(lambda: static.serve(request, name, root), repeat)
+                fast, fast_bytes, fast_status = self._best(lambda: files.serve(request, root, name, **kwargs), repeat)
+                self.stdout.write(
+                    f"{label:<17} stock {stock_status} {stock_bytes:>9,} B {stock * 1e6:>8.0f} us   "
+                    f"new {fast_status} {fast_bytes:>9,} B {fast * 1e6:>8.0f} us"
+                )
+        self.stdout.write("Under gunicorn the new path's bodies go through sendfile(2); these in-process timings read them.")
+
+    @staticmethod
+    def _best(view, repeat):
+        best, size, status = float("inf"), 0, None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = view()
+            body = b"".join(response.streaming_content) if response.streaming else response.content
+            best = min(best, time.perf_counter() - start)
+            response.close()
+            size, status = len(body), response.status_code
+        return best, size, status
@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from authentication.models import Article, Event, User
+from authentication.renderers import FastJSONRenderer, orjson
+from authentication.serializers import ArticleSerializer, EventSerializer, UserListSerializer
+
+from ._benchdata import seed
+
+
+class Command(BaseCommand):
+    help = "Render a 100-article page and a 1k-user dashboard with the stock and fast JSON renderers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        repeat = options["repeat"]
+        with transaction.atomic():
+            run = seed(users=1000, articles=100, events=100)
+            articles = Article.objects.filter(slug__startswith=f"bench-{run}")
+            payloads = {
+                "100 articles": {
+                    "count": 100, "next": None, "previous": None,
+                    "results": ArticleSerializer(articles, many=True).data,
+                },
+                "1k dashboard": {
+                    "users": UserListSerializer(User.objects.filter(email__startswith=f"bench-{run}"), many=True).data,
+                    "articles": ArticleSerializer(articles, many=True).data,
+                    "events": EventSerializer(Event.objects.filter(slug__startswith=f"bench-{run}"), many=True).data,
+                },
+            }
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"fast encoder: {'orjson ' + orjson.__version__ if orjson else 'unavailable (stdlib fallback)'}")
+        for label, data in payloads.items():
+            stock = self._best(JSONRenderer().render, data, repeat)
+            fast = self._best(FastJSONRenderer().render, data, repeat)
+            size = len(JSONRenderer().render(data))
+            self.stdout.write(
+                f"{label:<13} {size / 1024:>8.0f} KiB   stock {stock * 1000:>7.2f} ms   "
+                f"fast {fast * 1000:>7.2f} ms   x{stock / fast:.1f}"
+            )
+
+    @staticmethod
+    def _best(render, data, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            render(data)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
@@ -0,0 +1,80 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from authentication import rsvp
+from authentication.models import Chapter, Event, EventRSVP, User
+
+
+def _in_thread(func, *args):
+    try:
+        return func(*args)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer one event with concurrent RSVPs and cancellations, then check that no seat was "
+        "oversold or lost. Uses the configured database; everything it creates is deleted again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--members", type=int, default=500)
+        parser.add_argument("--capacity", type=int, default=100)
+        parser.add_argument("--threads", type=int, default=32)
+
+    def handle(self, *args, **options):
+        members, capacity, threads = options["members"], options["capacity"], options["threads"]
+        run = uuid.uuid4().hex[:8]
+        chapter = Chapter.objects.create(name=f"bench-{run}", slug=f"bench-{run}")
+        users = User.objects.bulk_create([
+            User(email=f"bench-{run}-{i}@example.com", first_name="Bench", last_name=str(i), role="member")
+            for i in range(members)
+        ])
+        start = timezone.now() + timedelta(days=1)
+        event = Event.objects.create(
+            title=f"bench-{run}", description="RSVP benchmark", category="meetup", start_datetime=start,
+            end_datetime=start + timedelta(hours=2), location="Online", chapter=chapter,
+            created_by=users[0], capacity=capacity,
+        )
+        try:
+            with ThreadPoolExecutor(threads) as pool:
+                began = time.perf_counter()
+                list(pool.map(lambda user: _in_thread(rsvp.request, event, user), users))
+                elapsed = time.perf_counter() - began
+                self.stdout.write(f"rsvp     {members / elapsed:>10.0f} requests/s ({threads} threads)")
+                self.check_seats(event, capacity)
+
+                # Replays must not change anything.
+                list(pool.map(lambda user: _in_thread(rsvp.request, event, user), users))
+                self.check_seats(event, capacity)
+
+                leaving = list(EventRSVP.objects.filter(event=event, status=rsvp.GOING).values_list("user", flat=True))
+                leaving = [user for user in users if user.pk in set(leaving[: capacity // 2])]
+                began = time.perf_counter()
+                list(pool.map(lambda user: _in_thread(rsvp.cancel, event, user), leaving))
+                elapsed = time.perf_counter() - began
+                self.stdout.write(f"cancel   {len(leaving) / max(elapsed, 1e-9):>10.0f} requests/s")
+                rsvp.fill(event.pk)
+                self.check_seats(event, capacity)
+        finally:
+            User.objects.filter(email__startswith=f"bench-{run}-").delete()
+            chapter.delete()
+        self.stdout.write(self.style.SUCCESS("No seat oversold or lost."))
+
+    def check_seats(self, event, capacity):
+        event.refresh_from_db(fields=["seats_taken"])
+        going = EventRSVP.objects.filter(event=event, status=rsvp.GOING).count()
+        waiting = EventRSVP.objects.filter(event=event, status=rsvp.WAITLISTED).count()
+        self.stdout.write(f"         going={going} waitlisted={waiting} seats_taken={event.seats_taken}")
+        if going > capacity or event.seats_taken != going or (waiting and going < capacity):
+            raise CommandError(
+                f"Inconsistent seats: capacity={capacity} going={going} "
+                f"seats_taken={event.seats_taken} waitlisted={waiting}"
+            )
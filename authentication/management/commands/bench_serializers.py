@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from authentication.fastpath import compile_serializer
+from authentication.models import Article, Event, User
+from authentication.serializers import ArticleSerializer, EventSerializer, UserListSerializer
+
+from ._benchdata import seed
+
+
+class Command(BaseCommand):
+    help = "Rows per second for DRF serializers vs the compiled fast path (seeded data is rolled back)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        rows, repeat = options["rows"], options["repeat"]
+        with transaction.atomic():
+            run = seed(users=rows, articles=rows, events=rows)
+            cases = [
+                ("articles", ArticleSerializer, Article.objects.filter(slug__startswith=f"bench-{run}")),
+                ("events", EventSerializer, Event.objects.filter(slug__startswith=f"bench-{run}")),
+                ("users", UserListSerializer, User.objects.filter(email__startswith=f"bench-{run}")),
+            ]
+            for label, serializer_class, queryset in cases:
+                drf = self._best(lambda: serializer_class(queryset.all(), many=True).data, repeat)
+                compiled = compile_serializer(serializer_class)
+                fast = self._best(lambda: compiled.serialize(queryset.all()), repeat)
+                self.stdout.write(
+                    f"{label:<9} drf {rows / drf:>10.0f} rows/s   fast {rows / fast:>10.0f} rows/s   "
+                    f"x{drf / fast:.1f}"
+                )
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def _best(fn, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
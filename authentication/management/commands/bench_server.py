@@ -0,0 +1,111 @@
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from authentication.models import Article, Chapter, Event, User
+
+from ._benchdata import seed
+
+# Anonymous read endpoints that make up most production traffic.
+LOAD_PATHS = ["/chapters/", "/events/", "/articles/", "/events/calendar/", "/events/feed.ics"]
+
+
+class Command(BaseCommand):
+    help = "Boot gunicorn with backend.server and drive the public read endpoints with concurrent clients."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--worker-class", action="append", choices=["sync", "gthread", "asgi"])
+        parser.add_argument("--clients", type=int, default=16)
+        parser.add_argument("--duration", type=float, default=10)
+        parser.add_argument("--port", type=int, default=8765)
+
+    def handle(self, *args, **options):
+        # The server runs in other processes, so the rows must be committed;
+        # they are removed again when the run ends.
+        run = seed(users=200, articles=200, events=200)
+        try:
+            for kind in options["worker_class"] or ["sync", "gthread"]:
+                self._bench(kind, options)
+        finally:
+            Event.objects.filter(slug__startswith=f"bench-{run}").delete()
+            Article.objects.filter(slug__startswith=f"bench-{run}").delete()
+            User.objects.filter(email__startswith=f"bench-{run}").delete()
+            Chapter.objects.filter(slug__startswith=f"bench-{run}").delete()
+
+    def _bench(self, kind, options):
+        base = f"http://127.0.0.1:{options['port']}"
+        env = dict(
+            os.environ, PORT=str(options["port"]), WEB_WORKER_CLASS=kind,
+            DJANGO_SETTINGS_MODULE=os.environ.get("DJANGO_SETTINGS_MODULE", settings.SETTINGS_MODULE),
+        )
+        log = tempfile.TemporaryFile()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "python:backend.server", "--access-logfile", "/dev/null"],
+            env=env, cwd=settings.BASE_DIR, stdout=subprocess.DEVNULL, stderr=log,
+        )
+        try:
+            self._wait_ready(server, log, base + LOAD_PATHS[0])
+            latencies, errors = self._load(base, options["clients"], options["duration"])
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+            log.close()
+
+        if not latencies:
+            raise CommandError(f"{kind}: no successful requests ({errors} errors)")
+        latencies.sort()
+        self.stdout.write(
+            f"{kind:<8} {len(latencies) / options['duration']:>8.1f} req/s   "
+            f"p50 {statistics.median(latencies) * 1000:>6.1f} ms   "
+            f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:>6.1f} ms   errors {errors}"
+        )
+
+    @staticmethod
+    def _wait_ready(server, log, url, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                log.seek(0)
+                raise CommandError(f"gunicorn exited with {server.returncode}:\n{log.read().decode()}")
+            try:
+                urllib.request.urlopen(url, timeout=5).read()
+                return
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.2)
+        raise CommandError("gunicorn did not start in time")
+
+    @staticmethod
+    def _load(base, clients, duration):
+        latencies, errors = [], [0]
+        lock = threading.Lock()
+        deadline = time.monotonic() + duration
+
+        def client(offset):
+            done, failed, i = [], 0, offset
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    urllib.request.urlopen(base + LOAD_PATHS[i % len(LOAD_PATHS)], timeout=30).read()
+                    done.append(time.perf_counter() - start)
+                except (urllib.error.URLError, ConnectionError):
+                    failed += 1
+                i += 1
+            with lock:
+                latencies.extend(done)
+                errors[0] += failed
+
+        threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return latencies, errors[0]
@@ -0,0 +1,41 @@
+import time
+import uuid
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+
+from authentication import newsletter
+from authentication.views import NewsletterSubscribeView
+
+
+class Command(BaseCommand):
+    help = "Subscriptions per second through NewsletterSubscribeView, direct vs buffered ingest (rolled back)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        count = options["count"]
+        view = NewsletterSubscribeView.as_view()
+        factory = APIRequestFactory()
+
+        for label, buffered in (("direct", False), ("buffered", True)):
+            run = uuid.uuid4().hex[:8]
+            requests = [
+                factory.post("/subscribe/", {"email": f"bench-{run}-{i}@example.com"}, format="json")
+                for i in range(count)
+            ]
+            with transaction.atomic(), override_settings(
+                NEWSLETTER_BUFFERED_INGEST=buffered, NEWSLETTER_FLUSH_INTERVAL=0
+            ):
+                start = time.perf_counter()
+                for request in requests:
+                    view(request)
+                newsletter.buffer.flush()
+                elapsed = time.perf_counter() - start
+                transaction.set_rollback(True)
+            cache.delete_many([f"newsletter:seen:bench-{run}-{i}@example.com" for i in range(count)])
+            self.stdout.write(f"{label:<9} {count / elapsed:>10.0f} subscriptions/s")
@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory
+
+from authentication.models import User
+from authentication.views import AllUsersView
+
+from ._benchdata import seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Payload size and time per page of /user/all/ with full member rows vs the ?view=card "
+        "projection (seeded data is rolled back)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--page-size", type=int, default=100)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        page_size, repeat = options["page_size"], options["repeat"]
+        view = AllUsersView.as_view()
+        factory = APIRequestFactory()
+        with transaction.atomic():
+            seed(users=options["users"], articles=0, events=0)
+            cases = [
+                ("full", {}),
+                ("card", {"view": "card"}),
+                ("fields", {"fields": "id,first_name,last_name"}),
+            ]
+            baseline = None
+            for label, params in cases:
+                def fetch():
+                    response = view(factory.get("/user/all/", {"page_size": page_size, **params}))
+                    return response.render().content
+
+                size = len(fetch())
+                elapsed = self._best(fetch, repeat)
+                baseline = baseline or (size, elapsed)
+                self.stdout.write(
+                    f"{label:<7} {size / 1024:>8.1f} KiB  {elapsed * 1000:>7.2f} ms per {page_size} users   "
+                    f"size x{size / baseline[0]:.2f}  time x{elapsed / baseline[1]:.2f}"
+                )
+            self.stdout.write(f"({User.objects.count()} users in the table)")
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def _best(fn, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
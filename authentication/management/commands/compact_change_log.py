@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from authentication import changefeed
+
+
+class Command(BaseCommand):
+    help = (
+        "Drop change log entries superseded by a newer one for the same object, and entries older "
+        "than CHANGE_FEED_RETENTION_DAYS (see changefeed.py). Run on a schedule, e.g. hourly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=changefeed.COMPACT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        deleted = changefeed.compact(size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} change log entries."))
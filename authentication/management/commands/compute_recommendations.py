@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from authentication import recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the stored member recommendations (see recommendations.py); run this after "
+        "changing the weights or RECOMMENDATIONS_K. Run it with --pending on a schedule, e.g. "
+        "every few minutes, to apply queued profile changes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", nargs="+", metavar="ID", help="Only refresh what these members affect.")
+        parser.add_argument("--pending", action="store_true", help="Only refresh the members queued by profile changes.")
+
+    def handle(self, *args, **options):
+        if options["pending"]:
+            processed = recommendations.process_pending()
+            self.stdout.write(self.style.SUCCESS(f"Refreshed recommendations for {processed} queued member(s)."))
+            return
+        if options["user"]:
+            recommendations.refresh(options["user"])
+            self.stdout.write(self.style.SUCCESS(f"Refreshed recommendations for {len(options['user'])} member(s)."))
+            return
+        covered = recommendations.recompute_all()
+        self.stdout.write(self.style.SUCCESS(f"Recomputed recommendations for {covered} member(s)."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from authentication import chapter_cache, stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute ChapterStats from the User, Article and Event tables. Run periodically: "
+        "bulk updates bypass the signal-driven deltas and upcoming_events ages with time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chapter", help="Only recompute this chapter id.")
+
+    def handle(self, *args, **options):
+        chapter_id = options["chapter"]
+        if chapter_id is not None:
+            chapter_id = chapter_cache.parse_id(chapter_id)
+            if chapter_id is None:
+                raise CommandError(f"{options['chapter']} is not a chapter id.")
+        count = stats.recompute(chapter_id)
+        self.stdout.write(self.style.SUCCESS(f"Recomputed stats for {count} chapter(s)."))
@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from authentication import bulk
+from authentication.models import BulkJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Resume bulk user jobs whose background thread stopped reporting progress "
+        "(for example after a worker restart). Run periodically or after deploys."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--job", help="Only run this job id, whatever its state.")
+        parser.add_argument("--stale-minutes", type=int, default=10,
+                            help="Treat unfinished jobs idle for this long as abandoned.")
+
+    def handle(self, *args, **options):
+        if options["job"]:
+            try:
+                jobs = [BulkJob.objects.get(pk=options["job"])]
+            except (BulkJob.DoesNotExist, DjangoValidationError) as exc:
+                raise CommandError(f"{options['job']} is not a bulk job id.") from exc
+        else:
+            jobs = list(bulk.resumable_jobs(timedelta(minutes=options["stale_minutes"])))
+
+        for job in jobs:
+            try:
+                job = bulk.run_job(job.pk)
+            except Exception as exc:
+                self.stderr.write(f"Job {job.pk} failed: {exc}")
+                continue
+            self.stdout.write(f"Job {job.pk}: {job.action} {job.processed}/{job.total}, {job.affected} affected.")
+        self.stdout.write(self.style.SUCCESS(f"Ran {len(jobs)} bulk job(s)."))
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from authentication import digest as digests
+from authentication.models import Digest
+
+
+class Command(BaseCommand):
+    help = (
+        "Build this week's newsletter digest and deliver it to all subscriptions. "
+        "Resumes the latest unfinished digest instead of building a new one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--digest", help="Resume a specific digest by id.")
+        parser.add_argument("--new", action="store_true", help="Always build a new digest.")
+        parser.add_argument("--days", type=int, default=7, help="Article window in days.")
+        parser.add_argument("--upcoming-days", type=int, default=14, help="Event window in days.")
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument(
+            "--retry-failed", action="store_true",
+            help="Re-send recipients whose delivery failed (with --digest for a completed digest).",
+        )
+
+    def handle(self, *args, **options):
+        if options["digest"]:
+            try:
+                digest = Digest.objects.get(pk=options["digest"])
+            except (Digest.DoesNotExist, ValueError):
+                raise CommandError(f"Digest {options['digest']} not found.")
+        else:
+            digest = None if options["new"] else (
+                Digest.objects.filter(completed_at__isnull=True).order_by("-created_at").first()
+            )
+            if digest is None:
+                digest = digests.build_digest(days=options["days"], upcoming_days=options["upcoming_days"])
+                self.stdout.write(f"Built digest {digest.id}: {digest.subject}")
+            else:
+                self.stdout.write(f"Resuming digest {digest.id}: {digest.subject}")
+
+        if options["retry_failed"]:
+            self.stdout.write(f"Retrying {digests.retry_failed(digest)} failed deliveries.")
+
+        summary = digests.deliver(digest, batch_size=options["batch_size"])
+        stuck = digest.deliveries.filter(status="SENDING").count()
+        self.stdout.write(self.style.SUCCESS(f"Sent {summary['sent']}, failed {summary['failed']}."))
+        if stuck:
+            self.stdout.write(self.style.WARNING(
+                f"{stuck} deliveries are mid-send in another run, or were interrupted recently; "
+                "they are retried once older than DIGEST_SENDING_TIMEOUT."
+            ))
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-19 14:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0011_profile_whatsapp'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['start_datetime'], name='authenticat_start_d_3c0750_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['chapter', 'start_datetime'], name='authenticat_chapter_685f7f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['category', 'start_datetime'], name='authenticat_categor_f37a26_idx'),
+        ),
+    ]
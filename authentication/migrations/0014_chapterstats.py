@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-19 14:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0013_digest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChapterStats',
+            fields=[
+                ('chapter', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='authentication.chapter')),
+                ('members', models.IntegerField(default=0)),
+                ('articles', models.IntegerField(default=0)),
+                ('events', models.IntegerField(default=0)),
+                ('upcoming_events', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Step 1 of 3 moving Chapter.id from a 36-char string to a native UUIDField.
+#
+# Expand only: nullable UUID columns are added next to the legacy string key
+# and the string foreign keys, so code still running on the old schema keeps
+# working while 0016 backfills them.
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0014_chapterstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chapter',
+            name='key',
+            field=models.UUIDField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='chapter_key',
+            field=models.UUIDField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='chapter_key',
+            field=models.UUIDField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='chapter_key',
+            field=models.UUIDField(editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Step 2 of 3: backfill the UUID columns added in 0015.
+#
+# Runs outside a single transaction and updates foreign key rows in small
+# batches, so it holds row locks only briefly and can be re-run safely: only
+# rows whose key is still NULL are touched. 0017 runs it once more to pick
+# up rows written by old code after this step.
+
+import uuid
+
+from django.db import migrations, transaction
+
+BATCH_SIZE = 1000
+
+
+def legacy_key(value):
+    # Chapter ids were str(uuid4()); anything else maps to a stable uuid5.
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return uuid.uuid5(uuid.NAMESPACE_URL, f"linq-chapter:{value}")
+
+
+def backfill(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    Chapter = apps.get_model('authentication', 'Chapter')
+    for pk in Chapter.objects.using(alias).filter(key__isnull=True).values_list('pk', flat=True):
+        Chapter.objects.using(alias).filter(pk=pk).update(key=legacy_key(pk))
+
+    keys = dict(Chapter.objects.using(alias).values_list('pk', 'key'))
+    for model_name in ('user', 'article', 'event'):
+        model = apps.get_model('authentication', model_name)
+        for chapter_id, key in keys.items():
+            pending = model.objects.using(alias).filter(chapter_id=chapter_id, chapter_key__isnull=True)
+            while True:
+                pks = list(pending.values_list('pk', flat=True)[:BATCH_SIZE])
+                if not pks:
+                    break
+                with transaction.atomic(using=alias):
+                    model.objects.using(alias).filter(pk__in=pks).update(chapter_key=key)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('authentication', '0015_chapter_key_expand'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
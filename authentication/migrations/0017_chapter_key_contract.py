@@ -0,0 +1,143 @@
+# Step 3 of 3: swap the backfilled UUID columns in as Chapter's primary key
+# and the chapter foreign keys, then drop the legacy string columns.
+#
+# Deploy together with the code that expects Chapter.id to be a UUIDField.
+# ChapterStats is keyed by chapter, so it is recreated and recomputed.
+#
+# The legacy primary key is dropped before `key` is promoted: MySQL and
+# PostgreSQL refuse a second primary key on the table, and AlterField only
+# drops the old one when it alters that same field. SQLite rebuilds the table
+# on every AlterField and needs no help.
+
+import importlib
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.utils import timezone
+
+backfill = importlib.import_module('authentication.migrations.0016_chapter_key_backfill').backfill
+
+
+def recompute_chapter_stats(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    Chapter = apps.get_model('authentication', 'Chapter')
+    ChapterStats = apps.get_model('authentication', 'ChapterStats')
+    totals = {pk: {} for pk in Chapter.objects.using(alias).values_list('pk', flat=True)}
+    now = timezone.now()
+    sources = [
+        ('user', {'members': Count('pk')}),
+        ('article', {'articles': Count('pk')}),
+        ('event', {'events': Count('pk'), 'upcoming_events': Count('pk', filter=Q(start_datetime__gte=now))}),
+    ]
+    for model_name, aggregates in sources:
+        model = apps.get_model('authentication', model_name)
+        rows = model.objects.using(alias).filter(chapter__isnull=False).values('chapter_id').annotate(**aggregates).order_by()
+        for row in rows:
+            totals[row['chapter_id']].update({name: row[name] for name in aggregates})
+    ChapterStats.objects.using(alias).bulk_create(
+        ChapterStats(chapter_id=pk, **counts) for pk, counts in totals.items()
+    )
+
+
+def drop_legacy_primary_key(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        schema_editor._delete_primary_key(apps.get_model('authentication', 'Chapter'), strict=True)
+
+
+def chapter_foreign_key(on_delete, **kwargs):
+    return models.ForeignKey(on_delete=on_delete, to='authentication.chapter', **kwargs)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0016_chapter_key_backfill'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='ChapterStats',
+        ),
+        migrations.RemoveIndex(
+            model_name='event',
+            name='authenticat_chapter_685f7f_idx',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='chapter',
+        ),
+        migrations.RemoveField(
+            model_name='article',
+            name='chapter',
+        ),
+        migrations.RemoveField(
+            model_name='event',
+            name='chapter',
+        ),
+        migrations.RunPython(drop_legacy_primary_key, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='chapter',
+            name='key',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.RemoveField(
+            model_name='chapter',
+            name='id',
+        ),
+        migrations.RenameField(
+            model_name='chapter',
+            old_name='key',
+            new_name='id',
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='chapter_key',
+            field=chapter_foreign_key(
+                django.db.models.deletion.SET_NULL, blank=True, null=True, related_name='users',
+            ),
+        ),
+        migrations.RenameField(
+            model_name='user',
+            old_name='chapter_key',
+            new_name='chapter',
+        ),
+        migrations.AlterField(
+            model_name='article',
+            name='chapter_key',
+            field=chapter_foreign_key(django.db.models.deletion.CASCADE, related_name='articles'),
+        ),
+        migrations.RenameField(
+            model_name='article',
+            old_name='chapter_key',
+            new_name='chapter',
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='chapter_key',
+            field=chapter_foreign_key(django.db.models.deletion.CASCADE, related_name='events'),
+        ),
+        migrations.RenameField(
+            model_name='event',
+            old_name='chapter_key',
+            new_name='chapter',
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['chapter', 'start_datetime'], name='authenticat_chapter_685f7f_idx'),
+        ),
+        migrations.CreateModel(
+            name='ChapterStats',
+            fields=[
+                ('chapter', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='authentication.chapter')),
+                ('members', models.IntegerField(default=0)),
+                ('articles', models.IntegerField(default=0)),
+                ('events', models.IntegerField(default=0)),
+                ('upcoming_events', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(recompute_chapter_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:13
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0018_bulkjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ArchivedRecord',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('authentication.article', 'Article'), ('authentication.event', 'Event')], max_length=30)),
+                ('reason', models.CharField(choices=[('deleted', 'Deleted'), ('expired', 'Past event'), ('stale', 'Stale article')], max_length=10)),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('chapter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='authentication.chapter')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'archived_at'], name='authenticat_kind_8c1730_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:16
+
+from django.db import migrations, models
+
+
+def backfill(apps, schema_editor):
+    # One UPDATE per author, the same fan-out authors.refresh() does.
+    alias = schema_editor.connection.alias
+    User = apps.get_model('authentication', 'User')
+    Article = apps.get_model('authentication', 'Article')
+    authors = Article.objects.using(alias).values_list('author_id', flat=True).distinct()
+    rows = User.objects.using(alias).filter(pk__in=list(authors)).values_list(
+        'pk', 'first_name', 'last_name', 'profile__title', 'profile__profile_image',
+    )
+    for pk, first_name, last_name, title, image in rows:
+        Article.objects.using(alias).filter(author_id=pk).update(
+            author_name=f"{first_name} {last_name}".strip(),
+            author_title=title or '',
+            author_avatar=image or None,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0019_soft_delete_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='author_avatar',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='profile_images/'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='author_name',
+            field=models.CharField(blank=True, editable=False, max_length=301),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='author_title',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:17
+#
+# render() is a frozen copy of authentication.content as of this migration, so
+# later edits there do not change what replaying it produces. Bodies rendered
+# here are re-rendered by Article.save() whenever they are next edited.
+
+import hashlib
+import html
+import re
+
+import nh3
+from django.db import migrations, models, transaction
+
+BATCH_SIZE = 500
+EXCERPT_LENGTH = 280
+
+_TAG = re.compile(r'<[a-zA-Z!/]')
+_PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+_BLOCK_END = re.compile(r'</(?:p|div|h[1-6]|li|blockquote|pre|tr|figcaption)>|<br\s*/?>', re.IGNORECASE)
+
+
+def to_html(body):
+    if _TAG.search(body):
+        return nh3.clean(body, link_rel='noopener noreferrer nofollow')
+    paragraphs = (p.strip() for p in _PARAGRAPH_BREAK.split(body.replace('\r\n', '\n')))
+    return ''.join(f"<p>{html.escape(p).replace(chr(10), '<br>')}</p>" for p in paragraphs if p)
+
+
+def excerpt(text, length=EXCERPT_LENGTH):
+    if len(text) <= length:
+        return text
+    cut = text[:length - 1]
+    if ' ' in cut and not text[length - 1].isspace():
+        cut = cut.rsplit(' ', 1)[0]
+    return cut.rstrip(' .,;:-') + '…'
+
+
+def render(body):
+    rendered = to_html(body or '')
+    text = ' '.join(html.unescape(nh3.clean(_BLOCK_END.sub(' ', rendered), tags=set())).split())
+    return {
+        'content_html': rendered,
+        'excerpt': excerpt(text),
+        'word_count': len(text.split()),
+        'content_hash': hashlib.sha256((body or '').encode()).hexdigest(),
+    }
+
+
+def backfill(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    Article = apps.get_model('authentication', 'Article')
+    pending = Article.objects.using(alias).filter(content_hash='').order_by('pk')
+    while True:
+        rows = list(pending.only('pk', 'content_body')[:BATCH_SIZE])
+        if not rows:
+            break
+        with transaction.atomic(using=alias):
+            for row in rows:
+                for name, value in render(row.content_body).items():
+                    setattr(row, name, value)
+            Article.objects.using(alias).bulk_update(rows, ['content_html', 'excerpt', 'word_count', 'content_hash'])
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('authentication', '0020_article_author_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=300),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:20
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0021_article_rendered_content'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('article_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-article_count', 'name'], name='authenticat_article_d702e5_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArticleTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='article_tags', to='authentication.article')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='article_tags', to='authentication.tag')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='tag_set',
+            field=models.ManyToManyField(blank=True, related_name='articles', through='authentication.ArticleTag', to='authentication.tag'),
+        ),
+        migrations.AddIndex(
+            model_name='articletag',
+            index=models.Index(fields=['tag', 'article'], name='authenticat_tag_id_07bd07_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='articletag',
+            constraint=models.UniqueConstraint(fields=('article', 'tag'), name='unique_article_tag'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Copies Article.tags (JSON) into Tag / ArticleTag and normalizes the JSON.
+#
+# Runs in batches outside a single transaction and can be re-run: tags and
+# links are created with ignore_conflicts, and the counts are recomputed from
+# the links at the end. The normalization is a frozen copy of
+# authentication.tags as of this migration, so later edits there do not change
+# what replaying it produces.
+
+import uuid
+
+from django.db import migrations, transaction
+from django.db.models import Count
+
+BATCH_SIZE = 500
+MAX_LENGTH = 50
+
+
+def normalize(name):
+    return ' '.join(str(name).split()).lower()[:MAX_LENGTH].strip()
+
+
+def normalize_list(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    elif not isinstance(value, (list, tuple)):
+        value = [value]
+    return list(dict.fromkeys(name for name in map(normalize, value) if name))
+
+
+def backfill(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    Article = apps.get_model('authentication', 'Article')
+    Tag = apps.get_model('authentication', 'Tag')
+    ArticleTag = apps.get_model('authentication', 'ArticleTag')
+
+    articles = Article.objects.using(alias).filter(tags__isnull=False).order_by('pk').only('pk', 'tags')
+    last_pk = None
+    while True:
+        batch = articles if last_pk is None else articles.filter(pk__gt=last_pk)
+        rows = list(batch[:BATCH_SIZE])
+        if not rows:
+            break
+        last_pk = rows[-1].pk
+        with transaction.atomic(using=alias):
+            for row in rows:
+                row.tags = normalize_list(row.tags)
+            names = {name for row in rows for name in row.tags}
+            Tag.objects.using(alias).bulk_create(
+                [Tag(id=uuid.uuid4(), name=name) for name in names], ignore_conflicts=True,
+            )
+            tag_ids = dict(Tag.objects.using(alias).filter(name__in=names).values_list('name', 'pk'))
+            ArticleTag.objects.using(alias).bulk_create(
+                [ArticleTag(article_id=row.pk, tag_id=tag_ids[name]) for row in rows for name in row.tags],
+                ignore_conflicts=True,
+            )
+            Article.objects.using(alias).bulk_update(rows, ['tags'])
+
+    counts = (
+        ArticleTag.objects.using(alias).filter(article__deleted_at__isnull=True)
+        .values('tag_id').annotate(n=Count('pk')).order_by()
+    )
+    for row in counts:
+        Tag.objects.using(alias).filter(pk=row['tag_id']).update(article_count=row['n'])
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('authentication', '0022_article_tags'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
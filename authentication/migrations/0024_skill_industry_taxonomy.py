@@ -0,0 +1,60 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:24
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0023_article_tags_backfill'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Industry',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('key', models.CharField(max_length=255, unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'industries',
+            },
+        ),
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('key', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='industry_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='profiles', to='authentication.industry'),
+        ),
+        migrations.CreateModel(
+            name='ProfileSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='profile_skills', to='authentication.profile')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='profile_skills', to='authentication.skill')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='skill_set',
+            field=models.ManyToManyField(blank=True, related_name='profiles', through='authentication.ProfileSkill', to='authentication.skill'),
+        ),
+        migrations.AddIndex(
+            model_name='profileskill',
+            index=models.Index(fields=['skill', 'profile'], name='authenticat_skill_i_c3dbf6_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='profileskill',
+            constraint=models.UniqueConstraint(fields=('profile', 'skill'), name='unique_profile_skill'),
+        ),
+    ]
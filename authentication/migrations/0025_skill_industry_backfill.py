@@ -0,0 +1,136 @@
+# Canonicalizes Profile.skills / Profile.industry into Skill, Industry and
+# ProfileSkill rows.
+#
+# Spellings are grouped by key (taxonomy.canonical: case, spacing, aliases);
+# each group is named after its alias or, failing that, its most common
+# spelling, so "python", "Python" and "PYTHON" become one "Python" row. The
+# profiles are then rewritten in batches. Re-running is safe. The aliases and
+# canonical() are a frozen copy of authentication.taxonomy as of this
+# migration, so later edits there do not change what replaying it produces.
+
+import uuid
+from collections import Counter, defaultdict
+
+from django.db import migrations, transaction
+
+BATCH_SIZE = 500
+MAX_LENGTH = {'skill': 100, 'industry': 255}
+
+ALIASES = {
+    'skill': {
+        'js': 'JavaScript',
+        'javascript': 'JavaScript',
+        'ts': 'TypeScript',
+        'typescript': 'TypeScript',
+        'py': 'Python',
+        'python': 'Python',
+        'python3': 'Python',
+        'reactjs': 'React',
+        'react.js': 'React',
+        'node': 'Node.js',
+        'nodejs': 'Node.js',
+        'node js': 'Node.js',
+        'ml': 'Machine Learning',
+        'ai': 'Artificial Intelligence',
+        'ui/ux': 'UI/UX Design',
+        'ux/ui': 'UI/UX Design',
+        'postgres': 'PostgreSQL',
+        'postgresql': 'PostgreSQL',
+        'golang': 'Go',
+        'k8s': 'Kubernetes',
+    },
+    'industry': {
+        'it': 'Information Technology',
+        'information technology': 'Information Technology',
+        'tech': 'Information Technology',
+        'software': 'Information Technology',
+        'fintech': 'Financial Technology',
+        'edtech': 'Education Technology',
+        'healthcare': 'Health Care',
+        'health care': 'Health Care',
+    },
+}
+
+
+def canonical(kind, name):
+    """(key, display name) for a raw name, or None if it is blank."""
+    display = ' '.join(str(name).split())[:MAX_LENGTH[kind]]
+    if not display:
+        return None
+    display = ALIASES[kind].get(display.lower(), display)
+    return display.lower(), display
+
+
+def _skill_names(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return value.split(',')
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+
+def _names(spellings):
+    return {key: counts.most_common(1)[0][0] for key, counts in spellings.items()}
+
+
+def backfill(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    Profile = apps.get_model('authentication', 'Profile')
+    Skill = apps.get_model('authentication', 'Skill')
+    Industry = apps.get_model('authentication', 'Industry')
+    ProfileSkill = apps.get_model('authentication', 'ProfileSkill')
+    profiles = Profile.objects.using(alias).order_by('pk').only('pk', 'skills', 'industry')
+
+    skill_spellings, industry_spellings = defaultdict(Counter), defaultdict(Counter)
+    for profile in profiles.iterator(chunk_size=BATCH_SIZE):
+        for name in _skill_names(profile.skills):
+            pair = canonical('skill', name)
+            if pair:
+                skill_spellings[pair[0]][pair[1]] += 1
+        pair = canonical('industry', profile.industry or '')
+        if pair:
+            industry_spellings[pair[0]][pair[1]] += 1
+
+    for model, names in ((Skill, _names(skill_spellings)), (Industry, _names(industry_spellings))):
+        model.objects.using(alias).bulk_create(
+            [model(id=uuid.uuid4(), key=key, name=name) for key, name in names.items()], ignore_conflicts=True,
+        )
+    skills = {row.key: row for row in Skill.objects.using(alias).all()}
+    industries = {row.key: row for row in Industry.objects.using(alias).all()}
+
+    last_pk = None
+    while True:
+        batch = profiles if last_pk is None else profiles.filter(pk__gt=last_pk)
+        rows = list(batch[:BATCH_SIZE])
+        if not rows:
+            break
+        last_pk = rows[-1].pk
+        links = []
+        for profile in rows:
+            pair = canonical('industry', profile.industry or '')
+            industry = industries.get(pair[0]) if pair else None
+            profile.industry_ref_id = industry.pk if industry else None
+            if industry:
+                profile.industry = industry.name
+            pairs = (canonical('skill', name) for name in _skill_names(profile.skills))
+            resolved = list(dict.fromkeys(skills[pair[0]] for pair in pairs if pair))
+            if profile.skills is not None:
+                profile.skills = [skill.name for skill in resolved]
+            links += [ProfileSkill(profile_id=profile.pk, skill_id=skill.pk) for skill in resolved]
+        with transaction.atomic(using=alias):
+            Profile.objects.using(alias).bulk_update(rows, ['skills', 'industry', 'industry_ref'])
+            ProfileSkill.objects.using(alias).bulk_create(links, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('authentication', '0024_skill_industry_taxonomy'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
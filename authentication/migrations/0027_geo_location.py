@@ -0,0 +1,137 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:34
+#
+# The lookup and geohash code is a frozen copy of authentication.geo as of this
+# migration, so later edits there do not change what replaying it produces.
+
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.db import migrations, models, transaction
+
+BATCH_SIZE = 500
+GEOHASH_LENGTH = 9
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+_PUNCTUATION = re.compile(r'[^\w\s,]')
+
+
+def _normalize(text):
+    return ' '.join(_PUNCTUATION.sub(' ', str(text)).split()).lower()
+
+
+def load_gazetteer():
+    default = Path(__file__).resolve().parent.parent / 'data' / 'gazetteer.tsv'
+    places = {}
+    with open(getattr(settings, 'GEO_GAZETTEER_PATH', default), encoding='utf-8') as handle:
+        for line in handle:
+            if not line.strip() or line.startswith('#'):
+                continue
+            name, lat, lon, *aliases = line.rstrip('\n').split('\t')
+            point = (float(lat), float(lon))
+            for alias in [name, *(aliases[0].split('|') if aliases else [])]:
+                places.setdefault(_normalize(alias), point)
+    return places
+
+
+def geocode(places, text):
+    text = _normalize(text or '')
+    if not text:
+        return None
+    if text in places:
+        return places[text]
+    parts = [part.strip() for part in text.split(',') if part.strip()]
+    for i in range(len(parts)):
+        for candidate in (', '.join(parts[i:]), parts[i]):
+            if candidate in places:
+                return places[candidate]
+    return None
+
+
+def encode(lat, lon, length=GEOHASH_LENGTH):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < length:
+        interval, coordinate = (lon_range, lon) if even else (lat_range, lat)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def backfill(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    places = load_gazetteer()
+    for name in ('Profile', 'Event'):
+        model = apps.get_model('authentication', name)
+        manager = model._base_manager.using(alias)
+        last = None
+        while True:
+            rows = manager.exclude(location='').order_by('pk').only('pk', 'location')
+            if last is not None:
+                rows = rows.filter(pk__gt=last)
+            rows = list(rows[:BATCH_SIZE])
+            if not rows:
+                break
+            last = rows[-1].pk
+            located = []
+            for row in rows:
+                point = geocode(places, row.location)
+                if point is not None:
+                    row.latitude, row.longitude = point
+                    row.geohash = encode(*point)
+                    located.append(row)
+            if located:
+                with transaction.atomic(using=alias):
+                    manager.bulk_update(located, ['latitude', 'longitude', 'geohash'])
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('authentication', '0026_recommendation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
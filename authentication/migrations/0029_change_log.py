@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:41
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0028_event_rsvp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('article', 'Article'), ('event', 'Event'), ('chapter', 'Chapter'), ('profile', 'Public profile')], max_length=10)),
+                ('object_id', models.UUIDField()),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'object_id'], name='authenticat_kind_dcd4a6_idx')],
+            },
+        ),
+    ]
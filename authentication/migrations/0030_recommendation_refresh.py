@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0029_change_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecommendationRefresh',
+            fields=[
+                ('user_id', models.UUIDField(primary_key=True, serialize=False)),
+                ('requested_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -1,10 +1,13 @@
 import uuid
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.utils import timezone
 from django.contrib.auth.base_user import BaseUserManager
 from django.utils.text import slugify
 
+from . import content, geo
+
 
 class Subscription(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -13,6 +16,45 @@ class Subscription(models.Model):
 
     def __str__(self):
         return self.email
+
+
+class Digest(models.Model):
+    """A newsletter issue, rendered once and delivered to every subscription."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    period_start = models.DateTimeField()
+    period_end = models.DateTimeField()
+    subject = models.CharField(max_length=255)
+    text_body = models.TextField()
+    html_body = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return self.subject
+
+
+class DigestDelivery(models.Model):
+    # SENDING is written just before the message goes out. A row a crashed run
+    # left SENDING is retried after DIGEST_SENDING_TIMEOUT (digest.py).
+    STATUS_CHOICES = [
+        ('SENDING', 'Sending'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed'),
+    ]
+
+    digest = models.ForeignKey(Digest, on_delete=models.CASCADE, related_name='deliveries')
+    subscription = models.ForeignKey(Subscription, on_delete=models.CASCADE, related_name='deliveries')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    error = models.CharField(max_length=255, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['digest', 'subscription'], name='unique_digest_delivery'),
+        ]
+
+    def __str__(self):
+        return f"{self.digest_id} -> {self.subscription_id} ({self.status})"
     
 class UserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
@@ -38,7 +80,77 @@ class UserManager(BaseUserManager):
     def get_by_natural_key(self, email):
         return self.get(email=email)
     
-class Article(models.Model):
+def unique_slug(model, text):
+    """slugify(text), suffixed with -1, -2, ... until no row (live or deleted) uses it."""
+    base_slug = slugify(text)
+    slug = base_slug
+    counter = 1
+    while model.all_objects.filter(slug=slug).exists():
+        slug = f"{base_slug}-{counter}"
+        counter += 1
+    return slug
+
+
+def author_snapshot(first_name, last_name, title, image):
+    """Article.author_* values for an author with these User/Profile fields."""
+    return {
+        'author_name': f"{first_name} {last_name}".strip(),
+        'author_title': title or '',
+        'author_avatar': image or '',
+    }
+
+
+class LiveManager(models.Manager):
+    """Default manager of soft-deletable models: hides soft-deleted rows."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class SoftDeleteModel(models.Model):
+    """
+    delete() is still a hard delete; soft_delete() only sets deleted_at, after
+    which the row is invisible through `objects` (and related managers) but
+    still reachable through `all_objects` until lifecycle.archive() moves it
+    out of the table.
+    """
+    deleted_at = models.DateTimeField(blank=True, null=True, db_index=True)
+
+    objects = LiveManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        abstract = True
+
+    def soft_delete(self):
+        self.deleted_at = timezone.now()
+        self.save(update_fields=['deleted_at'])
+
+    def restore(self):
+        self.deleted_at = None
+        self.save(update_fields=['deleted_at'])
+
+
+class GeoLocated(models.Model):
+    """
+    Coordinates for the free-text `location`, filled from the offline
+    gazetteer on every full save (see geo.py). geohash is what radius and
+    bounding-box queries seek on.
+    """
+    latitude = models.FloatField(blank=True, null=True, editable=False)
+    longitude = models.FloatField(blank=True, null=True, editable=False)
+    geohash = models.CharField(max_length=12, blank=True, null=True, editable=False, db_index=True)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if kwargs.get('update_fields') is None:
+            geo.locate(self)
+        super().save(*args, **kwargs)
+
+
+class Article(SoftDeleteModel):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=255)
     slug = models.SlugField(unique=True, blank=True)  # <== slug field
@@ -49,25 +161,59 @@ class Article(models.Model):
     author = models.ForeignKey('authentication.User', on_delete=models.CASCADE, related_name='articles')
     chapter = models.ForeignKey('authentication.Chapter', on_delete=models.CASCADE, related_name='articles')
     created_at = models.DateTimeField(auto_now_add=True)
+    # Copy of the author's display fields so public reads need no join;
+    # authors.py refreshes it when the User or Profile changes.
+    author_name = models.CharField(max_length=301, blank=True, editable=False)
+    author_title = models.CharField(max_length=255, blank=True, editable=False)
+    author_avatar = models.ImageField(upload_to='profile_images/', blank=True, null=True, editable=False)
+    # Derived from content_body on save (content.py).
+    content_html = models.TextField(blank=True, editable=False)
+    excerpt = models.CharField(max_length=300, blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
+    # `tags` stays the (normalized) list the API reads and writes; the Tag
+    # rows behind it are what filtering and the tag cloud use (tags.py).
+    tag_set = models.ManyToManyField('authentication.Tag', through='authentication.ArticleTag', related_name='articles', blank=True)
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            base_slug = slugify(self.title)
-            slug = base_slug
-            counter = 1
-            while Article.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug
+            self.slug = unique_slug(type(self), self.title)
+        full_save, adding = kwargs.get('update_fields') is None, self._state.adding
+        if full_save:
+            self.set_author_snapshot()
+            if self.content_hash != content.content_hash(self.content_body):
+                for name, value in content.render(self.content_body).items():
+                    setattr(self, name, value)
+            if self.tags is not None:
+                self.tags = tagging.normalize_list(self.tags)
         super().save(*args, **kwargs)
+        if full_save:
+            tagging.sync(self, created=adding)
+
+    def soft_delete(self):
+        was_live = self.deleted_at is None
+        super().soft_delete()
+        if was_live:
+            tagging.schedule_counts(self.tags, -1)
+
+    def restore(self):
+        was_deleted = self.deleted_at is not None
+        super().restore()
+        if was_deleted:
+            tagging.schedule_counts(self.tags, 1)
+
+    def set_author_snapshot(self):
+        title, image = Profile.objects.filter(user_id=self.author_id).values_list(
+            'title', 'profile_image').first() or ('', None)
+        for name, value in author_snapshot(self.author.first_name, self.author.last_name, title, image).items():
+            setattr(self, name, value)
 
     def __str__(self):
         return self.title
 
     
 class Chapter(models.Model):
-    # id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    id = models.CharField( primary_key=True, max_length=36, default=uuid.uuid4, editable=False, unique=True)
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=255)
     slug = models.SlugField(unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -76,7 +222,23 @@ class Chapter(models.Model):
     def __str__(self):
         return f"{self.name} ({self.id})"
     
-class Event(models.Model):
+class ChapterStats(models.Model):
+    """
+    Per-chapter counters kept up to date by signals (see stats.py).
+    upcoming_events also drifts as time passes, so reconcile_chapter_stats
+    should run periodically to recompute everything from scratch.
+    """
+    chapter = models.OneToOneField(Chapter, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    members = models.IntegerField(default=0)
+    articles = models.IntegerField(default=0)
+    events = models.IntegerField(default=0)
+    upcoming_events = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for {self.chapter_id}"
+
+class Event(GeoLocated, SoftDeleteModel):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=255)
     description = models.TextField()
@@ -88,22 +250,26 @@ class Event(models.Model):
     created_by = models.ForeignKey('authentication.User', on_delete=models.CASCADE, related_name='created_events')
     updated_at = models.DateTimeField(auto_now=True)
     slug = models.SlugField(unique=True, blank=True)
+    # None means unlimited. seats_taken is only changed by rsvp.py, with F() updates.
+    capacity = models.PositiveIntegerField(blank=True, null=True)
+    seats_taken = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['start_datetime']),
+            models.Index(fields=['chapter', 'start_datetime']),
+            models.Index(fields=['category', 'start_datetime']),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            base_slug = slugify(self.title)
-            slug = base_slug
-            counter = 1
-            while Article.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug
+            self.slug = unique_slug(type(self), self.title)
         super().save(*args, **kwargs)
         
     def __str__(self):
         return self.title
     
-class Profile(models.Model):
+class Profile(GeoLocated):
     STATUS_CHOICES = [
         ('ACTIVE', 'Active'),
         ('INACTIVE', 'Inactive'),
@@ -132,6 +298,19 @@ class Profile(models.Model):
     twitter = models.URLField(blank=True, null=True)
     contact = models.CharField(max_length=20, blank=True, null=True)
     whatsapp = models.CharField(max_length=20, blank=True, null=True)
+    # `skills` and `industry` keep the canonical names the API shows; these
+    # are what directory filters use (taxonomy.py).
+    skill_set = models.ManyToManyField('authentication.Skill', through='authentication.ProfileSkill', related_name='profiles', blank=True)
+    industry_ref = models.ForeignKey('authentication.Industry', on_delete=models.SET_NULL, null=True, blank=True, related_name='profiles')
+
+    def save(self, *args, **kwargs):
+        full_save, adding = kwargs.get('update_fields') is None, self._state.adding
+        if full_save:
+            taxonomy.canonicalize(self)
+        super().save(*args, **kwargs)
+        if full_save:
+            taxonomy.sync_skills(self, created=adding)
+
     def __str__(self):
         return f"{self.title} ({self.user.email})"
 
@@ -160,3 +339,214 @@ class User(AbstractBaseUser, PermissionsMixin):
     REQUIRED_FIELDS = ['first_name', 'last_name']
     def __str__(self):
         return self.email
+
+
+class BulkJob(models.Model):
+    """A bulk user operation run in the background, in batches, with progress."""
+    ACTION_CHOICES = [
+        ('role', 'Change role'),
+        ('chapter', 'Move to chapter'),
+        ('delete', 'Delete'),
+    ]
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    params = models.JSONField(default=dict, blank=True)
+    user_ids = models.JSONField(default=list)
+    total = models.PositiveIntegerField()
+    processed = models.PositiveIntegerField(default=0)
+    affected = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='bulk_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.action} x{self.total} ({self.status})"
+
+
+class ArchivedRecord(models.Model):
+    """
+    An Article or Event moved out of its hot table by lifecycle.archive().
+    `data` is the row in Django's serialization format so lifecycle.restore()
+    can put it back unchanged; the foreign keys make archived rows go away
+    with their chapter or owner like the originals would.
+    """
+    KIND_CHOICES = [
+        ('authentication.article', 'Article'),
+        ('authentication.event', 'Event'),
+    ]
+    REASON_CHOICES = [
+        ('deleted', 'Deleted'),
+        ('expired', 'Past event'),
+        ('stale', 'Stale article'),
+    ]
+
+    id = models.UUIDField(primary_key=True, editable=False)  # the original row's id
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    reason = models.CharField(max_length=10, choices=REASON_CHOICES)
+    chapter = models.ForeignKey(Chapter, on_delete=models.CASCADE, related_name='+')
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['kind', 'archived_at'])]
+
+    def __str__(self):
+        return f"{self.kind} {self.id} ({self.reason})"
+
+
+class Tag(models.Model):
+    """
+    An article tag. `name` is normalized (tags.normalize) and unique, so exact
+    and prefix filters are index seeks. article_count counts live articles and
+    is kept up to date by tags.py.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=50, unique=True)
+    article_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['-article_count', 'name'])]
+
+    def __str__(self):
+        return self.name
+
+
+class ArticleTag(models.Model):
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='article_tags')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='article_tags')
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['article', 'tag'], name='unique_article_tag')]
+        # (tag, article) so "articles with this tag" is answered from the index.
+        indexes = [models.Index(fields=['tag', 'article'])]
+
+    def __str__(self):
+        return f"{self.article_id} #{self.tag_id}"
+
+
+class Skill(models.Model):
+    """A canonical skill. `key` is the normalized spelling lookups go through."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=100)
+    key = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class Industry(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=255)
+    key = models.CharField(max_length=255, unique=True)
+
+    class Meta:
+        verbose_name_plural = 'industries'
+
+    def __str__(self):
+        return self.name
+
+
+class ProfileSkill(models.Model):
+    profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='profile_skills')
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='profile_skills')
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['profile', 'skill'], name='unique_profile_skill')]
+        # (skill, profile) so "profiles with this skill" is answered from the index.
+        indexes = [models.Index(fields=['skill', 'profile'])]
+
+    def __str__(self):
+        return f"{self.profile_id} #{self.skill_id}"
+
+
+class Recommendation(models.Model):
+    """One "people you should meet" entry (recommendations.py), rank 0 first."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recommendations')
+    recommended = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['user', 'rank'], name='unique_recommendation_rank')]
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.recommended_id} ({self.score:.2f})"
+
+
+class RecommendationRefresh(models.Model):
+    """
+    A member whose change may move recommendation lists, waiting for
+    `compute_recommendations --pending` (recommendations.py).
+    """
+    # No foreign key: ids of members deleted meanwhile are simply skipped.
+    user_id = models.UUIDField(primary_key=True)
+    requested_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return str(self.user_id)
+
+
+class EventRSVP(models.Model):
+    """A member's RSVP to an event; see rsvp.py for how seats are claimed."""
+    STATUS_CHOICES = [
+        ('GOING', 'Going'),
+        ('WAITLISTED', 'Waitlisted'),
+        ('CANCELLED', 'Cancelled'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='rsvps')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='rsvps')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    # Set again when a cancelled RSVP is renewed: the waitlist is served in this order.
+    requested_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['event', 'user'], name='unique_event_rsvp')]
+        indexes = [models.Index(fields=['event', 'status', 'requested_at'])]
+
+    def __str__(self):
+        return f"{self.user_id} @ {self.event_id} ({self.status})"
+
+
+class ChangeLogEntry(models.Model):
+    """
+    Append-only record that an object changed, read by the sync endpoint
+    (see changefeed.py). The id is the clients' cursor.
+    """
+    KIND_CHOICES = [
+        ('article', 'Article'),
+        ('event', 'Event'),
+        ('chapter', 'Chapter'),
+        ('profile', 'Public profile'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # A user id for profiles, the object's own id otherwise.
+    object_id = models.UUIDField()
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['kind', 'object_id'])]
+
+    def __str__(self):
+        return f"#{self.pk} {self.kind} {self.object_id}"
+
+
+# At the bottom because tags.py and taxonomy.py import the models above.
+from . import tags as tagging, taxonomy  # noqa: E402
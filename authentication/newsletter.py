@@ -0,0 +1,185 @@
+# newsletter.py
+"""
+Buffered newsletter sign-up ingest.
+
+With NEWSLETTER_BUFFERED_INGEST on, NewsletterSubscribeView no longer runs
+a SELECT (UniqueValidator) and an INSERT per request. Addresses are
+validated syntactically, normalized as in direct mode (canonical()), and
+appended to an in-process buffer unless already queued or recently written.
+The buffer is written with bulk_create(ignore_conflicts=True) once it reaches
+NEWSLETTER_BATCH_SIZE, every NEWSLETTER_FLUSH_INTERVAL seconds from a daemon
+thread, and at interpreter exit. Only then are the addresses marked as seen in
+the shared cache, so a lost buffer never blocks a later sign-up. The unique
+constraint on Subscription.email stays the source of truth.
+"""
+import atexit
+import csv
+import io
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.base_user import BaseUserManager
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import connection
+
+from .models import Subscription
+
+logger = logging.getLogger(__name__)
+
+SEEN_TIMEOUT = 60 * 60 * 24
+
+
+def batch_size():
+    return getattr(settings, "NEWSLETTER_BATCH_SIZE", 500)
+
+
+def flush_interval():
+    return getattr(settings, "NEWSLETTER_FLUSH_INTERVAL", 5)
+
+
+def canonical(email):
+    """
+    Strips the address and lower-cases its domain. The local part keeps its
+    case: mailboxes may be case-sensitive, and the database collation decides
+    whether Subscription.email is unique regardless of case.
+    """
+    return BaseUserManager.normalize_email((email or "").strip())
+
+
+def normalize(email):
+    """Returns the canonical address, or None if it is not a valid email."""
+    email = canonical(email)
+    try:
+        validate_email(email)
+    except ValidationError:
+        return None
+    return email
+
+
+def _seen_key(email):
+    return f"newsletter:seen:{email}"
+
+
+def insert_batch(emails):
+    Subscription.objects.bulk_create(
+        [Subscription(email=email) for email in emails],
+        batch_size=batch_size(),
+        ignore_conflicts=True,
+    )
+
+
+class SubscriptionBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}  # insertion-ordered set
+        self._flusher = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, email):
+        """Returns False if the address is already waiting in this buffer."""
+        with self._lock:
+            if email in self._pending:
+                return False
+            self._pending[email] = None
+            full = len(self._pending) >= batch_size()
+        if full:
+            self.flush()
+        else:
+            self._ensure_flusher()
+        return True
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = list(self._pending), {}
+        if not batch:
+            return 0
+        try:
+            insert_batch(batch)
+        except Exception:
+            with self._lock:
+                self._pending = dict.fromkeys(batch) | self._pending
+            raise
+        cache.set_many({_seen_key(email): 1 for email in batch}, SEEN_TIMEOUT)
+        return len(batch)
+
+    def _ensure_flusher(self):
+        if self._flusher is not None or flush_interval() <= 0:
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._run, name="newsletter-flusher", daemon=True)
+                self._flusher.start()
+
+    def _run(self):
+        while True:
+            time.sleep(flush_interval())
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Flushing newsletter subscriptions failed; will retry.")
+            finally:
+                connection.close()
+
+
+buffer = SubscriptionBuffer()
+atexit.register(buffer.flush)
+
+
+def enqueue(email):
+    """
+    Accepts a normalized address. Returns False if it is already queued here
+    or was written recently (by any worker sharing the cache), True if it was
+    queued.
+    """
+    if cache.get(_seen_key(email)):
+        return False
+    return buffer.add(email)
+
+
+def import_csv(file):
+    """
+    Streams a CSV of addresses (an "email" column, or the first column when
+    there is no header) into Subscription in batches. Returns counts.
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    reader = csv.reader(text)
+    column = 0
+    stats = {"rows": 0, "invalid": 0, "duplicates": 0, "created": 0}
+    seen, batch = set(), []
+
+    def write(batch):
+        existing = set(Subscription.objects.filter(email__in=batch).values_list("email", flat=True))
+        insert_batch([email for email in batch if email not in existing])
+        stats["created"] += len(batch) - len(existing)
+        stats["duplicates"] += len(existing)
+
+    for index, row in enumerate(reader):
+        if not row:
+            continue
+        if index == 0:
+            header = [cell.strip().lower() for cell in row]
+            if "email" in header:
+                column = header.index("email")
+                continue
+        stats["rows"] += 1
+        email = normalize(row[column] if column < len(row) else "")
+        if email is None:
+            stats["invalid"] += 1
+            continue
+        if email in seen:
+            stats["duplicates"] += 1
+            continue
+        seen.add(email)
+        batch.append(email)
+        if len(batch) >= batch_size():
+            write(batch)
+            batch = []
+    if batch:
+        write(batch)
+    return stats
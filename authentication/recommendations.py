@@ -0,0 +1,221 @@
+# recommendations.py
+"""
+"People you should meet": for every member with a public profile, the
+RECOMMENDATIONS_K most similar public members of the same chapter, stored as
+Recommendation rows so /user/me/recommendations/ is one indexed read.
+
+Each profile is a sparse feature vector: its skills (weight SKILL_WEIGHT
+each), its industry (INDUSTRY_WEIGHT) and its experience level
+(EXPERIENCE_WEIGHT). Vectors are L2-normalized, so the dot product of two rows
+is their cosine similarity. Candidates are blocked by chapter: a chapter's
+vectors become one float32 matrix over the features that occur in it, and
+similarities come from matrix products of CHUNK_ROWS rows at a time, with the
+top K per row picked by argpartition. Members without a chapter form their
+own block. Pairs that share nothing (similarity 0) are never recommended.
+
+recompute_all() (the compute_recommendations command) rebuilds everything.
+Saves that change a value in SOURCE_FIELDS call schedule(), which after
+commit queues the member as a RecommendationRefresh row; nothing is computed
+in the request. process_pending() (`compute_recommendations --pending`, run
+on a schedule) takes the queue REFRESH_BATCH_SIZE members at a time and
+refresh()es them: their own lists, the lists that contain them, and the lists
+they now beat or tie the lowest entry of. Every other list is unaffected.
+"""
+import threading
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min
+
+from .models import Profile, ProfileSkill, Recommendation, RecommendationRefresh, User
+
+SKILL_WEIGHT = 1.0
+INDUSTRY_WEIGHT = 2.0
+EXPERIENCE_WEIGHT = 0.5
+CHUNK_ROWS = 1024
+REFRESH_BATCH_SIZE = 200
+
+# Fields the vectors (or the block) are built from, per sender model. The
+# free-text industry only counts through industry_ref, which a full save
+# derives from it.
+SOURCE_FIELDS = {
+    "User": ("chapter_id",),
+    "Profile": ("skills", "industry_ref_id", "experience", "is_public"),
+}
+
+
+def top_k():
+    return getattr(settings, "RECOMMENDATIONS_K", 10)
+
+
+def _experience_key(value):
+    return " ".join((value or "").split()).lower()
+
+
+def touches(model, update_fields):
+    """Whether a save with these update_fields (None: all) can change a vector."""
+    if update_fields is None:
+        return True
+    names = {model._meta.get_field(name).attname for name in update_fields}
+    return not names.isdisjoint(SOURCE_FIELDS[model.__name__])
+
+
+def source(instance):
+    """What the instance contributes to the vectors, for comparing before and after a save."""
+    values = {name: getattr(instance, name) for name in SOURCE_FIELDS[type(instance).__name__]}
+    if "skills" in values:
+        values["skills"] = frozenset(values["skills"] or ())
+        values["experience"] = _experience_key(values["experience"])
+    return values
+
+
+class Block:
+    """The public members of one chapter (None: no chapter) and their unit vectors."""
+
+    def __init__(self, chapter_id):
+        self.chapter_id = chapter_id
+        profiles = Profile.objects.filter(is_public=True, user__chapter_id=chapter_id)
+        rows = list(profiles.order_by("user_id").values_list("pk", "user_id", "industry_ref_id", "experience"))
+        self.user_ids = [user_id for _, user_id, _, _ in rows]
+        self.index = {user_id: i for i, user_id in enumerate(self.user_ids)}
+
+        features = defaultdict(dict)  # row -> {column: weight}
+        columns = {}
+        row_of = {}
+        for i, (profile_id, _, industry_id, experience) in enumerate(rows):
+            row_of[profile_id] = i
+            if industry_id is not None:
+                features[i][columns.setdefault(("industry", industry_id), len(columns))] = INDUSTRY_WEIGHT
+            experience = _experience_key(experience)
+            if experience:
+                features[i][columns.setdefault(("experience", experience), len(columns))] = EXPERIENCE_WEIGHT
+        for profile_id, skill_id in ProfileSkill.objects.filter(
+            profile__is_public=True, profile__user__chapter_id=chapter_id,
+        ).values_list("profile_id", "skill_id"):
+            features[row_of[profile_id]][columns.setdefault(("skill", skill_id), len(columns))] = SKILL_WEIGHT
+
+        self.matrix = np.zeros((len(rows), len(columns)), dtype=np.float32)
+        for i, weights in features.items():
+            self.matrix[i, list(weights)] = list(weights.values())
+        norms = np.linalg.norm(self.matrix, axis=1, keepdims=True)
+        np.divide(self.matrix, norms, out=self.matrix, where=norms > 0)
+
+    def similar(self, user_ids, k):
+        """{user id: [(other user id, score)]}, best first, for members of this block."""
+        rows = [self.index[user_id] for user_id in user_ids]
+        result = {}
+        for start in range(0, len(rows), CHUNK_ROWS):
+            chunk = np.array(rows[start:start + CHUNK_ROWS], dtype=np.intp)
+            scores = self.matrix[chunk] @ self.matrix.T
+            scores[np.arange(len(chunk)), chunk] = -1.0  # never yourself
+            n = min(k, scores.shape[1] - 1)
+            if n <= 0:
+                result.update((self.user_ids[row], []) for row in chunk)
+                continue
+            best = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+            for i, columns in enumerate(best):
+                # Highest score first, ties by position so reruns agree.
+                columns = columns[np.lexsort((columns, -scores[i, columns]))]
+                result[self.user_ids[chunk[i]]] = [
+                    (self.user_ids[column], float(scores[i, column]))
+                    for column in columns.tolist() if scores[i, column] > 0
+                ]
+        return result
+
+
+def _store(lists):
+    """Replaces the stored lists of these users."""
+    with transaction.atomic():
+        Recommendation.objects.filter(user_id__in=list(lists)).delete()
+        Recommendation.objects.bulk_create(
+            Recommendation(user_id=user_id, recommended_id=other, score=score, rank=rank)
+            for user_id, entries in lists.items()
+            for rank, (other, score) in enumerate(entries)
+        )
+
+
+def recompute_all():
+    """Rebuilds every list, one chapter at a time. Returns the number of members covered."""
+    chapters = set(User.objects.filter(profile__is_public=True).values_list("chapter_id", flat=True).distinct())
+    covered = 0
+    for chapter_id in chapters:
+        block = Block(chapter_id)
+        _store(block.similar(block.user_ids, top_k()))
+        covered += len(block.user_ids)
+    # Members who went private or lost their profile since the last run.
+    Recommendation.objects.exclude(user__profile__is_public=True).delete()
+    return covered
+
+
+def refresh(user_ids):
+    """Recomputes what changes when these members' vectors or chapters change."""
+    changed = set(User.objects.filter(pk__in=user_ids).values_list("pk", flat=True))
+    k = top_k()
+    affected = changed | set(
+        Recommendation.objects.filter(recommended_id__in=changed).values_list("user_id", flat=True)
+    )
+    chapter_of = dict(User.objects.filter(pk__in=affected, profile__is_public=True).values_list("pk", "chapter_id"))
+    Recommendation.objects.filter(user_id__in=affected - set(chapter_of)).delete()
+
+    for chapter_id in set(chapter_of.values()):
+        block = Block(chapter_id)
+        members = {user_id for user_id, chapter in chapter_of.items() if chapter == chapter_id}
+        moved = [block.index[user_id] for user_id in changed & members]
+        if moved:
+            # A changed member enters another list if it now beats or ties
+            # that list's lowest score (ties are settled by position), or with
+            # any positive score while the list is short.
+            best = (block.matrix @ block.matrix[moved].T).max(axis=1)
+            floors = {
+                row["user_id"]: row["low"] if row["n"] >= k else 0.0
+                for row in Recommendation.objects.filter(user_id__in=block.user_ids)
+                .values("user_id").annotate(n=Count("pk"), low=Min("score"))
+            }
+            members.update(
+                user_id for user_id, score in zip(block.user_ids, best.tolist())
+                if score > 0 and score >= floors.get(user_id, 0.0)
+            )
+        _store(block.similar(members, k))
+
+
+_local = threading.local()
+
+
+def _pending():
+    if not hasattr(_local, "pending"):
+        _local.pending = set()
+    return _local.pending
+
+
+def schedule(user_ids):
+    """Queues these members for process_pending() once the transaction commits."""
+    _pending().update(user_ids)
+    transaction.on_commit(flush)
+
+
+def flush():
+    user_ids, _local.pending = _pending(), set()
+    if user_ids:
+        RecommendationRefresh.objects.bulk_create(
+            [RecommendationRefresh(user_id=user_id) for user_id in user_ids], ignore_conflicts=True,
+        )
+
+
+def process_pending(size=REFRESH_BATCH_SIZE):
+    """Refreshes queued members, `size` per transaction. Returns how many were processed."""
+    processed = 0
+    while True:
+        with transaction.atomic():
+            # The rows stay locked until their refresh commits, so a member
+            # queued again meanwhile gets a new row (and another refresh).
+            user_ids = list(
+                RecommendationRefresh.objects.select_for_update(skip_locked=True)
+                .order_by("requested_at").values_list("user_id", flat=True)[:size]
+            )
+            if not user_ids:
+                return processed
+            refresh(user_ids)
+            RecommendationRefresh.objects.filter(user_id__in=user_ids).delete()
+        processed += len(user_ids)
@@ -0,0 +1,112 @@
+# rsvp.py
+"""
+Event RSVPs with a capacity and a waitlist.
+
+Event.seats_taken counts GOING RSVPs. A seat is claimed with one conditional
+UPDATE (seats_taken = seats_taken + 1 WHERE seats_taken < capacity), so the
+last seat can never be taken twice and no request reads the counter first. The
+event row is locked only from that UPDATE to the commit of a transaction that
+does one more INSERT or UPDATE, so a rush of RSVPs queues on the row briefly
+instead of for a whole request. Members who get no seat are WAITLISTED.
+
+When a GOING member cancels, the seat passes straight to the oldest waitlisted
+RSVP (picked with SELECT ... FOR UPDATE SKIP LOCKED, so simultaneous
+cancellations promote different members) and the counter is untouched; with
+nobody waiting it is released. fill() hands out free seats to the waitlist; it
+runs after a release or a new waitlisted RSVP commits (closing the gap where
+both happen at once) and after an event's capacity is edited. Lowering the
+capacity below seats_taken keeps the seats already given.
+
+request() is idempotent per (event, member): repeating it returns the active
+RSVP unchanged. Two simultaneous first requests are settled by the unique
+(event, user) constraint; the loser's transaction, seat claim included, rolls
+back and it returns the winner's RSVP.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Event, EventRSVP
+
+GOING, WAITLISTED, CANCELLED = "GOING", "WAITLISTED", "CANCELLED"
+
+
+def _claim_seat(event_id):
+    return Event.all_objects.filter(pk=event_id).filter(
+        Q(capacity__isnull=True) | Q(seats_taken__lt=F("capacity"))
+    ).update(seats_taken=F("seats_taken") + 1) == 1
+
+
+def _release_seat(event_id):
+    Event.all_objects.filter(pk=event_id, seats_taken__gt=0).update(seats_taken=F("seats_taken") - 1)
+
+
+def _next_waitlisted(event_id):
+    return (
+        EventRSVP.objects.select_for_update(skip_locked=True)
+        .filter(event_id=event_id, status=WAITLISTED).order_by("requested_at", "pk").first()
+    )
+
+
+def request(event, user):
+    """Returns (rsvp, created); created is False if the member already had an active RSVP."""
+    try:
+        with transaction.atomic():
+            rsvp = EventRSVP.objects.select_for_update().filter(event=event, user=user).first()
+            if rsvp is not None and rsvp.status != CANCELLED:
+                return rsvp, False
+            status = GOING if _claim_seat(event.pk) else WAITLISTED
+            if rsvp is None:
+                rsvp = EventRSVP.objects.create(event=event, user=user, status=status)
+            else:
+                rsvp.status, rsvp.requested_at = status, timezone.now()
+                rsvp.save(update_fields=["status", "requested_at", "updated_at"])
+            if status == WAITLISTED:
+                transaction.on_commit(lambda: fill(event.pk))
+    except IntegrityError:
+        # The same member's other request created the row first.
+        return EventRSVP.objects.get(event=event, user=user), False
+    return rsvp, True
+
+
+def cancel(event, user):
+    """Cancels the member's RSVP. Returns it, or None if there is none."""
+    with transaction.atomic():
+        rsvp = EventRSVP.objects.select_for_update().filter(event=event, user=user).first()
+        if rsvp is None or rsvp.status == CANCELLED:
+            return rsvp
+        was_going = rsvp.status == GOING
+        rsvp.status = CANCELLED
+        rsvp.save(update_fields=["status", "updated_at"])
+        if was_going:
+            heir = _next_waitlisted(event.pk)
+            if heir is not None:
+                heir.status = GOING
+                heir.save(update_fields=["status", "updated_at"])
+            else:
+                _release_seat(event.pk)
+                transaction.on_commit(lambda: fill(event.pk))
+    return rsvp
+
+
+def fill(event_id):
+    """Moves waitlisted RSVPs into free seats, oldest first. Returns how many moved."""
+    promoted = 0
+    while True:
+        with transaction.atomic():
+            rsvp = _next_waitlisted(event_id)
+            if rsvp is None or not _claim_seat(event_id):
+                return promoted
+            rsvp.status = GOING
+            rsvp.save(update_fields=["status", "updated_at"])
+        promoted += 1
+
+
+def waitlist_position(rsvp):
+    """1 for the next member to get a seat; None unless the RSVP is waitlisted."""
+    if rsvp.status != WAITLISTED:
+        return None
+    ahead = EventRSVP.objects.filter(event_id=rsvp.event_id, status=WAITLISTED).filter(
+        Q(requested_at__lt=rsvp.requested_at) | Q(requested_at=rsvp.requested_at, pk__lt=rsvp.pk)
+    )
+    return ahead.count() + 1
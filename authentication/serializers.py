@@ -1,10 +1,37 @@
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 from .models import *
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth import authenticate
 from django.utils.text import slugify
+from django.core.files.storage import default_storage
+from . import chapter_cache, newsletter, rsvp, storage as uploads
+from .upload_handlers import store_deduplicated
+
+class ChapterPrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField that resolves chapter ids from chapter_cache."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        chapter = chapter_cache.get(data)
+        if chapter is None:
+            self.fail('does_not_exist', pk_value=data)
+        return chapter
+
+class SubscriptionEmailField(serializers.EmailField):
+    """Stores addresses the way buffered ingest does (newsletter.canonical())."""
+
+    def to_internal_value(self, data):
+        return newsletter.canonical(super().to_internal_value(data))
+
 
 class SubscriptionSerializer(serializers.ModelSerializer):
+    # Declared so the uniqueness check sees the canonical address.
+    email = SubscriptionEmailField(
+        max_length=254, validators=[UniqueValidator(queryset=Subscription.objects.all())],
+    )
+
     class Meta:
         model = Subscription
         fields = ['id', 'email', 'subscribed_at']
@@ -13,12 +40,12 @@ class EventAllSerializer(serializers.ModelSerializer):
     created_by = serializers.PrimaryKeyRelatedField(read_only=True)
     class Meta:
         model = Event
-        fields = '__all__'
+        exclude = ['deleted_at', 'geohash']
 
 class EventSerializer(serializers.ModelSerializer):
     class Meta:
         model = Event
-        fields = "__all__"
+        exclude = ["deleted_at", "geohash"]
         read_only_fields = ["id", "created_by", "updated_at"]
 
 class ProfileSerializer(serializers.ModelSerializer):
@@ -44,14 +71,29 @@ class UserPublicSerializer(serializers.ModelSerializer):
 
 class ArticleSerializer(serializers.ModelSerializer):
     author = UserPublicSerializer(read_only=True)
-    chapter = serializers.PrimaryKeyRelatedField(queryset=Chapter.objects.all()) 
+    chapter = ChapterPrimaryKeyField(queryset=Chapter.objects.all()) 
 
     class Meta:
         model = Article
         fields = [
-            'id', 'slug', 'title', 'content_body', 'video_url',
+            'id', 'slug', 'title', 'content_body', 'content_html', 'excerpt', 'word_count', 'video_url',
             'tags', 'category', 'author', 'created_at', 'chapter'  
         ]
+        read_only_fields = ['content_html', 'excerpt', 'word_count']
+
+class ArticleListSerializer(serializers.ModelSerializer):
+    """
+    Public article lists: the excerpt instead of the body, and the author from
+    the snapshot columns, so rows are small and come without a join.
+    """
+
+    class Meta:
+        model = Article
+        fields = [
+            'id', 'slug', 'title', 'excerpt', 'word_count', 'video_url', 'tags', 'category',
+            'author', 'author_name', 'author_title', 'author_avatar', 'created_at', 'chapter',
+        ]
+        read_only_fields = fields
 
 class RegisterSerializer(serializers.ModelSerializer):
 
@@ -64,7 +106,7 @@ class RegisterSerializer(serializers.ModelSerializer):
     profile_image = serializers.ImageField(required=False, allow_null=True)
     is_public = serializers.BooleanField(default=True)
     status = serializers.ChoiceField(choices=Profile.STATUS_CHOICES)
-    chapter = serializers.PrimaryKeyRelatedField(queryset=Chapter.objects.all(), required=False)
+    chapter = ChapterPrimaryKeyField(queryset=Chapter.objects.all(), required=False)
     password2 = serializers.CharField(write_only=True)
     experience = serializers.CharField(write_only=True, required=False)
     certifications = serializers.JSONField(write_only=True, required=False)
@@ -106,6 +148,8 @@ class RegisterSerializer(serializers.ModelSerializer):
         }
         validated_data.pop("password2")
         raw_password = validated_data.pop("password")
+        if hasattr(profile_data["profile_image"], "sha256"):
+            profile_data["profile_image"] = store_deduplicated(profile_data["profile_image"])
 
         user = User.objects.create(
             **validated_data,
@@ -148,14 +192,31 @@ class ChapterSerializer(serializers.ModelSerializer):
         model = Chapter
         fields = ['id', 'name', 'slug']
 
+class CachedChapterSerializer(ChapterSerializer):
+    """Nested chapter read from chapter_cache by FK id instead of fetching per row."""
+
+    def get_attribute(self, instance):
+        return chapter_cache.get(getattr(instance, f"{self.source}_id"))
+
+class ChapterStatsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ChapterStats
+        fields = ['members', 'articles', 'events', 'upcoming_events']
+
+class ChapterWithStatsSerializer(ChapterSerializer):
+    stats = ChapterStatsSerializer(read_only=True)
+
+    class Meta(ChapterSerializer.Meta):
+        fields = ChapterSerializer.Meta.fields + ['stats']
+
 class FieldSerializer(serializers.ModelSerializer):
     class Meta:
         model = Profile
-        exclude = ['user']  
+        exclude = ['user', 'skill_set', 'industry_ref', 'geohash']
 
 class UserListSerializer(serializers.ModelSerializer):
     profile = FieldSerializer(read_only=True)  
-    chapter = ChapterSerializer(read_only=True)  
+    chapter = CachedChapterSerializer(read_only=True)  
 
     class Meta:
         model = User
@@ -165,6 +226,64 @@ class UserListSerializer(serializers.ModelSerializer):
         ]
         
 
+class UserCardProjection:
+    """
+    Slim "profile card" for member listings.
+
+    Reads only the columns a card shows through .values_list() and builds
+    plain dicts, so no model instances or DRF fields are involved.
+    Selected with ?view=card, or ?fields=id,first_name,... for a subset.
+    """
+    FIELDS = {
+        'id': 'id',
+        'first_name': 'first_name',
+        'last_name': 'last_name',
+        'role': 'role',
+        'title': 'profile__title',
+        'company_name': 'profile__company_name',
+        'profile_image': 'profile__profile_image',
+        'chapter': 'chapter_id',
+    }
+
+    def __init__(self, fields=None):
+        self.fields = list(fields or self.FIELDS)
+
+    @classmethod
+    def from_request(cls, request):
+        """Returns a projection if the request asked for one, else None."""
+        fields = request.query_params.get('fields', '').strip()
+        if fields:
+            names = [name.strip() for name in fields.split(',') if name.strip()]
+            unknown = [name for name in names if name not in cls.FIELDS]
+            if unknown:
+                raise serializers.ValidationError(
+                    {"fields": f"Unknown card fields: {', '.join(unknown)}"}
+                )
+            return cls(names)
+        if request.query_params.get('view', '').strip().lower() == 'card':
+            return cls()
+        return None
+
+    def project(self, queryset):
+        return queryset.values_list(*[self.FIELDS[name] for name in self.fields])
+
+    def to_dicts(self, rows):
+        fields = self.fields
+        image_index = fields.index('profile_image') if 'profile_image' in fields else None
+        url = default_storage.url
+        data = []
+        for row in rows:
+            item = dict(zip(fields, row))
+            if image_index is not None:
+                name = row[image_index]
+                item['profile_image'] = url(name) if name else None
+            data.append(item)
+        return data
+
+    def serialize(self, queryset):
+        return self.to_dicts(self.project(queryset))
+
+
 
 class CurrentUserSerializer(serializers.ModelSerializer):
     profile = serializers.SerializerMethodField()
@@ -200,3 +319,64 @@ class ChapterContentSerializer(serializers.Serializer):
     users = UserListSerializer(many=True, read_only=True)
     articles = ArticleSerializer(many=True, read_only=True)
     events = EventSerializer(many=True, read_only=True)
+
+
+class PresignUploadSerializer(serializers.Serializer):
+    content_type = serializers.ChoiceField(choices=list(uploads.IMAGE_TYPES))
+    size = serializers.IntegerField(min_value=1)
+
+    def validate_size(self, value):
+        if value > uploads.max_upload_size():
+            raise serializers.ValidationError(f"Uploads are limited to {uploads.max_upload_size()} bytes.")
+        return value
+
+
+class BulkUserActionSerializer(serializers.Serializer):
+    action = serializers.ChoiceField(choices=[choice for choice, _ in BulkJob.ACTION_CHOICES])
+    ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=False, max_length=50000)
+    role = serializers.ChoiceField(choices=User.ROLE_CHOICES, required=False)
+    chapter = ChapterPrimaryKeyField(queryset=Chapter.objects.all(), required=False, allow_null=True)
+    background = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if data["action"] == "role" and "role" not in data:
+            raise serializers.ValidationError({"role": "This field is required to change roles."})
+        if data["action"] == "chapter" and "chapter" not in data:
+            raise serializers.ValidationError({"chapter": "This field is required to move users (null removes them)."})
+        data["ids"] = list(dict.fromkeys(data["ids"]))
+        return data
+
+    def get_params(self):
+        data = self.validated_data
+        if data["action"] == "role":
+            return {"role": data["role"]}
+        if data["action"] == "chapter":
+            return {"chapter": str(data["chapter"].pk) if data["chapter"] else None}
+        return {}
+
+
+class BulkJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BulkJob
+        fields = [
+            "id", "action", "params", "total", "processed", "affected", "status", "error",
+            "created_at", "updated_at", "finished_at",
+        ]
+
+
+class EventRSVPSerializer(serializers.ModelSerializer):
+    capacity = serializers.IntegerField(source="event.capacity", read_only=True)
+    seats_taken = serializers.IntegerField(source="event.seats_taken", read_only=True)
+    waitlist_position = serializers.SerializerMethodField()
+
+    class Meta:
+        model = EventRSVP
+        fields = ["event", "status", "requested_at", "waitlist_position", "capacity", "seats_taken"]
+        read_only_fields = fields
+
+    def get_waitlist_position(self, obj):
+        return rsvp.waitlist_position(obj)
+
+
+class RestoreContentSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=False, max_length=1000)
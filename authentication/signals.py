@@ -0,0 +1,114 @@
+# signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import authors, changefeed, chapter_cache, recommendations, stats, taxonomy
+from .models import Article, Chapter, Event, Industry, Profile, Skill, User
+
+
+def tracked(signal):
+    """Connects the handler for each model in stats.TRACKED_FIELDS only."""
+    def decorator(func):
+        for model in stats.TRACKED_FIELDS:
+            signal.connect(func, sender=model)
+        return func
+    return decorator
+
+
+@tracked(pre_save)
+def remember_chapter_contribution(sender, instance, update_fields=None, **kwargs):
+    # Read when a row is saved rather than whenever one is loaded (post_init):
+    # list endpoints load far more rows than anything saves.
+    instance._stats_contribution = None
+    if stats.is_suspended() or not stats.touches(sender, update_fields):
+        return
+    if instance._state.adding:
+        instance._stats_contribution = {}
+        return
+    old = sender._base_manager.filter(pk=instance.pk).only(*stats.TRACKED_FIELDS[sender]).first()
+    instance._stats_contribution = stats.contribution(old) if old else {}
+
+
+@tracked(post_save)
+def update_chapter_stats_on_save(sender, instance, created, **kwargs):
+    before = instance.__dict__.pop("_stats_contribution", None)
+    if before is not None:
+        stats.schedule(stats.diff({} if created else before, stats.contribution(instance)))
+
+
+@receiver([post_save, post_delete], sender=Chapter)
+def invalidate_chapter_cache(sender, **kwargs):
+    transaction.on_commit(chapter_cache.invalidate)
+
+
+@receiver([post_save, post_delete], sender=Skill)
+@receiver([post_save, post_delete], sender=Industry)
+def invalidate_taxonomy(sender, **kwargs):
+    transaction.on_commit(taxonomy.invalidate)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Profile)
+def refresh_author_snapshots(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    # A new user has no articles yet; a new profile may belong to an author.
+    # Profiles are only deleted along with their user, so no delete handler
+    # (which would also cost Profile its fast cascade delete).
+    if raw or (created and sender is User):
+        return
+    if update_fields is not None and not authors.SOURCE_FIELDS[sender.__name__].intersection(update_fields):
+        return
+    authors.schedule(instance.pk if sender is User else instance.user_id)
+
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=Profile)
+def remember_recommendation_source(sender, instance, update_fields=None, raw=False, **kwargs):
+    instance._recommendation_source = None
+    if raw or instance._state.adding or not recommendations.touches(sender, update_fields):
+        return
+    old = sender._base_manager.filter(pk=instance.pk).only(*recommendations.SOURCE_FIELDS[sender.__name__]).first()
+    instance._recommendation_source = recommendations.source(old) if old else {}
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Profile)
+def refresh_recommendations(sender, instance, created, raw=False, **kwargs):
+    # A new user has no profile yet; other saves count only if a value the
+    # vectors are built from changed. Profile.save() syncs ProfileSkill after
+    # this signal, but queued members are only refreshed after the commit.
+    before = instance.__dict__.pop("_recommendation_source", None)
+    if raw or (created and sender is User):
+        return
+    if created or (before is not None and before != recommendations.source(instance)):
+        recommendations.schedule([instance.pk if sender is User else instance.user_id])
+
+
+SYNC_KINDS = {Article: "article", Event: "event", Chapter: "chapter"}
+# User fields shown on a profile card (UserCardProjection).
+PROFILE_CARD_FIELDS = {"first_name", "last_name", "role", "chapter"}
+
+
+# Article, Event and User deletes are logged by the code that deletes them
+# (bulk.delete_users, lifecycle.archive_batch): a post_delete receiver would
+# cost those models Django's fast cascade delete.
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Event)
+@receiver([post_save, post_delete], sender=Chapter)
+def log_sync_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        changefeed.log(SYNC_KINDS[sender], [instance.pk])
+
+
+@receiver(post_save, sender=Profile)
+def log_profile_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        changefeed.log("profile", [instance.user_id])
+
+
+@receiver(post_save, sender=User)
+def log_profile_owner_change(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    # Profiles are logged by user id.
+    if raw or created or (update_fields is not None and not PROFILE_CARD_FIELDS.intersection(update_fields)):
+        return
+    changefeed.log("profile", [instance.pk])
@@ -0,0 +1,134 @@
+# stats.py
+"""
+Incrementally maintained ChapterStats.
+
+Each tracked model instance "contributes" counters to its chapter, e.g. an
+upcoming Event contributes {events: 1, upcoming_events: 1}. The contribution
+is read from the database just before a save that touches TRACKED_FIELDS and
+diffed against the saved one; the resulting deltas are applied with F()
+updates after the transaction commits. Deletes have no signal handler, which
+would cost these models Django's fast cascade deletes: the code that deletes
+them (bulk.delete_users, lifecycle.archive_batch) recomputes the chapters it
+touched. Other bulk queryset operations bypass signals too, so recompute_all()
+(the reconcile_chapter_stats command) rebuilds the table.
+"""
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import Article, Chapter, ChapterStats, Event, User
+
+# Fields each model's contribution depends on.
+TRACKED_FIELDS = {
+    User: ("chapter_id",),
+    Article: ("chapter_id", "deleted_at"),
+    Event: ("chapter_id", "start_datetime", "deleted_at"),
+}
+
+COUNTERS = ("members", "articles", "events", "upcoming_events")
+
+
+def touches(model, update_fields):
+    """Whether a save with these update_fields (None: all) can change a contribution."""
+    if update_fields is None:
+        return True
+    names = {model._meta.get_field(name).attname for name in update_fields}
+    return not names.isdisjoint(TRACKED_FIELDS[model])
+
+
+def contribution(instance):
+    """Returns {chapter_id: Counter} for what the instance adds to ChapterStats."""
+    if instance.chapter_id is None or getattr(instance, "deleted_at", None) is not None:
+        return {}
+    if isinstance(instance, User):
+        counts = Counter(members=1)
+    elif isinstance(instance, Article):
+        counts = Counter(articles=1)
+    else:
+        counts = Counter(events=1)
+        if instance.start_datetime and instance.start_datetime >= timezone.now():
+            counts["upcoming_events"] = 1
+    return {instance.chapter_id: counts}
+
+
+def diff(before, after):
+    deltas = defaultdict(Counter)
+    for chapter_id, counts in after.items():
+        deltas[chapter_id].update(counts)
+    for chapter_id, counts in before.items():
+        deltas[chapter_id].subtract(counts)
+    return {
+        chapter_id: {name: value for name, value in counts.items() if value}
+        for chapter_id, counts in deltas.items()
+        if any(counts.values())
+    }
+
+
+def apply_deltas(deltas):
+    for chapter_id, counts in deltas.items():
+        changes = {name: F(name) + value for name, value in counts.items()}
+        if not ChapterStats.objects.filter(chapter_id=chapter_id).update(**changes, updated_at=timezone.now()):
+            if Chapter.objects.filter(pk=chapter_id).exists():
+                recompute(chapter_id)
+
+
+_local = threading.local()
+
+
+@contextmanager
+def suspended():
+    """
+    Stops the signal handlers from scheduling deltas in this thread, for bulk
+    operations that recompute the affected chapters themselves.
+    """
+    previous = getattr(_local, "suspended", False)
+    _local.suspended = True
+    try:
+        yield
+    finally:
+        _local.suspended = previous
+
+
+def is_suspended():
+    return getattr(_local, "suspended", False)
+
+
+def schedule(deltas):
+    if deltas:
+        transaction.on_commit(lambda: apply_deltas(deltas))
+
+
+def recompute(chapter_id=None):
+    """Recomputes one chapter, or every chapter, from the source tables."""
+    return recompute_chapters(None if chapter_id is None else [chapter_id])
+
+
+def recompute_chapters(chapter_ids=None):
+    """Recomputes the given chapters (all chapters for None)."""
+    chapters = Chapter.objects.all()
+    if chapter_ids is not None:
+        chapters = chapters.filter(pk__in=chapter_ids)
+    chapter_ids = list(chapters.values_list("pk", flat=True))
+
+    totals = {pk: dict.fromkeys(COUNTERS, 0) for pk in chapter_ids}
+    now = timezone.now()
+    sources = [
+        (User.objects.filter(chapter_id__in=chapter_ids), {"members": Count("pk")}),
+        (Article.objects.filter(chapter_id__in=chapter_ids), {"articles": Count("pk")}),
+        (Event.objects.filter(chapter_id__in=chapter_ids), {
+            "events": Count("pk"),
+            "upcoming_events": Count("pk", filter=Q(start_datetime__gte=now)),
+        }),
+    ]
+    for queryset, aggregates in sources:
+        for row in queryset.values("chapter_id").annotate(**aggregates).order_by():
+            totals[row["chapter_id"]].update({name: row[name] for name in aggregates})
+
+    with transaction.atomic():
+        ChapterStats.objects.filter(chapter_id__in=chapter_ids).delete()
+        ChapterStats.objects.bulk_create(ChapterStats(chapter_id=pk, **counts) for pk, counts in totals.items())
+    return len(totals)
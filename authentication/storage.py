@@ -0,0 +1,165 @@
+# storage.py
+"""
+Upload storage.
+
+STORAGE_BACKEND selects where uploads live: "local" (the default) keeps them
+under MEDIA_ROOT, "s3" writes them to an S3-compatible bucket (AWS S3, MinIO,
+R2, ...) through django-storages. Either way files reach the backend as
+streams: Django spools request bodies above FILE_UPLOAD_MAX_MEMORY_SIZE to a
+temporary file and boto3 sends large files in multipart chunks, so no upload
+is held in memory whole.
+
+Clients can also skip our workers entirely. presign_upload() returns a target
+the browser sends the image to directly (an S3 presigned POST limited to the
+declared type and size, or LocalUploadView's signed URL for local storage)
+plus a signed `upload` token. Submitting that token as profile_image_upload
+attaches the stored object once confirm_upload() has checked its size and
+image signature. LocalUploadView answers with a fresh token if the storage had
+to store the file under another name.
+"""
+import posixpath
+import shutil
+import tempfile
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.urls import reverse
+
+from .upload_handlers import SNIFF_BYTES, sniff_image
+
+IMAGE_TYPES = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+}
+
+TOKEN_SALT = "authentication.storage.upload"
+TARGET_SALT = "authentication.storage.target"
+
+
+def max_upload_size():
+    return getattr(settings, "UPLOAD_MAX_SIZE", 5 * 2 ** 20)
+
+
+def upload_expiry():
+    return getattr(settings, "UPLOAD_URL_EXPIRY", 15 * 60)
+
+
+def is_remote(storage=default_storage):
+    return hasattr(storage, "bucket_name")
+
+
+def new_key(content_type, prefix="profile_images/"):
+    return f"{prefix}{uuid.uuid4().hex}{IMAGE_TYPES[content_type]}"
+
+
+def upload_token(user_id, key):
+    return signing.dumps({"key": key, "user": str(user_id)}, salt=TOKEN_SALT)
+
+
+def presign_upload(user, content_type, size, request, storage=default_storage):
+    """
+    Returns {"method", "url", "fields", "headers", "key", "upload"} describing
+    one direct upload of at most `size` bytes of `content_type`.
+    """
+    key = new_key(content_type)
+    expires = upload_expiry()
+    upload = upload_token(user.pk, key)
+
+    if is_remote(storage):
+        post = storage.connection.meta.client.generate_presigned_post(
+            Bucket=storage.bucket_name,
+            Key=posixpath.join(storage.location, key) if storage.location else key,
+            Fields={"Content-Type": content_type},
+            Conditions=[{"Content-Type": content_type}, ["content-length-range", 1, size]],
+            ExpiresIn=expires,
+        )
+        return {"method": "POST", "url": post["url"], "fields": post["fields"], "headers": {},
+                "key": key, "upload": upload}
+
+    target = signing.dumps(
+        {"key": key, "type": content_type, "size": size, "user": str(user.pk)}, salt=TARGET_SALT,
+    )
+    return {
+        "method": "PUT",
+        "url": request.build_absolute_uri(reverse("upload-local", args=[target])),
+        "fields": {},
+        "headers": {"Content-Type": content_type},
+        "key": key,
+        "upload": upload,
+    }
+
+
+def load_target(target):
+    """Decodes a LocalUploadView URL token; raises ValidationError if it is invalid or expired."""
+    try:
+        return signing.loads(target, salt=TARGET_SALT, max_age=upload_expiry())
+    except signing.BadSignature:
+        raise ValidationError("Upload URL is invalid or has expired.")
+
+
+class _LimitedReader:
+    closed = False
+
+    def __init__(self, stream, limit):
+        self.stream = stream
+        self.limit = limit
+        self.read_bytes = 0
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.read_bytes += len(data)
+        if self.read_bytes > self.limit:
+            raise ValidationError(f"Upload must be at most {self.limit} bytes.")
+        return data
+
+    def seekable(self):
+        return False
+
+
+def save_stream(key, stream, limit, storage=default_storage):
+    """
+    Copies at most `limit` bytes from `stream` to storage as `key`. The bytes
+    are spooled first (to a temporary file above FILE_UPLOAD_MAX_MEMORY_SIZE),
+    so they are never all in memory and a rejected upload leaves nothing in
+    storage. Returns (name, size): the name the storage actually used, which
+    is not `key` if that was taken meanwhile, and the number of bytes.
+    """
+    reader = _LimitedReader(stream, limit)
+    with tempfile.SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE, dir=settings.FILE_UPLOAD_TEMP_DIR,
+    ) as spool:
+        shutil.copyfileobj(reader, spool, 64 * 1024)
+        if reader.read_bytes == 0:
+            raise ValidationError("Upload is empty.")
+        spool.seek(0)
+        return storage.save(key, File(spool, name=key)), reader.read_bytes
+
+
+def confirm_upload(user, upload, storage=default_storage):
+    """Returns the storage key behind an `upload` token issued to `user`."""
+    try:
+        data = signing.loads(upload, salt=TOKEN_SALT, max_age=24 * 60 * 60)
+    except signing.BadSignature:
+        raise ValidationError("Upload token is invalid or has expired.")
+    if data["user"] != str(user.pk):
+        raise ValidationError("Upload token was issued to another user.")
+    key = data["key"]
+    if not storage.exists(key):
+        raise ValidationError("Nothing was uploaded for this token.")
+    if storage.size(key) > max_upload_size():
+        storage.delete(key)
+        raise ValidationError("Upload is too large.")
+    # The presigned policy only bounds the declared Content-Type; the bytes
+    # must really be an image of the type the key was issued for.
+    with storage.open(key, "rb") as handle:
+        detected = sniff_image(handle.read(SNIFF_BYTES))
+    if detected is None or detected[1] != posixpath.splitext(key)[1]:
+        storage.delete(key)
+        raise ValidationError("Upload is not a supported image.")
+    return key
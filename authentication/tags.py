@@ -0,0 +1,125 @@
+# tags.py
+"""
+Article tags.
+
+Article.tags keeps the normalized list of names the API reads and writes.
+Article.save() mirrors it into ArticleTag rows (one per article and tag), so
+"articles tagged X" and "tags starting with X" are index lookups on Tag.name
+and ArticleTag(tag, article) instead of substring scans over JSON.
+
+Tag.article_count is the number of live (not soft-deleted) articles with the
+tag. It is adjusted with F() updates after commit as articles are saved,
+soft-deleted or restored. Hard deletes (archiving, deleting users) suspend
+counters (stats.suspended) and call recount() for the tags they touched; a
+delete signal handler would cost Article its fast cascade delete. The tag
+cloud is cached in the shared cache and dropped whenever a count changes.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from . import stats
+from .models import ArticleTag, Tag
+
+MAX_LENGTH = Tag._meta.get_field("name").max_length
+CLOUD_KEY = "tags:cloud"
+CLOUD_SIZE = 200
+CLOUD_TTL = 60 * 60
+
+
+def normalize(name):
+    """Lowercase, single-spaced, at most MAX_LENGTH characters."""
+    return " ".join(str(name).split()).lower()[:MAX_LENGTH].strip()
+
+
+def normalize_list(value):
+    """Normalized, de-duplicated names from a list (or a comma-separated string)."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    elif not isinstance(value, (list, tuple)):
+        value = [value]
+    return list(dict.fromkeys(name for name in map(normalize, value) if name))
+
+
+def ensure(names):
+    """Returns {name: tag id} for normalized names, creating missing tags."""
+    Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+    return dict(Tag.objects.filter(name__in=names).values_list("name", "pk"))
+
+
+def sync(article, created=False):
+    """Makes the article's ArticleTag rows match article.tags."""
+    wanted = set(article.tags or [])
+    current = {} if created else dict(
+        ArticleTag.objects.filter(article=article).values_list("tag__name", "pk")
+    )
+    added, removed = wanted.difference(current), set(current).difference(wanted)
+    if removed:
+        ArticleTag.objects.filter(pk__in=[current[name] for name in removed]).delete()
+    if added:
+        tag_ids = ensure(added)
+        ArticleTag.objects.bulk_create(ArticleTag(article=article, tag_id=tag_ids[name]) for name in added)
+    if article.deleted_at is None:
+        schedule_counts(added, 1)
+        schedule_counts(removed, -1)
+
+
+def schedule_counts(names, delta):
+    if names and not stats.is_suspended():
+        names = list(names)
+        transaction.on_commit(lambda: apply_counts(names, delta))
+
+
+def apply_counts(names, delta):
+    tags = Tag.objects.filter(name__in=names)
+    if delta < 0:
+        # article_count is unsigned; a drifted counter waits for recount().
+        tags = tags.filter(article_count__gte=-delta)
+    if tags.update(article_count=F("article_count") + delta):
+        cache.delete(CLOUD_KEY)
+
+
+def recount(tag_ids=None):
+    """Recomputes article_count for the given tags (all tags for None) in one UPDATE."""
+    live = (
+        ArticleTag.objects.filter(tag=OuterRef("pk"), article__deleted_at__isnull=True)
+        .order_by().values("tag").annotate(n=Count("pk")).values("n")
+    )
+    tags = Tag.objects.all() if tag_ids is None else Tag.objects.filter(pk__in=tag_ids)
+    updated = tags.update(article_count=Coalesce(Subquery(live, output_field=IntegerField()), Value(0)))
+    cache.delete(CLOUD_KEY)
+    return updated
+
+
+def tag_ids_for(article_ids):
+    return set(ArticleTag.objects.filter(article_id__in=article_ids).values_list("tag_id", flat=True))
+
+
+def cloud(limit=CLOUD_SIZE):
+    """[{"name", "count"}] for the most used tags, most used first."""
+    data = cache.get(CLOUD_KEY)
+    if data is None:
+        data = [
+            {"name": name, "count": count}
+            for name, count in Tag.objects.filter(article_count__gt=0)
+            .order_by("-article_count", "name").values_list("name", "article_count")[:CLOUD_SIZE]
+        ]
+        cache.set(CLOUD_KEY, data, CLOUD_TTL)
+    return data[:limit]
+
+
+def filter_articles(queryset, tag=None, prefix=None):
+    """Articles with exactly `tag`, and/or with a tag starting with `prefix`."""
+    if tag:
+        queryset = queryset.filter(pk__in=ArticleTag.objects.filter(tag__name=normalize(tag)).values("article_id"))
+    prefix = normalize(prefix or "")
+    if prefix:
+        # A range rather than LIKE so every backend can seek the name index.
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        queryset = queryset.filter(pk__in=ArticleTag.objects.filter(
+            tag__name__gte=prefix, tag__name__lt=upper,
+        ).values("article_id"))
+    return queryset
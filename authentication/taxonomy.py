@@ -0,0 +1,229 @@
+# taxonomy.py
+"""
+Skills and industries as canonical rows.
+
+Profile.save() maps every skill and the industry to a Skill / Industry row by
+its key (lowercase, single-spaced, known aliases resolved, e.g. "js" ->
+JavaScript), rewrites Profile.skills / Profile.industry to the canonical
+names and mirrors the skills into ProfileSkill. Directory filters then match
+ids through indexes instead of scanning JSON and free text.
+
+Autocomplete is answered from a per-process prefix trie over the canonical
+names (every word start is indexed, so "lear" finds "Machine Learning"). Each
+trie node keeps its best MAX_SUGGESTIONS entries, most used first, so a lookup
+costs one walk down the prefix. Workers rebuild their tries when the version
+token in the shared cache changes (new or edited rows) or after TRIE_MAX_AGE
+seconds, which also refreshes the usage counts.
+"""
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Industry, ProfileSkill, Skill
+
+SKILL_ALIASES = {
+    "js": "JavaScript",
+    "javascript": "JavaScript",
+    "ts": "TypeScript",
+    "typescript": "TypeScript",
+    "py": "Python",
+    "python": "Python",
+    "python3": "Python",
+    "reactjs": "React",
+    "react.js": "React",
+    "node": "Node.js",
+    "nodejs": "Node.js",
+    "node js": "Node.js",
+    "ml": "Machine Learning",
+    "ai": "Artificial Intelligence",
+    "ui/ux": "UI/UX Design",
+    "ux/ui": "UI/UX Design",
+    "postgres": "PostgreSQL",
+    "postgresql": "PostgreSQL",
+    "golang": "Go",
+    "k8s": "Kubernetes",
+}
+INDUSTRY_ALIASES = {
+    "it": "Information Technology",
+    "information technology": "Information Technology",
+    "tech": "Information Technology",
+    "software": "Information Technology",
+    "fintech": "Financial Technology",
+    "edtech": "Education Technology",
+    "healthcare": "Health Care",
+    "health care": "Health Care",
+}
+
+KINDS = {
+    "skill": (Skill, SKILL_ALIASES),
+    "industry": (Industry, INDUSTRY_ALIASES),
+}
+
+VERSION_KEY = "taxonomy:version"
+TRIE_MAX_AGE = 10 * 60
+MAX_SUGGESTIONS = 20
+
+
+def normalize(name):
+    return " ".join(str(name).split())
+
+
+def canonical(kind, name):
+    """Returns (key, display name) for a raw name, or None if it is blank."""
+    model, aliases = KINDS[kind]
+    display = normalize(name)[:model._meta.get_field("name").max_length]
+    if not display:
+        return None
+    display = aliases.get(display.lower(), display)
+    return display.lower(), display
+
+
+def skill_key(name):
+    return (canonical("skill", name) or ("",))[0]
+
+
+def industry_key(name):
+    return (canonical("industry", name) or ("",))[0]
+
+
+def parse_ids(values):
+    """UUIDs from query values (repeated and/or comma-separated); None if any is invalid."""
+    try:
+        return [uuid.UUID(part.strip()) for value in values for part in value.split(",") if part.strip()]
+    except ValueError:
+        return None
+
+
+def ensure(kind, pairs):
+    """Returns {key: row} for (key, display) pairs, creating missing rows."""
+    model = KINDS[kind][0]
+    pairs = dict(pairs)
+    rows = {row.key: row for row in model.objects.filter(key__in=pairs)}
+    missing = [model(key=key, name=name) for key, name in pairs.items() if key not in rows]
+    if missing:
+        model.objects.bulk_create(missing, ignore_conflicts=True)
+        rows = {row.key: row for row in model.objects.filter(key__in=pairs)}
+        transaction.on_commit(invalidate)
+    return rows
+
+
+def _skill_names(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return value.split(",")
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+
+def canonicalize(profile):
+    """Points the profile at canonical rows and rewrites skills/industry to their names."""
+    industry = canonical("industry", profile.industry or "")
+    if industry is None:
+        profile.industry_ref = None
+    else:
+        profile.industry_ref = ensure("industry", [industry])[industry[0]]
+        profile.industry = profile.industry_ref.name
+
+    pairs = [pair for pair in (canonical("skill", name) for name in _skill_names(profile.skills)) if pair]
+    rows = ensure("skill", pairs) if pairs else {}
+    skills = list(dict.fromkeys(rows[key] for key, _ in pairs))
+    profile._skill_ids = {skill.pk for skill in skills}
+    if profile.skills is not None:
+        profile.skills = [skill.name for skill in skills]
+
+
+def sync_skills(profile, created=False):
+    """Makes the profile's ProfileSkill rows match the skills canonicalize() resolved."""
+    wanted = profile._skill_ids
+    current = set() if created else set(
+        ProfileSkill.objects.filter(profile=profile).values_list("skill_id", flat=True)
+    )
+    if current - wanted:
+        ProfileSkill.objects.filter(profile=profile, skill_id__in=current - wanted).delete()
+    if wanted - current:
+        ProfileSkill.objects.bulk_create(ProfileSkill(profile=profile, skill_id=pk) for pk in wanted - current)
+
+
+class PrefixTrie:
+    """Maps text prefixes to the best MAX_SUGGESTIONS entries inserted under them."""
+
+    __slots__ = ("children", "entries")
+
+    def __init__(self):
+        self.children = {}
+        self.entries = []
+
+    def insert(self, text, entry, limit=MAX_SUGGESTIONS):
+        """Entries must be inserted best first."""
+        node = self
+        for char in text:
+            node = node.children.setdefault(char, PrefixTrie())
+            if len(node.entries) < limit and (not node.entries or node.entries[-1] is not entry):
+                node.entries.append(entry)
+
+    def search(self, prefix, limit=MAX_SUGGESTIONS):
+        node = self
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return node.entries[:limit]
+
+
+def build(kind):
+    model = KINDS[kind][0]
+    trie = PrefixTrie()
+    rows = model.objects.annotate(count=Count("profiles")).order_by("-count", "name").values_list("pk", "name", "key", "count")
+    for pk, name, key, count in rows:
+        entry = {"id": str(pk), "name": name, "count": count}
+        words = key.split(" ")
+        # The whole key first, then every later word start ("learning" for
+        # "machine learning"); seen holds suffixes already inserted.
+        seen = set()
+        for i in range(len(words)):
+            suffix = " ".join(words[i:])
+            if suffix not in seen:
+                seen.add(suffix)
+                trie.insert(suffix, entry)
+    return trie
+
+
+_lock = threading.Lock()
+_state = (None, 0.0, {})  # (version, built at, {kind: trie})
+
+
+def _current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _tries():
+    global _state
+    version = _current_version()
+    if version == _state[0] and time.monotonic() - _state[1] < TRIE_MAX_AGE:
+        return _state[2]
+    with _lock:
+        if version != _state[0] or time.monotonic() - _state[1] >= TRIE_MAX_AGE:
+            _state = (version, time.monotonic(), {kind: build(kind) for kind in KINDS})
+    return _state[2]
+
+
+def invalidate():
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def autocomplete(kind, prefix, limit=10):
+    """[{"id", "name", "count"}] of `kind` rows with a word starting with `prefix`."""
+    prefix = normalize(prefix).lower()
+    if not prefix:
+        return []
+    return _tries()[kind].search(prefix, min(limit, MAX_SUGGESTIONS))
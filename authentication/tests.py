@@ -1,3 +1,1580 @@
-from django.test import TestCase
+import hashlib
+import importlib
+import io
+import os
+import shutil
+import smtplib
+import sys
+import tempfile
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models.signals import post_delete, post_init
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from gunicorn.util import load_class
+from gunicorn.workers.base import Worker
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+
+from backend import server
+
+try:
+    from moto import mock_aws
+    from storages.backends.s3 import S3Storage
+except ImportError:  # pragma: no cover - optional test dependency
+    mock_aws = None
+
+from . import authors, bulk, changefeed, chapter_cache, content, geo, recommendations, rsvp, tags, taxonomy, digest as digests, files, ics, lifecycle, newsletter, stats, storage as uploads
+from .fastpath import compile_serializer
+from .models import (
+    ArchivedRecord, Article, ArticleTag, BulkJob, ChangeLogEntry, Chapter, ChapterStats, Digest, DigestDelivery, Event, EventRSVP, Industry,
+    Profile, ProfileSkill, Recommendation, RecommendationRefresh, Skill, Subscription, Tag, User,
+)
+from .renderers import FastJSONRenderer
+from .serializers import (
+    ArticleListSerializer, ArticleSerializer, ChapterSerializer, EventAllSerializer, EventSerializer,
+    UserCardProjection, UserListSerializer, UserPublicSerializer,
+)
+
+
+def make_member(email, chapter=None, with_profile=True, image=None, **profile):
+    user = User.objects.create_user(
+        email=email, password="secret", first_name="Ada", last_name="Lovelace",
+        role="member", chapter=chapter,
+    )
+    if with_profile:
+        defaults = dict(
+            title="Engineer", company_name="Linq", bio="Bio", industry="IT",
+            location="Lahore", skills=["python", "django"], status="ACTIVE",
+            slug=email.split("@")[0], profile_image=image,
+        )
+        defaults.update(profile)
+        Profile.objects.create(user=user, **defaults)
+    return user
+
+
+class UserCardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.chapter = Chapter.objects.create(name="Lahore", slug="lahore")
+        cls.users = [
+            make_member(f"m{i}@example.com", cls.chapter, image="profile_images/m.png" if i % 2 else None)
+            for i in range(3)
+        ]
+        cls.orphan = make_member("orphan@example.com", with_profile=False)
+
+    def get(self, **params):
+        response = self.client.get("/user/all/", params)
+        return response.status_code, response.json()
+
+    def test_card_view(self):
+        with self.assertNumQueries(2):  # count, then one page of card columns
+            status, page = self.get(view="card")
+        self.assertEqual(status, 200)
+        self.assertEqual(page["count"], 4)
+        cards = {card["id"]: card for card in page["results"]}
+        self.assertEqual(set(page["results"][0]), set(UserCardProjection.FIELDS))
+        self.assertEqual(cards[str(self.users[1].pk)], {
+            "id": str(self.users[1].pk), "first_name": "Ada", "last_name": "Lovelace", "role": "member",
+            "title": "Engineer", "company_name": "Linq", "profile_image": "/media/profile_images/m.png",
+            "chapter": str(self.chapter.pk),
+        })
+        self.assertIsNone(cards[str(self.users[0].pk)]["profile_image"])
+        self.assertEqual(
+            (cards[str(self.orphan.pk)]["title"], cards[str(self.orphan.pk)]["chapter"]), (None, None),
+        )
+
+    def test_field_subset_and_unknown_fields(self):
+        status, page = self.get(fields="id, last_name")
+        self.assertEqual(status, 200)
+        self.assertEqual([set(card) for card in page["results"]], [{"id", "last_name"}] * 4)
+
+        status, errors = self.get(fields="id,email,password")
+        self.assertEqual(status, 400)
+        self.assertIn("email, password", errors["fields"])
+
+    def test_pagination_is_unchanged(self):
+        full = self.get(page_size=2)[1]
+        status, page = self.get(view="card", page_size=2)
+        self.assertEqual((page["count"], len(page["results"])), (4, 2))
+        self.assertEqual(
+            [card["id"] for card in page["results"]], [user["id"] for user in full["results"]],
+        )
+        self.assertIn("page=2", page["next"])
+        last = self.get(view="card", page_size=2, page=2)[1]
+        self.assertIsNone(last["next"])
+        self.assertEqual(len({card["id"] for card in page["results"] + last["results"]}), 4)
+
+
+class FastPathDifferentialTests(TestCase):
+    """The compiled fast path must render exactly what the DRF serializers render."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.chapter = Chapter.objects.create(name="Lahore", slug="lahore")
+        cls.author = make_member("author@example.com", cls.chapter, image="profile_images/a.png")
+        cls.plain = make_member("plain@example.com", cls.chapter, faqs=[{"q": "?", "a": "!"}])
+        cls.orphan = make_member("orphan@example.com", None, with_profile=False)
+        now = timezone.now()
+        for i in range(3):
+            Article.objects.create(
+                title=f"Article {i}", content_body="Body", tags=["x", i] if i else None,
+                category="tech", author=cls.plain if i == 2 else cls.author, chapter=cls.chapter,
+                video_url="https://example.com/v" if i == 1 else None,
+            )
+            Event.objects.create(
+                title=f"Event {i}", description="Desc", category="meetup",
+                start_datetime=now + timedelta(days=i, microseconds=i),
+                end_datetime=now + timedelta(days=i, hours=2), location="Lahore",
+                chapter=cls.chapter, created_by=cls.author,
+            )
+        Article.objects.create(
+            title="By orphan", content_body="Body", author=cls.orphan, chapter=cls.chapter,
+        )
+
+    def assertSameJSON(self, serializer_class, queryset, context=None):
+        expected = serializer_class(queryset, many=True, context=context or {}).data
+        actual = compile_serializer(serializer_class).serialize(queryset, context)
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(actual), renderer.render(expected))
+
+    def test_articles(self):
+        self.assertSameJSON(ArticleSerializer, Article.objects.order_by("created_at"))
+
+    def test_article_list(self):
+        self.assertSameJSON(ArticleListSerializer, Article.objects.order_by("created_at"))
+
+    def test_articles_with_request_builds_absolute_image_urls(self):
+        request = APIRequestFactory().get("/articles/")
+        self.assertSameJSON(ArticleSerializer, Article.objects.order_by("created_at"), {"request": request})
+
+    def test_events(self):
+        self.assertSameJSON(EventSerializer, Event.objects.order_by("start_datetime"))
+        self.assertSameJSON(EventAllSerializer, Event.objects.order_by("start_datetime"))
+
+    def test_users(self):
+        self.assertSameJSON(UserListSerializer, User.objects.order_by("email"))
+        self.assertSameJSON(UserPublicSerializer, User.objects.order_by("email"))
+
+    def test_chapters(self):
+        self.assertSameJSON(ChapterSerializer, Chapter.objects.all())
+
+    def test_list_endpoints_run_one_query_per_page(self):
+        with self.assertNumQueries(2):
+            response = self.client.get("/articles/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 4)
+        with self.assertNumQueries(2):
+            self.client.get("/user/all/")
+
+
+class FastJSONRendererTests(TestCase):
+    def test_matches_stock_renderer(self):
+        data = {
+            "id": uuid.uuid4(),
+            "when": timezone.now(),
+            "day": timezone.now().date(),
+            "price": Decimal("10.50"),
+            "tags": ["django", {"nested": [1, 2.5, None, True]}],
+            "text": "caf\u00e9 \u2028 line",
+            "rows": (1, 2),
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_indent_falls_back_to_stock_renderer(self):
+        data = {"a": [1, 2]}
+        self.assertEqual(
+            FastJSONRenderer().render(data, "application/json; indent=4"),
+            JSONRenderer().render(data, "application/json; indent=4"),
+        )
+
+
+class EventCalendarTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.lahore = Chapter.objects.create(name="Lahore", slug="lahore")
+        cls.karachi = Chapter.objects.create(name="Karachi", slug="karachi")
+        author = make_member("host@example.com", cls.lahore)
+        starts = [
+            ("Past", cls.lahore, "meetup", "2025-01-10T18:00:00Z"),
+            ("March A", cls.lahore, "meetup", "2025-03-03T18:00:00Z"),
+            ("March B", cls.lahore, "workshop", "2025-03-03T20:00:00Z"),
+            ("March C", cls.karachi, "meetup", "2025-03-21T18:00:00Z"),
+            ("April", cls.lahore, "meetup", "2025-04-01T00:00:00Z"),
+        ]
+        for title, chapter, category, start in starts:
+            start = parse_datetime(start)
+            Event.objects.create(
+                title=title, description="Desc", category=category, start_datetime=start,
+                end_datetime=start + timedelta(hours=2), location="Pakistan",
+                chapter=chapter, created_by=author,
+            )
+
+    def titles(self, query):
+        response = self.client.get(f"/events/?page_size=100&{query}")
+        self.assertEqual(response.status_code, 200)
+        return [event["title"] for event in response.json()["results"]]
+
+    def test_range_is_inclusive_of_the_to_date(self):
+        self.assertEqual(self.titles("from=2025-03-01&to=2025-03-31"), ["March A", "March B", "March C"])
+
+    def test_chapter_and_category_filters(self):
+        self.assertEqual(
+            self.titles(f"from=2025-03-01&chapter={self.lahore.id}&category=meetup"),
+            ["March A", "April"],
+        )
+
+    def test_invalid_bound_is_rejected(self):
+        self.assertEqual(self.client.get("/events/?from=yesterday").status_code, 400)
+
+    def test_impossible_dates_are_rejected(self):
+        for query in ["from=2024-02-30", "to=2024-13-01", "from=2024-01-01T25:00"]:
+            response = self.client.get(f"/events/?{query}")
+            self.assertEqual(response.status_code, 400, query)
+        for month in ["2024-13", "2024-00", "nope"]:
+            response = self.client.get(f"/events/calendar/?month={month}")
+            self.assertEqual(response.status_code, 400, month)
+            self.assertIn("month", response.json())
+
+    def test_month_buckets(self):
+        response = self.client.get("/events/calendar/?month=2025-03")
+        self.assertEqual(response.json(), {
+            "month": "2025-03",
+            "total": 3,
+            "days": [{"date": "2025-03-03", "count": 2}, {"date": "2025-03-21", "count": 1}],
+        })
+
+
+class EventFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.chapter = Chapter.objects.create(name="Lahore", slug="lahore")
+        start = parse_datetime("2025-03-03T18:00:00Z")
+        cls.event = Event.objects.create(
+            title="Meetup, with; punctuation", description="Line one\nLine two", category="meetup",
+            start_datetime=start, end_datetime=start + timedelta(hours=2), location="Lahore",
+            chapter=cls.chapter, created_by=make_member("host@example.com", cls.chapter),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def fetch(self, url, **headers):
+        response = self.client.get(url, **headers)
+        body = b"".join(response.streaming_content) if response.streaming else response.content
+        return response, body.decode()
+
+    def test_chapter_feed(self):
+        response, body = self.fetch(f"/chapters/{self.chapter.id}/events.ics")
+        self.assertEqual(response["Content-Type"], "text/calendar; charset=utf-8")
+        self.assertIn(f"UID:{self.event.id}@linq\r\n", body)
+        self.assertIn("DTSTART:20250303T180000Z\r\n", body)
+        self.assertIn("SUMMARY:Meetup\\, with\\; punctuation\r\n", body)
+        self.assertIn("DESCRIPTION:Line one\\nLine two\r\n", body)
+        self.assertTrue(body.endswith("END:VCALENDAR\r\n"))
+
+    def test_cached_until_an_event_changes(self):
+        first, body = self.fetch("/events/feed.ics")
+        with self.assertNumQueries(1):
+            cached, cached_body = self.fetch("/events/feed.ics")
+        self.assertFalse(cached.streaming)
+        self.assertEqual(cached_body, body)
+
+        self.event.title = "Renamed"
+        self.event.save()
+        changed, body = self.fetch("/events/feed.ics")
+        self.assertNotEqual(changed["ETag"], first["ETag"])
+        self.assertIn("SUMMARY:Renamed\r\n", body)
+
+    def test_conditional_get(self):
+        response, _ = self.fetch("/events/feed.ics")
+        not_modified, _ = self.fetch("/events/feed.ics", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_long_lines_are_folded(self):
+        self.assertEqual(ics.fold("X" * 80), "X" * 75 + "\r\n " + "X" * 5 + "\r\n")
+
+
+@override_settings(NEWSLETTER_BUFFERED_INGEST=True, NEWSLETTER_BATCH_SIZE=3, NEWSLETTER_FLUSH_INTERVAL=0)
+class NewsletterIngestTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        newsletter.buffer.flush()
+
+    def test_buffered_subscribe_dedups_and_flushes_in_batches(self):
+        for email in ["a@example.com", " a@Example.COM ", "b@example.com"]:
+            self.assertEqual(self.client.post("/subscribe/", {"email": email}).status_code, 202)
+        self.assertEqual(Subscription.objects.count(), 0)
+        self.assertEqual(len(newsletter.buffer), 2)
+
+        self.client.post("/subscribe/", {"email": "c@example.com"})
+        self.assertEqual(
+            sorted(Subscription.objects.values_list("email", flat=True)),
+            ["a@example.com", "b@example.com", "c@example.com"],
+        )
+
+    def test_buffered_subscribe_keeps_local_part_case(self):
+        self.client.post("/subscribe/", {"email": "Ann@Example.com"})
+        newsletter.buffer.flush()
+        self.assertEqual(list(Subscription.objects.values_list("email", flat=True)), ["Ann@example.com"])
+
+    def test_lost_buffer_does_not_block_resubscribing(self):
+        self.client.post("/subscribe/", {"email": "a@example.com"})
+        newsletter.buffer._pending.clear()  # the worker died before flushing
+        self.assertEqual(self.client.post("/subscribe/", {"email": "a@example.com"}).status_code, 202)
+        newsletter.buffer.flush()
+        self.assertTrue(Subscription.objects.filter(email="a@example.com").exists())
+        self.assertTrue(cache.get("newsletter:seen:a@example.com"))
+
+    @override_settings(NEWSLETTER_BUFFERED_INGEST=False)
+    def test_direct_subscribe_normalizes_like_buffered_mode(self):
+        self.assertEqual(self.client.post("/subscribe/", {"email": " Ann@Example.COM "}).status_code, 201)
+        self.assertEqual(list(Subscription.objects.values_list("email", flat=True)), ["Ann@example.com"])
+        response = self.client.post("/subscribe/", {"email": "Ann@example.com"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("email", response.json())
+
+    def test_buffered_subscribe_rejects_invalid_email(self):
+        self.assertEqual(self.client.post("/subscribe/", {"email": "nope"}).status_code, 400)
+
+    def test_flush_ignores_existing_rows(self):
+        Subscription.objects.create(email="a@example.com")
+        self.client.post("/subscribe/", {"email": "a@example.com"})
+        self.assertEqual(newsletter.buffer.flush(), 1)
+        self.assertEqual(Subscription.objects.count(), 1)
+
+    def test_csv_import(self):
+        admin = User.objects.create_superuser(email="admin@example.com", password="secret", first_name="A", last_name="B")
+        Subscription.objects.create(email="old@example.com")
+        csv_file = SimpleUploadedFile(
+            "list.csv",
+            b"name,email\nA,one@example.com\nB,one@EXAMPLE.com\nC,not-an-email\nD,old@example.com\n"
+            b"E,two@example.com\nF,three@example.com\nG,four@example.com\n",
+        )
+        client = APIClient()
+        client.force_authenticate(admin)
+        response = client.post("/subscribe/import/", {"file": csv_file}, format="multipart")
+        self.assertEqual(response.json(), {"rows": 7, "invalid": 1, "duplicates": 2, "created": 4})
+        self.assertEqual(Subscription.objects.count(), 5)
+
+
+@override_settings(FRONTEND_URL="https://linq.example")
+class DigestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        chapter = Chapter.objects.create(name="Lahore", slug="lahore")
+        author = make_member("author@example.com", chapter)
+        Article.objects.create(title="Fresh <news>", content_body="Body", author=author, chapter=chapter)
+        start = timezone.now() + timedelta(days=2)
+        Event.objects.create(
+            title="Meetup", description="Desc", category="meetup", start_datetime=start,
+            end_datetime=start + timedelta(hours=2), location="Lahore", chapter=chapter, created_by=author,
+        )
+        Subscription.objects.bulk_create(Subscription(email=f"reader{i}@example.com") for i in range(7))
+
+    def test_build_renders_once(self):
+        digest = digests.build_digest()
+        self.assertIn("Fresh <news>: https://linq.example/articles/fresh-news", digest.text_body)
+        self.assertIn("Fresh &lt;news&gt;", digest.html_body)
+        self.assertIn("Meetup", digest.text_body)
+
+    def test_deliver_in_batches_and_resume(self):
+        digest = digests.build_digest()
+        # A previous run was interrupted after two recipients.
+        done = Subscription.objects.order_by("pk")[:2]
+        DigestDelivery.objects.bulk_create(
+            DigestDelivery(digest=digest, subscription=subscription, status="SENT") for subscription in done
+        )
+        self.assertEqual(digests.deliver(digest, batch_size=2), {"sent": 5, "failed": 0})
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertNotIn(done[0].email, [message.to[0] for message in mail.outbox])
+        digest.refresh_from_db()
+        self.assertIsNotNone(digest.completed_at)
+
+        self.assertEqual(digests.deliver(digest), {"sent": 0, "failed": 0})
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_interrupted_sends_are_retried_after_the_timeout(self):
+        digest = digests.build_digest()
+        first, second, *rest = Subscription.objects.order_by("pk")
+        with mock.patch.object(digests, "_send", side_effect=[None, KeyboardInterrupt]):
+            with self.assertRaises(KeyboardInterrupt):
+                digests.deliver(digest)
+        # Only the message in flight is left unsettled.
+        self.assertEqual(
+            dict(digest.deliveries.values_list("subscription_id", "status")),
+            {first.pk: "SENT", second.pk: "SENDING"},
+        )
+
+        self.assertEqual(digests.deliver(digest), {"sent": 5, "failed": 0})
+        self.assertNotIn(second.email, [message.to[0] for message in mail.outbox])
+        digest.refresh_from_db()
+        self.assertIsNone(digest.completed_at)
+
+        digest.deliveries.filter(status="SENDING").update(updated_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(digests.deliver(digest), {"sent": 1, "failed": 0})
+        self.assertEqual(mail.outbox[-1].to, [second.email])
+        digest.refresh_from_db()
+        self.assertIsNotNone(digest.completed_at)
+
+    def test_failed_deliveries_can_be_retried(self):
+        digest = digests.build_digest()
+        with mock.patch.object(digests, "_send", side_effect=smtplib.SMTPRecipientsRefused({})):
+            self.assertEqual(digests.deliver(digest), {"sent": 0, "failed": 7})
+        digest.refresh_from_db()
+        self.assertIsNotNone(digest.completed_at)
+        self.assertEqual(digests.retry_failed(digest), 7)
+        self.assertEqual(digests.deliver(digest), {"sent": 7, "failed": 0})
+
+    def test_a_failed_recipient_does_not_block_the_next_digest(self):
+        bad = Subscription.objects.order_by("pk").first()
+
+        def send(connection, message):
+            if message.to == [bad.email]:
+                raise smtplib.SMTPRecipientsRefused({bad.email: (550, b"No such user")})
+            connection.send_messages([message])
+
+        with mock.patch.object(digests, "_send", side_effect=send):
+            call_command("send_digest", stdout=io.StringIO())
+            first = Digest.objects.get()
+            self.assertIsNotNone(first.completed_at)
+            self.assertEqual(first.deliveries.filter(status="FAILED").count(), 1)
+
+            call_command("send_digest", stdout=io.StringIO())
+        second = Digest.objects.exclude(pk=first.pk).get()
+        self.assertEqual(second.deliveries.filter(status="SENT").count(), 6)
+        self.assertEqual(len(mail.outbox), 12)
+
+
+class ChapterStatsTests(TestCase):
+    def setUp(self):
+        self.lahore = Chapter.objects.create(name="Lahore", slug="lahore")
+        self.karachi = Chapter.objects.create(name="Karachi", slug="karachi")
+        stats.recompute()
+
+    def counts(self, chapter):
+        row = ChapterStats.objects.get(chapter=chapter)
+        return row.members, row.articles, row.events, row.upcoming_events
+
+    def test_signals_keep_counters_in_step(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            member = make_member("m@example.com", self.lahore, with_profile=False)
+            Article.objects.create(title="A", content_body="Body", author=member, chapter=self.lahore)
+            start = timezone.now() + timedelta(days=1)
+            event = Event.objects.create(
+                title="E", description="D", category="meetup", start_datetime=start,
+                end_datetime=start + timedelta(hours=1), location="L", chapter=self.lahore, created_by=member,
+            )
+        self.assertEqual(self.counts(self.lahore), (1, 1, 1, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            member = User.objects.only("id").get(pk=member.pk)
+            member.chapter = self.karachi
+            member.save()
+            event.start_datetime = timezone.now() - timedelta(days=1)
+            event.save()
+        self.assertEqual(self.counts(self.lahore), (0, 1, 1, 0))
+        self.assertEqual(self.counts(self.karachi), (1, 0, 0, 0))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            event.soft_delete()
+        self.assertEqual(self.counts(self.lahore), (0, 1, 0, 0))
+
+    def test_loading_and_deleting_rows_run_no_handlers(self):
+        for model in (User, Article, Event):
+            self.assertFalse(post_init.has_listeners(model), model)
+            self.assertFalse(post_delete.has_listeners(model), model)
+        with self.captureOnCommitCallbacks(execute=True):
+            member = make_member("m@example.com", self.lahore, with_profile=False)
+            Article.objects.create(title="A", content_body="Body", author=member, chapter=self.lahore)
+        with self.assertNumQueries(1):  # saves that touch no tracked field read nothing
+            member.first_name = "Grace"
+            member.save(update_fields=["first_name"])
+
+        admin = make_member("admin@example.com", with_profile=False)
+        User.objects.filter(pk=admin.pk).update(role="admin", is_staff=True, is_superuser=True)
+        client = APIClient()
+        client.force_authenticate(User.objects.get(pk=admin.pk))
+        self.assertEqual(self.counts(self.lahore), (1, 1, 0, 0))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(client.delete(f"/user/delete/{member.pk}/").status_code, 204)
+        self.assertEqual(self.counts(self.lahore), (0, 0, 0, 0))
+
+    def test_reconcile_recomputes_after_bulk_changes(self):
+        make_member("m@example.com", self.lahore, with_profile=False)
+        User.objects.update(chapter=self.karachi)
+        call_command("reconcile_chapter_stats", stdout=io.StringIO())
+        self.assertEqual(self.counts(self.lahore), (0, 0, 0, 0))
+        self.assertEqual(self.counts(self.karachi), (1, 0, 0, 0))
+
+    def test_chapter_list_with_stats_joins_in_one_query(self):
+        with self.assertNumQueries(2):
+            response = self.client.get("/chapters/?with_stats=1")
+        self.assertEqual(response.json()["results"][0]["stats"], {
+            "members": 0, "articles": 0, "events": 0, "upcoming_events": 0,
+        })
+        self.assertNotIn("stats", self.client.get("/chapters/").json()["results"][0])
+
+
+class ChapterCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.chapter = Chapter.objects.create(name="Lahore", slug="lahore")
+
+    def test_lookups_are_query_free_once_loaded(self):
+        chapter_cache.get(self.chapter.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(chapter_cache.get(self.chapter.pk).name, "Lahore")
+            serializer = ArticleSerializer(data={"title": "T", "content_body": "B", "chapter": self.chapter.pk})
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+            self.client.get("/chapters/")
+
+    def test_unknown_chapter_is_rejected(self):
+        serializer = ArticleSerializer(data={"title": "T", "content_body": "B", "chapter": "missing"})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("chapter", serializer.errors)
+
+    def test_save_invalidates_after_commit(self):
+        chapter_cache.get(self.chapter.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.chapter.name = "Lahore Central"
+            self.chapter.save()
+        self.assertEqual(chapter_cache.get(self.chapter.pk).name, "Lahore Central")
+        self.assertEqual(self.client.get("/chapters/").json()["results"][0]["name"], "Lahore Central")
+
+    def test_admin_update_sets_and_clears_chapter(self):
+        admin = User.objects.create_superuser(email="admin@example.com", password="secret", first_name="A", last_name="B")
+        member = make_member("member@example.com")
+        client = APIClient()
+        client.force_authenticate(admin)
+        url = f"/user/update/{member.pk}/"
+
+        self.assertEqual(client.put(url, {"chapter": str(self.chapter.pk)}, format="json").status_code, 200)
+        member.refresh_from_db()
+        self.assertEqual(member.chapter_id, self.chapter.pk)
+
+        self.assertEqual(client.put(url, {"first_name": "M"}, format="json").status_code, 200)
+        member.refresh_from_db()
+        self.assertEqual(member.chapter_id, self.chapter.pk)
+
+        self.assertEqual(client.put(url, {"chapter": None}, format="json").status_code, 200)
+        member.refresh_from_db()
+        self.assertIsNone(member.chapter_id)
+
+        self.assertEqual(client.put(url, {"chapter": "missing"}, format="json").status_code, 400)
+
+
+class ServerConfigTests(SimpleTestCase):
+    def test_worker_count_by_class(self):
+        self.assertEqual(server.worker_count("sync", cpus=4), 9)
+        self.assertEqual(server.worker_count("gthread", cpus=4), 5)
+        self.assertEqual(server.worker_count("asgi", cpus=4), 5)
+        self.assertEqual(server.thread_count("gthread"), 4)
+        self.assertEqual(server.thread_count("sync"), 1)
+
+    def test_worker_classes_load(self):
+        for name, path in server.WORKER_CLASSES.items():
+            with self.subTest(name):
+                self.assertTrue(issubclass(load_class(path), Worker))
+
+    def test_workers_fit_in_memory(self):
+        self.assertEqual(server.worker_count("sync", cpus=8, memory=512, worker_memory=160), 2)
+        self.assertEqual(server.worker_count("sync", cpus=8, memory=100, worker_memory=160), 1)
+
+    def test_cgroup_limits_win_over_host(self):
+        files = {"/sys/fs/cgroup/cpu.max": "150000 100000", "/sys/fs/cgroup/memory.max": str(512 * 2 ** 20)}
+        with mock.patch.object(server, "_read", files.get), \
+                mock.patch("os.sched_getaffinity", return_value=set(range(16)), create=True):
+            self.assertEqual(server.cpu_count(), 2)
+            self.assertEqual(server.memory_mb(), 512)
+
+    def test_module_settings(self):
+        self.assertEqual(server.wsgi_app, "backend.wsgi:application")
+        self.assertTrue(server.preload_app)
+        self.assertGreater(server.max_requests_jitter, 0)
+
+
+class ProductionSettingsTests(TestCase):
+    def prod_settings(self, **env):
+        env = {"DJANGO_SECRET_KEY": "test", "DJANGO_ADMIN_ENABLED": "", **env}
+        with mock.patch.dict(os.environ, env):
+            sys.modules.pop("backend.settings.prod", None)
+            return importlib.import_module("backend.settings.prod")
+
+    def test_login_without_session_middleware(self):
+        prod = self.prod_settings()
+        self.assertNotIn("django.contrib.sessions.middleware.SessionMiddleware", prod.MIDDLEWARE)
+        user = make_member("login@example.com", with_profile=False)
+        User.objects.filter(pk=user.pk).update(is_verified=True)
+        with override_settings(MIDDLEWARE=prod.MIDDLEWARE):
+            response = APIClient().post("/login/", {"email": "login@example.com", "password": "secret"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("access", response.json())
+        user.refresh_from_db()
+        self.assertIsNotNone(user.last_login)
+
+
+class FileServingTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(lambda: shutil.rmtree(self.root))
+        self.body = bytes(range(256)) * 40
+        with open(os.path.join(self.root, "photo.9f86d081884c7d65.jpg"), "wb") as f:
+            f.write(self.body)
+        with open(os.path.join(self.root, "app.css"), "w") as f:
+            f.write("body { margin: 0; }\n" * 200)
+        files.compress_file(os.path.join(self.root, "app.css"))
+
+    def get(self, path, **headers):
+        with override_settings(MEDIA_ROOT=self.root, STATIC_ROOT=self.root):
+            return self.client.get(path, **headers)
+
+    def test_hashed_media_is_immutable(self):
+        response = self.get("/media/photo.9f86d081884c7d65.jpg")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Cache-Control"], files.IMMUTABLE)
+        self.assertEqual(b"".join(response.streaming_content), self.body)
+        self.assertEqual(self.get("/media/app.css")["Cache-Control"], files.REVALIDATE)
+
+    def test_range_requests(self):
+        response = self.get("/media/photo.9f86d081884c7d65.jpg", HTTP_RANGE="bytes=100-199")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 100-199/{len(self.body)}")
+        self.assertEqual(response["Content-Length"], "100")
+        self.assertEqual(b"".join(response.streaming_content), self.body[100:200])
+
+        response = self.get("/media/photo.9f86d081884c7d65.jpg", HTTP_RANGE="bytes=-10")
+        self.assertEqual(b"".join(response.streaming_content), self.body[-10:])
+
+        response = self.get("/media/photo.9f86d081884c7d65.jpg", HTTP_RANGE=f"bytes={len(self.body)}-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(self.body)}")
+
+        response = self.get("/media/photo.9f86d081884c7d65.jpg", HTTP_RANGE="bytes=0-1,5-6")
+        self.assertEqual(response.status_code, 200)
+
+    def test_conditional_get(self):
+        etag = self.get("/media/app.css")["ETag"]
+        self.assertEqual(self.get("/media/app.css", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_precompressed_static(self):
+        response = self.get("/static/app.css", HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertFalse(self.get("/static/app.css").has_header("Content-Encoding"))
+        self.assertFalse(self.get("/static/app.css", HTTP_ACCEPT_ENCODING="gzip;q=0").has_header("Content-Encoding"))
+
+    def test_missing_and_traversal(self):
+        self.assertEqual(self.get("/media/nope.jpg").status_code, 404)
+        self.assertEqual(self.get("/media/%2e%2e/manage.py").status_code, 404)
+
+
+class PresignedUploadTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media))
+        self.user = make_member("ada@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def presign(self, size=1000, content_type="image/png"):
+        response = self.client.post("/uploads/presign/", {"content_type": content_type, "size": size}, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()
+
+    def put(self, target, body, content_type="image/png"):
+        return self.client.generic("PUT", target["url"], body, content_type=content_type)
+
+    def test_local_upload_then_attach(self):
+        target = self.presign()
+        self.assertEqual(target["method"], "PUT")
+        response = self.put(target, png_bytes())
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["key"], target["key"])
+        self.assertEqual(self.put(target, b"again").status_code, 409)
+
+        response = self.client.put("/user/update/me/", {"profile_image_upload": target["upload"]}, format="multipart")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.user.profile.refresh_from_db()
+        self.assertEqual(self.user.profile.profile_image.name, target["key"])
+
+    def test_renamed_upload_gets_its_own_token(self):
+        target = self.presign()
+        self.assertEqual(self.put(target, png_bytes("red")).status_code, 201)
+        # A second PUT that passed the "already used" check at the same time.
+        real_exists, checks = default_storage.exists, []
+
+        def exists(name):
+            checks.append(name)
+            return len(checks) > 1 and real_exists(name)
+
+        with mock.patch.object(default_storage, "exists", side_effect=exists):
+            response = self.put(target, png_bytes("blue"))
+        self.assertEqual(response.status_code, 201)
+        stored = response.json()
+        self.assertNotEqual(stored["key"], target["key"])
+        self.assertEqual(default_storage.size(stored["key"]), stored["size"])
+
+        response = self.client.put("/user/update/me/", {"profile_image_upload": stored["upload"]}, format="multipart")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.user.profile.refresh_from_db()
+        self.assertEqual(self.user.profile.profile_image.name, stored["key"])
+
+    def test_confirm_checks_image_signature(self):
+        for body, content_type in [(b"<html>not an image</html>", "image/png"), (png_bytes(), "image/jpeg")]:
+            target = self.presign(content_type=content_type)
+            self.assertEqual(self.put(target, body, content_type=content_type).status_code, 201)
+            response = self.client.put(
+                "/user/update/me/", {"profile_image_upload": target["upload"]}, format="multipart",
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("not a supported image", response.json()["profile_image_upload"][0])
+            self.assertFalse(default_storage.exists(target["key"]))
+
+    def test_local_upload_limits(self):
+        self.assertEqual(self.client.post(
+            "/uploads/presign/", {"content_type": "image/png", "size": 50 * 2 ** 20}, format="json").status_code, 400)
+        self.assertEqual(self.client.post(
+            "/uploads/presign/", {"content_type": "text/html", "size": 10}, format="json").status_code, 400)
+
+        target = self.presign(size=10)
+        self.assertEqual(self.put(target, b"0" * 11).status_code, 400)
+        self.assertFalse(os.path.exists(os.path.join(self.media, target["key"])))
+        self.assertEqual(self.put(target, b"0" * 10, content_type="image/gif").status_code, 400)
+        self.assertEqual(self.client.generic("PUT", target["url"].replace("/local/", "/local/x"), b"0", content_type="image/png").status_code, 403)
+
+    def test_token_is_bound_to_user(self):
+        target = self.presign()
+        self.put(target, b"0" * 10)
+        other = make_member("grace@example.com")
+        with self.assertRaises(DjangoValidationError):
+            uploads.confirm_upload(other, target["upload"])
+        self.client.force_authenticate(other)
+        response = self.client.put("/user/update/me/", {"profile_image_upload": target["upload"]}, format="multipart")
+        self.assertEqual(response.status_code, 400)
+
+
+@skipUnless(mock_aws, "moto and django-storages are required")
+class S3StorageTests(TestCase):
+    def setUp(self):
+        self.enterContext(mock.patch.dict(os.environ, {"AWS_ACCESS_KEY_ID": "test", "AWS_SECRET_ACCESS_KEY": "test"}))
+        self.enterContext(mock_aws())
+        self.storage = S3Storage(bucket_name="linq-media", region_name="us-east-1", file_overwrite=False)
+        self.storage.connection.meta.client.create_bucket(Bucket="linq-media")
+
+    def test_streams_large_upload_in_parts(self):
+        body = io.BytesIO(os.urandom(12 * 2 ** 20))
+        name, size = uploads.save_stream("profile_images/big.png", body, limit=16 * 2 ** 20, storage=self.storage)
+        self.assertEqual((name, size), ("profile_images/big.png", 12 * 2 ** 20))
+        self.assertEqual(self.storage.size(name), size)
+
+        with self.assertRaises(DjangoValidationError):
+            uploads.save_stream("profile_images/huge.png", io.BytesIO(b"0" * 2048), limit=1024, storage=self.storage)
+        self.assertFalse(self.storage.exists("profile_images/huge.png"))
+
+    def test_presigned_post_is_scoped(self):
+        user = make_member("ada@example.com")
+        request = APIRequestFactory().get("/")
+        target = uploads.presign_upload(user, "image/jpeg", 2048, request, storage=self.storage)
+        self.assertEqual(target["method"], "POST")
+        self.assertEqual(target["fields"]["key"], target["key"])
+        self.assertEqual(target["fields"]["Content-Type"], "image/jpeg")
+        self.assertIn("policy", target["fields"])
+
+        with self.assertRaises(DjangoValidationError):
+            uploads.confirm_upload(user, target["upload"], storage=self.storage)
+        self.storage.save(target["key"], io.BytesIO(b"\xff\xd8\xff" + b"0" * 100))
+        self.assertEqual(uploads.confirm_upload(user, target["upload"], storage=self.storage), target["key"])
+
+
+def png_bytes(color="red", size=(8, 8)):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@override_settings(UPLOAD_MAX_SIZE=64 * 1024)
+class SignupUploadTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media))
+
+    def signup(self, email, **files):
+        data = {
+            "first_name": "Ada", "last_name": "Lovelace", "email": email,
+            "password": "s3cret-pass", "password2": "s3cret-pass",
+            "title": "Engineer", "company_name": "Linq", "bio": "Bio", "industry": "IT",
+            "location": "Lahore", "skills": '["python"]', "status": "ACTIVE", "role": "member",
+        }
+        data.update(files)
+        return self.client.post("/signup/", data)
+
+    def test_image_is_stored_content_addressed_and_deduplicated(self):
+        body = png_bytes()
+        response = self.signup("ada@example.com", profile_image=SimpleUploadedFile("me.jpeg", body, "image/jpeg"))
+        self.assertEqual(response.status_code, 201, response.content)
+        self.signup("grace@example.com", profile_image=SimpleUploadedFile("other.png", body, "image/png"))
+
+        names = set(Profile.objects.values_list("profile_image", flat=True))
+        digest = hashlib.sha256(body).hexdigest()
+        self.assertEqual(names, {f"profile_images/{digest}.png"})
+        self.assertEqual(os.listdir(os.path.join(self.media, "profile_images")), [f"{digest}.png"])
+
+    def test_oversized_image_is_rejected_while_streaming(self):
+        body = png_bytes() + b"\0" * (64 * 1024)
+        response = self.signup("ada@example.com", profile_image=SimpleUploadedFile("big.png", body, "image/png"))
+        self.assertEqual(response.status_code, 413)
+        self.assertIn("profile_image", response.json())
+        self.assertFalse(User.objects.exists())
+
+    def test_whole_body_limit(self):
+        response = self.client.generic(
+            "POST", "/signup/", b"x" * (64 * 1024 + 2_621_440 + 1),
+            content_type="multipart/form-data; boundary=b",
+        )
+        self.assertEqual(response.status_code, 413)
+
+    def test_malformed_images_are_rejected(self):
+        for upload in (
+            SimpleUploadedFile("evil.png", b"<?php echo 'hi'; ?>" * 10, "image/png"),
+            SimpleUploadedFile("tiny.png", b"\x89PN", "image/png"),
+        ):
+            response = self.signup("ada@example.com", profile_image=upload)
+            self.assertEqual(response.status_code, 400, upload.name)
+            self.assertIn("profile_image", response.json())
+        response = self.signup("ada@example.com", resume=SimpleUploadedFile("cv.png", png_bytes(), "image/png"))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(User.objects.exists())
+
+
+class BulkUserTests(TestCase):
+    def setUp(self):
+        self.lahore = Chapter.objects.create(name="Lahore", slug="lahore")
+        self.karachi = Chapter.objects.create(name="Karachi", slug="karachi")
+        self.admin = make_member("admin@example.com", with_profile=False)
+        User.objects.filter(pk=self.admin.pk).update(role="admin", is_staff=True, is_superuser=True)
+        self.members = [make_member(f"m{i}@example.com", self.lahore) for i in range(5)]
+        start = timezone.now() + timedelta(days=1)
+        for n, member in enumerate(self.members[:2]):
+            Article.objects.create(title=f"A{n}", content_body="Body", author=member, chapter=self.lahore)
+            Event.objects.create(
+                title=f"E{n}", description="D", category="meetup", start_datetime=start,
+                end_datetime=start + timedelta(hours=1), location="L", chapter=self.lahore, created_by=member,
+            )
+        stats.recompute()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.get(pk=self.admin.pk))
+        self.ids = [str(member.pk) for member in self.members]
+
+    def counts(self, chapter):
+        row = ChapterStats.objects.get(chapter=chapter)
+        return row.members, row.articles, row.events, row.upcoming_events
+
+    def test_role_change_is_one_update(self):
+        with self.assertNumQueries(1):
+            affected = bulk.run("role", self.ids[:3], {"role": "editor"})
+        self.assertEqual(affected, 3)
+        self.assertEqual(User.objects.filter(role="editor", is_staff=True).count(), 3)
+
+        response = self.client.post("/user/bulk/", {"action": "role", "ids": self.ids, "role": "member"}, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()["affected"], 5)
+        self.assertFalse(User.objects.filter(pk__in=self.ids, is_staff=True).exists())
+
+    def test_chapter_move_recomputes_stats(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/user/bulk/", {"action": "chapter", "ids": self.ids[:3], "chapter": str(self.karachi.pk)}, format="json",
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.counts(self.lahore), (2, 2, 2, 2))
+        self.assertEqual(self.counts(self.karachi), (3, 0, 0, 0))
+
+    @override_settings(BULK_BATCH_SIZE=2)
+    def test_batched_delete_cascades_and_keeps_stats_correct(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            affected = bulk.run("delete", self.ids[:4])
+        self.assertEqual(affected, 4)
+        self.assertEqual(list(User.objects.filter(pk__in=self.ids).values_list("email", flat=True)), ["m4@example.com"])
+        self.assertEqual(Profile.objects.filter(user_id__in=self.ids).count(), 1)
+        self.assertFalse(Article.objects.exists())
+        self.assertFalse(Event.objects.exists())
+        self.assertEqual(self.counts(self.lahore), (1, 0, 0, 0))
+
+    def test_cannot_delete_self_and_requires_admin(self):
+        response = self.client.post("/user/bulk/", {"action": "delete", "ids": [str(self.admin.pk)]}, format="json")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post("/user/bulk/", {"action": "role", "ids": self.ids}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.client.force_authenticate(self.members[0])
+        response = self.client.post("/user/bulk/", {"action": "delete", "ids": self.ids}, format="json")
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(User.objects.filter(pk__in=self.ids).count(), 5)
+
+    @override_settings(BULK_BATCH_SIZE=2, BULK_ASYNC_THRESHOLD=3)
+    def test_large_requests_run_as_resumable_jobs(self):
+        with mock.patch.object(bulk, "_spawn"), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/user/bulk/", {"action": "delete", "ids": self.ids}, format="json")
+        self.assertEqual(response.status_code, 202, response.content)
+        job_url = response["Location"]
+        self.assertEqual(self.client.get(job_url).json()["status"], "PENDING")
+
+        # A worker died after the first batch; the command picks the job up from there.
+        job = BulkJob.objects.get(pk=response.json()["id"])
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk.delete_users(job.user_ids[:2])
+        BulkJob.objects.filter(pk=job.pk).update(status="RUNNING", processed=2, affected=2)
+        BulkJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("run_bulk_jobs", stdout=io.StringIO())
+
+        data = self.client.get(job_url).json()
+        self.assertEqual((data["status"], data["processed"], data["affected"]), ("DONE", 5, 5))
+        self.assertFalse(User.objects.filter(pk__in=self.ids).exists())
+        self.assertEqual(self.counts(self.lahore), (0, 0, 0, 0))
+
+
+class LifecycleTests(TestCase):
+    def setUp(self):
+        self.chapter = Chapter.objects.create(name="Lahore", slug="lahore")
+        self.author = make_member("author@example.com", self.chapter, with_profile=False)
+        User.objects.filter(pk=self.author.pk).update(role="admin", is_staff=True, is_superuser=True)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.get(pk=self.author.pk))
+        self.article = Article.objects.create(title="Hello", content_body="Body", author=self.author, chapter=self.chapter)
+        self.event = self.make_event("Meetup", timezone.now() + timedelta(days=3))
+        stats.recompute()
+
+    def make_event(self, title, start):
+        return Event.objects.create(
+            title=title, description="D", category="meetup", start_datetime=start,
+            end_datetime=start + timedelta(hours=2), location="L", chapter=self.chapter, created_by=self.author,
+        )
+
+    def counts(self):
+        row = ChapterStats.objects.get(chapter=self.chapter)
+        return row.members, row.articles, row.events, row.upcoming_events
+
+    def test_delete_endpoints_leave_tombstones(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.delete(f"/update/articles/{self.article.pk}/").status_code, 204)
+            self.assertEqual(self.client.delete(f"/events/{self.event.pk}/").status_code, 204)
+        self.assertFalse(Article.objects.exists())
+        self.assertFalse(self.chapter.events.exists())
+        self.assertNotIn("deleted_at", EventSerializer(Event.all_objects.get()).data)
+        self.assertEqual(self.client.get("/articles/hello/").status_code, 404)
+        self.assertEqual(Article.all_objects.get().deleted_at is not None, True)
+        self.assertEqual(self.counts(), (1, 0, 0, 0))
+        with self.captureOnCommitCallbacks(execute=True):
+            article = Article.objects.create(title="Hello", content_body="B", author=self.author, chapter=self.chapter)
+        self.assertEqual(article.slug, "hello-1")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/content/restore/", {"ids": [str(self.article.pk), str(self.event.pk)]}, format="json")
+        self.assertEqual(response.json(), {"restored": 2})
+        self.assertEqual(self.client.get("/articles/hello/").status_code, 200)
+        self.assertEqual(self.counts(), (1, 2, 1, 1))
+
+    @override_settings(ARCHIVE_BATCH_SIZE=2, ARCHIVE_EVENT_MONTHS=6, ARCHIVE_DELETED_DAYS=30)
+    def test_archive_in_batches_and_restore(self):
+        old = [self.make_event(f"Old {i}", timezone.now() - timedelta(days=400)) for i in range(3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.soft_delete()
+        Article.all_objects.filter(pk=self.article.pk).update(deleted_at=timezone.now() - timedelta(days=40))
+        stats.recompute()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("archive_content", stdout=io.StringIO())
+        self.assertEqual(list(Event.all_objects.values_list("pk", flat=True)), [self.event.pk])
+        self.assertFalse(Article.all_objects.exists())
+        self.assertEqual(ArchivedRecord.objects.filter(reason="expired").count(), 3)
+        self.assertEqual(ArchivedRecord.objects.get(reason="deleted").pk, self.article.pk)
+        self.assertEqual(self.counts(), (1, 0, 1, 1))
+
+        # A new row took the archived event's slug meanwhile.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make_event("Old 0", timezone.now() + timedelta(days=1))
+            restored = lifecycle.restore([old[0].pk, self.article.pk])
+        self.assertEqual(restored, 2)
+        event = Event.objects.get(pk=old[0].pk)
+        self.assertEqual((event.slug, event.start_datetime), ("old-0-1", old[0].start_datetime))
+        article = Article.objects.get(pk=self.article.pk)
+        self.assertEqual((article.slug, article.created_at, article.deleted_at), ("hello", self.article.created_at, None))
+        self.assertEqual(ArchivedRecord.objects.count(), 2)
+        self.assertEqual(self.counts(), (1, 1, 3, 2))
+
+    def test_restored_event_frees_the_seats_of_its_archived_rsvps(self):
+        Event.objects.filter(pk=self.event.pk).update(capacity=1)
+        self.event.refresh_from_db()
+        rsvp.request(self.event, self.author)
+        lifecycle.archive(Event, Event.all_objects.all(), "expired")
+        self.assertFalse(EventRSVP.objects.exists())
+
+        lifecycle.restore([self.event.pk])
+        self.assertEqual(Event.objects.get(pk=self.event.pk).seats_taken, 0)
+        attendance, _ = rsvp.request(self.event, make_member("guest@example.com"))
+        self.assertEqual(attendance.status, rsvp.GOING)
+
+    def test_archived_rows_follow_their_owner(self):
+        lifecycle.archive(Event, Event.all_objects.all(), "expired")
+        self.assertEqual(ArchivedRecord.objects.count(), 1)
+        User.objects.filter(pk=self.author.pk).delete()
+        self.assertFalse(ArchivedRecord.objects.exists())
+
+
+class AuthorSnapshotTests(TestCase):
+    def setUp(self):
+        self.chapter = Chapter.objects.create(name="Lahore", slug="lahore")
+        self.author = make_member("ada@example.com", self.chapter, image="profile_images/ada.png")
+        for i in range(3):
+            Article.objects.create(title=f"A{i}", content_body="Body", author=self.author, chapter=self.chapter)
+
+    def snapshots(self):
+        return set(Article.all_objects.values_list("author_name", "author_title", "author_avatar"))
+
+    def test_save_writes_snapshot_and_list_reads_it_without_joins(self):
+        self.assertEqual(self.snapshots(), {("Ada Lovelace", "Engineer", "profile_images/ada.png")})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/articles/")
+        self.assertNotIn("JOIN", queries[-1]["sql"])
+        article = response.json()["results"][0]
+        self.assertEqual((article["author"], article["author_name"], article["author_title"]),
+                         (str(self.author.pk), "Ada Lovelace", "Engineer"))
+        self.assertEqual(article["author_avatar"], "http://testserver/media/profile_images/ada.png")
+
+    def test_user_and_profile_changes_fan_out_once_per_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            user = User.objects.get(pk=self.author.pk)
+            user.first_name = "Augusta"
+            user.save()
+            profile = user.profile
+            profile.title = "Countess"
+            profile.save()
+        self.assertEqual(self.snapshots(), {("Augusta Lovelace", "Countess", "profile_images/ada.png")})
+
+        with mock.patch.object(authors, "refresh") as refresh, self.captureOnCommitCallbacks(execute=True):
+            user.last_login = timezone.now()
+            user.save(update_fields=["last_login"])
+            profile.save(update_fields=["bio"])
+        refresh.assert_not_called()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Profile.objects.filter(pk=profile.pk).update(profile_image="profile_images/new.png")
+            authors.schedule(user.pk)
+        self.assertEqual(self.snapshots(), {("Augusta Lovelace", "Countess", "profile_images/new.png")})
+
+    def test_refresh_leaves_matching_rows_alone(self):
+        self.assertEqual(authors.refresh([self.author.pk]), 0)
+        plain = make_member("grace@example.com", self.chapter)
+        Article.objects.create(title="G", content_body="Body", author=plain, chapter=self.chapter)
+        self.assertEqual(authors.refresh([plain.pk]), 0)  # no avatar is stored as ""
+
+
+class ArticleContentTests(TestCase):
+    def setUp(self):
+        self.chapter = Chapter.objects.create(name="Lahore", slug="lahore")
+        self.author = make_member("ada@example.com", self.chapter, with_profile=False)
+
+    def test_html_is_sanitized(self):
+        rendered = content.render(
+            '<p onclick="x()">Hi <a href="https://e.com" target="_blank">there</a></p>'
+            '<script>alert(1)</script><img src="javascript:alert(1)">'
+        )
+        self.assertEqual(
+            rendered["content_html"],
+            '<p>Hi <a href="https://e.com" rel="noopener noreferrer nofollow">there</a></p><img>',
+        )
+        self.assertEqual((rendered["excerpt"], rendered["word_count"]), ("Hi there", 2))
+
+    def test_plain_text_becomes_paragraphs(self):
+        rendered = content.render("First line\nsecond & <3\n\nNext paragraph")
+        self.assertEqual(rendered["content_html"], "<p>First line<br>second &amp; &lt;3</p><p>Next paragraph</p>")
+        self.assertEqual(rendered["excerpt"], "First line second & <3 Next paragraph")
+
+    def test_excerpt_cuts_on_a_word_boundary(self):
+        text = "<p>" + "word " * 100 + "</p><p>tail</p>"
+        rendered = content.render(text)
+        self.assertEqual(rendered["word_count"], 101)
+        self.assertLessEqual(len(rendered["excerpt"]), content.EXCERPT_LENGTH)
+        self.assertTrue(rendered["excerpt"].endswith("word…"))
+
+    def test_save_renders_only_changed_bodies(self):
+        article = Article.objects.create(title="A", content_body="<p>One two</p>", author=self.author, chapter=self.chapter)
+        self.assertEqual((article.word_count, article.content_hash), (2, content.content_hash("<p>One two</p>")))
+        with mock.patch.object(content, "render", wraps=content.render) as render:
+            article.title = "B"
+            article.save()
+            render.assert_not_called()
+            article.content_body = "One two three"
+            article.save()
+            render.assert_called_once()
+        self.assertEqual(Article.objects.get().excerpt, "One two three")
+
+    def test_list_sends_excerpts_and_detail_sends_bodies(self):
+        body = "<p>" + "Lorem ipsum dolor sit amet. " * 400 + "</p>"
+        for i in range(10):
+            Article.objects.create(title=f"A{i}", content_body=body, author=self.author, chapter=self.chapter)
+        listing = self.client.get("/articles/")
+        row = listing.json()["results"][0]
+        self.assertNotIn("content_body", row)
+        self.assertEqual(row["word_count"], 2000)
+        detail = self.client.get(f"/articles/{row['slug']}/")
+        self.assertEqual(detail.json()["article"]["content_html"], body)
+        # Ten rows used to carry ten full bodies.
+        self.assertLess(len(listing.content), 10 * len(body) / 10)
+
+        response = self.client.get("/articles/", {"sort_by": "read-time"})
+        self.assertEqual(response.status_code, 200)
+
+
+class TagTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.chapter = Chapter.objects.create(name="Lahore", slug="lahore")
+        self.author = make_member("ada@example.com", self.chapter, with_profile=False)
+
+    def article(self, title, tag_list):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Article.objects.create(
+                title=title, content_body="Body", tags=tag_list, author=self.author, chapter=self.chapter,
+            )
+
+    def counts(self):
+        return dict(Tag.objects.values_list("name", "article_count"))
+
+    def slugs(self, **params):
+        return sorted(row["slug"] for row in self.client.get("/articles/", params).json()["results"])
+
+    def test_tags_are_normalized_and_counted(self):
+        article = self.article("One", [" Python ", "python", "Web  Dev"])
+        self.assertEqual(article.tags, ["python", "web dev"])
+        self.article("Two", "python, django")
+        self.assertEqual(self.counts(), {"python": 2, "web dev": 1, "django": 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            article.tags = ["django"]
+            article.save()
+        self.assertEqual(self.counts(), {"python": 1, "web dev": 0, "django": 2})
+        self.assertEqual(ArticleTag.objects.filter(article=article).count(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            article.soft_delete()
+        self.assertEqual(self.counts()["django"], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            lifecycle.restore([article.pk])
+        self.assertEqual(self.counts()["django"], 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            lifecycle.archive(Article, Article.all_objects.filter(pk=article.pk), "stale")
+        self.assertEqual(self.counts()["django"], 1)
+
+    def test_exact_and_prefix_filters_use_whole_tags(self):
+        self.article("Java", ["java"])
+        self.article("Script", ["javascript"])
+        self.article("Py", ["python"])
+        self.assertEqual(self.slugs(tag="Java"), ["java"])
+        self.assertEqual(self.slugs(tag_prefix="jav"), ["java", "script"])
+        self.assertEqual(self.slugs(search="java"), ["java"])
+        self.assertEqual(self.slugs(tag="ruby"), [])
+
+    def test_cloud_is_cached_until_counts_change(self):
+        self.article("One", ["python", "django"])
+        self.article("Two", ["python"])
+        self.assertEqual(self.client.get("/tags/").json(), [{"name": "python", "count": 2}, {"name": "django", "count": 1}])
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.client.get("/tags/", {"limit": 1}).json()), 1)
+        self.article("Three", ["django", "web"])
+        self.assertEqual(self.client.get("/tags/").json()[0], {"name": "django", "count": 2})
+
+    def test_bulk_delete_and_archive_recount(self):
+        self.article("One", ["python"])
+        other = make_member("grace@example.com", self.chapter, with_profile=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            Article.objects.create(title="Two", content_body="B", tags=["python"], author=other, chapter=self.chapter)
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk.delete_users([other.pk])
+        self.assertEqual(self.counts(), {"python": 1})
+        with self.captureOnCommitCallbacks(execute=True):
+            lifecycle.archive(Article, Article.all_objects.all(), "stale")
+        self.assertEqual(self.counts(), {"python": 0})
+        Tag.objects.update(article_count=7)
+        tags.recount()
+        self.assertEqual(self.counts(), {"python": 0})
+
+
+class TaxonomyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.ada = make_member("ada@example.com", skills=["python", " Machine  learning", "JS"], industry="it")
+        self.grace = make_member("grace@example.com", skills="Python, COBOL", industry="Defense")
+        self.alan = make_member("alan@example.com", skills=["cobol"], industry="IT", is_public=False)
+
+    def emails(self, **params):
+        return sorted(user["email"] for user in self.client.get("/search/", params).json())
+
+    def test_profiles_are_canonicalized(self):
+        self.ada.profile.refresh_from_db()
+        self.assertEqual(self.ada.profile.skills, ["Python", "Machine learning", "JavaScript"])
+        self.assertEqual(self.ada.profile.industry, "Information Technology")
+        self.assertEqual(Skill.objects.get(key="python").profiles.count(), 2)
+        self.assertEqual(Industry.objects.count(), 2)
+
+        profile = self.ada.profile
+        profile.skills = ["Python"]
+        profile.save()
+        self.assertEqual(set(ProfileSkill.objects.filter(profile=profile).values_list("skill__name", flat=True)), {"Python"})
+
+    def test_search_filters_by_ids(self):
+        python, cobol = Skill.objects.get(key="python").pk, Skill.objects.get(key="cobol").pk
+        it = Industry.objects.get(key="information technology").pk
+        self.assertEqual(self.emails(skill=str(python)), ["ada@example.com", "grace@example.com"])
+        self.assertEqual(self.emails(skill=f"{python},{cobol}"), ["grace@example.com"])
+        self.assertEqual(self.emails(industry_id=str(it)), ["ada@example.com"])
+        self.assertEqual(self.emails(industry="tech"), ["ada@example.com"])
+        self.assertEqual(self.emails(search="js"), ["ada@example.com"])
+        self.assertEqual(self.emails(skill="nope"), [])
+
+    def test_autocomplete_uses_word_prefixes_and_rebuilds_on_change(self):
+        response = self.client.get("/skills/autocomplete/", {"q": "PY"})
+        self.assertEqual([(s["name"], s["count"]) for s in response.json()], [("Python", 2)])
+        self.assertEqual([s["name"] for s in self.client.get("/skills/autocomplete/", {"q": "learn"}).json()],
+                         ["Machine learning"])
+        self.assertEqual([s["name"] for s in self.client.get("/industries/autocomplete/", {"q": "inf"}).json()],
+                         ["Information Technology"])
+        with self.assertNumQueries(0):
+            self.client.get("/skills/autocomplete/", {"q": "c"})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Skill.objects.create(key="pytest", name="pytest")
+        self.assertEqual([s["name"] for s in self.client.get("/skills/autocomplete/", {"q": "pyt"}).json()],
+                         ["Python", "pytest"])
+
+    def test_trie_keeps_best_entries_per_prefix(self):
+        trie = taxonomy.PrefixTrie()
+        for n, name in enumerate(["ab", "abc", "abd", "b"]):
+            trie.insert(name, n, limit=2)
+        self.assertEqual(trie.search("a"), [0, 1])
+        self.assertEqual(trie.search("abd"), [2])
+        self.assertEqual(trie.search("x"), [])
+
+
+class RecommendationTests(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lahore = Chapter.objects.create(name="Lahore", slug="lahore")
+            self.karachi = Chapter.objects.create(name="Karachi", slug="karachi")
+            self.ada = make_member("ada@example.com", self.lahore)
+            self.grace = make_member("grace@example.com", self.lahore)
+            self.linus = make_member("linus@example.com", self.lahore, skills=["python"], industry="Defense")
+            self.alan = make_member("alan@example.com", self.lahore, skills=["cobol"], industry="Banking")
+            self.hidden = make_member("hidden@example.com", self.lahore, is_public=False)
+            self.kate = make_member("kate@example.com", self.karachi)
+        RecommendationRefresh.objects.all().delete()
+
+    def lists(self):
+        lists = {}
+        for user_id, other, score in Recommendation.objects.order_by("user_id", "rank").values_list(
+            "user_id", "recommended_id", "score",
+        ):
+            lists.setdefault(user_id, []).append((other, round(score, 5)))
+        return lists
+
+    def test_cosine_top_k_within_chapter(self):
+        self.assertEqual(recommendations.recompute_all(), 5)
+        lists = self.lists()
+        self.assertEqual([other for other, _ in lists[self.ada.pk]], [self.grace.pk, self.linus.pk])
+        self.assertEqual(lists[self.ada.pk][0][1], 1.0)
+        # python only in common: 1 / (sqrt(6) * sqrt(5)).
+        self.assertAlmostEqual(lists[self.ada.pk][1][1], 30 ** -0.5, places=5)
+        self.assertNotIn(self.alan.pk, lists)  # nothing in common with anyone
+        self.assertNotIn(self.hidden.pk, lists)
+        self.assertNotIn(self.kate.pk, lists)  # alone in Karachi
+
+    def test_endpoint_is_one_query(self):
+        recommendations.recompute_all()
+        client = APIClient()
+        client.force_authenticate(self.ada)
+        with self.assertNumQueries(1):
+            response = client.get("/user/me/recommendations/", {"fields": "id,title"})
+        self.assertEqual(response.json(), [
+            {"id": str(self.grace.pk), "title": "Engineer", "score": 1.0},
+            {"id": str(self.linus.pk), "title": "Engineer", "score": round(30 ** -0.5, 4)},
+        ])
+
+    @override_settings(RECOMMENDATIONS_K=2)
+    def test_incremental_refresh_matches_full_recompute(self):
+        recommendations.recompute_all()
+        profile = self.alan.profile
+        profile.skills, profile.industry = ["Python", "Django"], "IT"
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+        self.assertNotIn(self.alan.pk, [other for other, _ in self.lists()[self.ada.pk]])
+        self.assertEqual(recommendations.process_pending(), 1)
+        self.assertIn(self.alan.pk, [other for other, _ in self.lists()[self.ada.pk]])
+        incremental = self.lists()
+        recommendations.recompute_all()
+        self.assertEqual(incremental, self.lists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk.move_to_chapter([str(self.kate.pk)], self.lahore.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.grace.profile.is_public = False
+            self.grace.profile.save(update_fields=["is_public"])
+        self.assertEqual(recommendations.process_pending(size=1), 2)
+        incremental = self.lists()
+        self.assertNotIn(self.grace.pk, incremental)
+        recommendations.recompute_all()
+        self.assertEqual(incremental, self.lists())
+
+
+    def test_only_changed_vectors_are_queued(self):
+        profile = Profile.objects.get(user=self.ada)
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.bio, profile.skills = "New bio", list(reversed(profile.skills))
+            profile.save()
+            profile.save(update_fields=["bio"])
+            User.objects.get(pk=self.ada.pk).save()
+        self.assertFalse(RecommendationRefresh.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.experience = "Senior"
+            profile.save()
+        self.assertEqual(list(RecommendationRefresh.objects.values_list("user_id", flat=True)), [self.ada.pk])
+        out = io.StringIO()
+        call_command("compute_recommendations", pending=True, stdout=out)
+        self.assertIn("1 queued member", out.getvalue())
+        self.assertFalse(RecommendationRefresh.objects.exists())
+
+
+class GeoTests(TestCase):
+    def setUp(self):
+        self.lahore = Chapter.objects.create(name="Lahore", slug="lahore")
+        self.ada = make_member("ada@example.com", location="DHA Phase 5, Lahore")
+        self.grace = make_member("grace@example.com", location="F-7, Islamabad, Pakistan")
+        self.kate = make_member("kate@example.com", location="Karachi")
+        self.nowhere = make_member("nowhere@example.com", location="Atlantis")
+        start = timezone.now() + timedelta(days=1)
+        for title, location in [("Islamabad meetup", "Islamabad"), ("Lahore meetup", "lahore"), ("Online", "Zoom")]:
+            Event.objects.create(
+                title=title, description="D", category="meetup", start_datetime=start,
+                end_datetime=start + timedelta(hours=1), location=location, chapter=self.lahore, created_by=self.ada,
+            )
+
+    def test_locations_are_geocoded_offline(self):
+        self.assertEqual(geo.geocode("Hyderabad, India"), (17.3850, 78.4867))
+        self.assertEqual(geo.geocode("Hyderabad"), (25.3960, 68.3578))
+        profile = Profile.objects.get(user=self.ada)
+        self.assertEqual((profile.latitude, profile.longitude), (31.5497, 74.3436))
+        self.assertEqual(profile.geohash, geo.encode(31.5497, 74.3436))
+        self.assertIsNone(Profile.objects.get(user=self.nowhere).geohash)
+        self.assertEqual(geo.encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+
+    def test_cells_cover_the_box(self):
+        box = (33.2, 72.7, 34.1, 73.4)
+        cover = geo.cells(box)
+        self.assertLessEqual(len(cover), geo.MAX_CELLS)
+        for lat in (33.2, 33.5, 34.1):
+            for lon in (72.7, 73.0, 73.4):
+                self.assertTrue(any(geo.encode(lat, lon).startswith(cell) for cell in cover))
+
+    def test_member_search_near_a_point(self):
+        response = self.client.get("/search/", {"near": "Rawalpindi", "radius_km": 300})
+        self.assertEqual([user["email"] for user in response.json()], ["grace@example.com", "ada@example.com"])
+        self.assertLess(response.json()[0]["distance_km"], 20)
+
+        cards = self.client.get("/search/", {"near": "24.86,67.01", "view": "card", "fields": "id"}).json()
+        self.assertEqual([card["id"] for card in cards], [str(self.kate.pk)])
+        self.assertEqual(set(cards[0]), {"id", "distance_km"})
+
+        self.assertEqual(self.client.get("/search/", {"near": "Atlantis"}).status_code, 400)
+        self.assertEqual(self.client.get("/search/", {"near": "Lahore", "radius_km": 5000}).status_code, 400)
+
+    def test_event_list_bbox_and_distance_order(self):
+        response = self.client.get("/events/", {"near": "Rawalpindi", "radius_km": 500, "page_size": 10})
+        events = response.json()["results"]
+        self.assertEqual([event["title"] for event in events], ["Islamabad meetup", "Lahore meetup"])
+        self.assertLess(events[0]["distance_km"], events[1]["distance_km"])
+        self.assertNotIn("geohash", events[0])
+
+        response = self.client.get("/events/", {"bbox": "30,73,32,75", "page_size": 10})
+        self.assertEqual([event["title"] for event in response.json()["results"]], ["Lahore meetup"])
+        self.assertEqual(self.client.get("/events/", {"bbox": "32,75,30,73"}).status_code, 400)
+
+
+class RSVPTests(TestCase):
+    def setUp(self):
+        self.lahore = Chapter.objects.create(name="Lahore", slug="lahore")
+        self.members = [make_member(f"m{i}@example.com", self.lahore) for i in range(4)]
+        start = timezone.now() + timedelta(days=1)
+        self.event = Event.objects.create(
+            title="Meetup", description="D", category="meetup", start_datetime=start,
+            end_datetime=start + timedelta(hours=1), location="Lahore", chapter=self.lahore,
+            created_by=self.members[0], capacity=2,
+        )
+
+    def statuses(self):
+        self.event.refresh_from_db()
+        return self.event.seats_taken, [
+            EventRSVP.objects.get(event=self.event, user=member).status for member in self.members
+        ]
+
+    def test_capacity_waitlist_and_promotion(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            results = [rsvp.request(self.event, member) for member in self.members]
+        self.assertEqual([created for _, created in results], [True] * 4)
+        self.assertEqual(self.statuses(), (2, ["GOING", "GOING", "WAITLISTED", "WAITLISTED"]))
+        self.assertEqual(rsvp.waitlist_position(results[3][0]), 2)
+        self.assertEqual(rsvp.request(self.event, self.members[2])[1], False)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rsvp.cancel(self.event, self.members[1])
+        self.assertEqual(self.statuses(), (2, ["GOING", "CANCELLED", "GOING", "WAITLISTED"]))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rsvp.cancel(self.event, self.members[3])
+            rsvp.cancel(self.event, self.members[0])
+        self.assertEqual(self.statuses(), (1, ["CANCELLED", "CANCELLED", "GOING", "CANCELLED"]))
+
+        Event.objects.filter(pk=self.event.pk).update(capacity=0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(rsvp.request(self.event, self.members[1])[0].status, "WAITLISTED")
+        Event.objects.filter(pk=self.event.pk).update(capacity=5)
+        self.assertEqual(rsvp.fill(self.event.pk), 1)
+        self.assertEqual(self.statuses(), (2, ["CANCELLED", "GOING", "GOING", "CANCELLED"]))
+
+    def test_endpoint_is_idempotent(self):
+        client = APIClient()
+        client.force_authenticate(self.members[1])
+        url = f"/events/{self.event.pk}/rsvp/"
+        first = client.post(url)
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(first.json()["status"], "GOING")
+        again = client.post(url)
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(again.json(), first.json())
+        self.assertEqual(again.json()["seats_taken"], 1)
+
+        cancelled = client.delete(url)
+        self.assertEqual((cancelled.json()["status"], cancelled.json()["seats_taken"]), ("CANCELLED", 0))
+        self.assertEqual(client.delete(url).status_code, 200)
+
+        Event.objects.filter(pk=self.event.pk).update(end_datetime=timezone.now() - timedelta(hours=1))
+        self.assertEqual(client.post(url).status_code, 400)
+
+
+@skipUnless(connection.features.has_select_for_update_skip_locked, "needs a database with row locks")
+class RSVPConcurrencyTests(TransactionTestCase):
+    def test_concurrent_rsvps_never_oversell(self):
+        out = io.StringIO()
+        call_command("bench_rsvp", members=120, capacity=40, threads=16, stdout=out)
+        self.assertIn("No seat oversold or lost.", out.getvalue())
+
+
+@override_settings(CHANGE_FEED_LAG_SECONDS=0)
+class ChangeFeedTests(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lahore = Chapter.objects.create(name="Lahore", slug="lahore")
+            self.ada = make_member("ada@example.com", self.lahore)
+            self.article = Article.objects.create(title="Hello", content_body="Body", author=self.ada, chapter=self.lahore)
+        self.client = APIClient()
+
+    def sync(self, cursor=None, **params):
+        if cursor:
+            params["cursor"] = cursor
+        response = self.client.get("/sync/", params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_changes_since_cursor(self):
+        start = self.sync()
+        self.assertTrue(start["reset"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            grace = make_member("grace@example.com", self.lahore)
+            self.article.title = "Hello again"
+            self.article.save()
+            self.article.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.soft_delete()
+            chapter = Chapter.objects.create(name="Karachi", slug="karachi")
+
+        with self.assertNumQueries(4):  # the log page, then one per kind
+            page = self.sync(start["cursor"])
+        self.assertFalse(page["reset"] or page["has_more"])
+        changes = {(change["kind"], change["id"]): change for change in page["changes"]}
+        self.assertEqual(set(changes), {
+            ("profile", str(grace.pk)), ("article", str(self.article.pk)), ("chapter", str(chapter.pk)),
+        })
+        self.assertTrue(changes[("article", str(self.article.pk))]["deleted"])
+        self.assertEqual(changes[("chapter", str(chapter.pk))]["data"]["name"], "Karachi")
+        self.assertEqual(changes[("profile", str(grace.pk))]["data"]["chapter"], str(self.lahore.pk))
+        self.assertEqual(self.sync(page["cursor"])["changes"], [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            grace.profile.is_public = False
+            grace.profile.save(update_fields=["is_public"])
+            bulk.change_role([self.ada.pk], "editor")
+        later = self.sync(page["cursor"], limit=1)
+        self.assertEqual((len(later["changes"]), later["has_more"]), (1, True))
+        rest = self.sync(later["cursor"])
+        self.assertEqual(
+            {(c["id"], c["deleted"]) for c in later["changes"] + rest["changes"]},
+            {(str(grace.pk), True), (str(self.ada.pk), False)},
+        )
+
+    @override_settings(ARCHIVE_BATCH_SIZE=10)
+    def test_archive_and_restore(self):
+        start = self.sync()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.soft_delete()
+            lifecycle.archive(Article, Article.all_objects.filter(pk=self.article.pk), "deleted")
+        archived = self.sync(start["cursor"])
+        self.assertEqual([(c["id"], c["deleted"]) for c in archived["changes"]], [(str(self.article.pk), True)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(lifecycle.restore([self.article.pk]), 1)
+        restored = self.sync(archived["cursor"])["changes"]
+        self.assertEqual([(c["id"], c["deleted"]) for c in restored], [(str(self.article.pk), False)])
+        self.assertEqual(restored[0]["data"]["title"], "Hello")
+
+    def test_deleted_users_and_their_content(self):
+        start = self.sync()
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk.delete_users([self.ada.pk])
+        changes = self.sync(start["cursor"])["changes"]
+        self.assertEqual(
+            {(c["kind"], c["id"], c["deleted"]) for c in changes},
+            {("profile", str(self.ada.pk), True), ("article", str(self.article.pk), True)},
+        )
+
+    def test_compaction_and_expired_cursors(self):
+        start = self.sync()
+        for n in range(3):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.article.title = f"Edit {n}"
+                self.article.save()
+        self.assertEqual(ChangeLogEntry.objects.filter(object_id=self.article.pk).count(), 4)
+        self.assertEqual(changefeed.compact(), 3)
+        self.assertEqual(len(self.sync(start["cursor"])["changes"]), 1)
+
+        expired = ChangeLogEntry.objects.update(created_at=timezone.now() - timedelta(days=40))
+        self.assertEqual(changefeed.compact(), expired)
+        stale = changefeed.encode_cursor(0, timezone.now() - timedelta(days=31))
+        self.assertTrue(self.sync(stale)["reset"])
+        self.assertEqual(self.client.get("/sync/", {"cursor": "nope"}).status_code, 400)
@@ -0,0 +1,176 @@
+# upload_handlers.py
+"""
+Streaming validation for image uploads.
+
+ImageUploadHandler sees each file part chunk by chunk while the request body
+is still being read. It rejects a part as soon as it passes its field's byte
+limit, checks the first bytes against the image signatures we accept instead
+of trusting the client's Content-Type, and computes a SHA-256 of the content
+on the way through. Accepted files are spooled (memory up to
+FILE_UPLOAD_MAX_MEMORY_SIZE, then a temporary file) and carry the digest, so
+store_deduplicated() can save them under a content-addressed name and reuse
+an identical file that is already stored.
+"""
+import hashlib
+import tempfile
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile, StopFutureHandlers, StopUpload
+from django.http.multipartparser import MultiPartParser as DjangoMultiPartParser, MultiPartParserError
+from rest_framework import status
+from rest_framework.exceptions import APIException, ParseError, ValidationError
+from rest_framework.parsers import DataAndFiles, MultiPartParser
+
+# (signature prefix, content type, extension); WebP is checked separately.
+SIGNATURES = [
+    (b"\xff\xd8\xff", "image/jpeg", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png", ".png"),
+    (b"GIF87a", "image/gif", ".gif"),
+    (b"GIF89a", "image/gif", ".gif"),
+]
+SNIFF_BYTES = 12
+
+
+def sniff_image(header):
+    """Returns (content_type, extension) for a known image header, else None."""
+    for signature, content_type, extension in SIGNATURES:
+        if header.startswith(signature):
+            return content_type, extension
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp", ".webp"
+    return None
+
+
+class UploadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = "Upload is too large."
+    default_code = "upload_too_large"
+
+
+class ImageUploadHandler(FileUploadHandler):
+    """
+    Accepts only the file fields listed in `limits` ({field: max bytes}) and
+    only image content. Problems are collected in `errors` for the parser to
+    report once the body has been consumed.
+    """
+
+    def __init__(self, request=None, limits=None):
+        super().__init__(request)
+        self.limits = limits or {}
+        self.errors = {}
+        self.too_large = False
+        self.spool = None
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.limit = self.limits.get(field_name)
+        if self.limit is None:
+            self._reject("Unexpected file field.")
+        if self.content_length is not None and self.content_length > self.limit:
+            self._reject_too_large()
+        self.header = b""
+        self.detected = None
+        self.sha256 = hashlib.sha256()
+        self.spool = tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE, dir=settings.FILE_UPLOAD_TEMP_DIR,
+        )
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > self.limit:
+            self._reject_too_large()
+        if self.detected is None and len(self.header) < SNIFF_BYTES:
+            self.header += raw_data[:SNIFF_BYTES - len(self.header)]
+            if len(self.header) >= SNIFF_BYTES:
+                self._sniff()
+        self.sha256.update(raw_data)
+        self.spool.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if self.detected is None:
+            # Shorter than SNIFF_BYTES; SkipFile cannot be raised from here.
+            self.detected = sniff_image(self.header)
+            if self.detected is None:
+                self.errors[self.field_name] = ["Upload a valid image (JPEG, PNG, GIF or WebP)."]
+                self._discard()
+                return None
+        content_type, extension = self.detected
+        self.spool.seek(0)
+        uploaded = UploadedFile(
+            file=self.spool, name=f"{self.sha256.hexdigest()}{extension}",
+            content_type=content_type, size=file_size,
+        )
+        uploaded.sha256 = self.sha256.hexdigest()
+        self.spool = None
+        return uploaded
+
+    def upload_interrupted(self):
+        self._discard()
+
+    def _sniff(self):
+        self.detected = sniff_image(self.header)
+        if self.detected is None:
+            self._reject("Upload a valid image (JPEG, PNG, GIF or WebP).")
+
+    def _reject(self, message):
+        self.errors[self.field_name] = [message]
+        self._discard()
+        raise SkipFile()
+
+    def _reject_too_large(self):
+        self.errors[self.field_name] = [f"File must be at most {self.limit} bytes."]
+        self.too_large = True
+        self._discard()
+        # Stop storing anything; the rest of the body is read and dropped.
+        raise StopUpload(connection_reset=False)
+
+    def _discard(self):
+        if self.spool is not None:
+            self.spool.close()
+            self.spool = None
+
+
+class ImageMultiPartParser(MultiPartParser):
+    """
+    MultiPartParser whose only upload handler is ImageUploadHandler, with
+    per-field limits from `limits` (default: profile_image up to UPLOAD_MAX_SIZE).
+    """
+    limits = None
+
+    def get_limits(self):
+        return self.limits or {"profile_image": settings.UPLOAD_MAX_SIZE}
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = parser_context["request"]
+        limits = self.get_limits()
+        content_length = int(request.META.get("CONTENT_LENGTH") or 0)
+        if content_length > sum(limits.values()) + settings.DATA_UPLOAD_MAX_MEMORY_SIZE:
+            raise UploadTooLarge("Request body is too large.")
+
+        meta = request.META.copy()
+        meta["CONTENT_TYPE"] = media_type
+        handler = ImageUploadHandler(request, limits)
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        try:
+            data, files = DjangoMultiPartParser(meta, stream, [handler], encoding).parse()
+        except MultiPartParserError as exc:
+            raise ParseError(f"Multipart form parse error - {exc}")
+        if handler.too_large:
+            raise UploadTooLarge(handler.errors)
+        if handler.errors:
+            raise ValidationError(handler.errors)
+        return DataAndFiles(data, files)
+
+
+def store_deduplicated(uploaded, prefix="profile_images/", storage=default_storage):
+    """
+    Saves a file from ImageUploadHandler as prefix + <sha256><ext>, or returns
+    that name without writing if identical content is already stored.
+    """
+    name = f"{prefix}{uploaded.name}"
+    if storage.exists(name):
+        return name
+    return storage.save(name, uploaded)
@@ -1,36 +1,49 @@
 # urls.py
 from django.urls import path
 from .views import *
-from django.conf import settings
-from django.conf.urls.static import static
 
 urlpatterns = [
     path('signup/', SignupView.as_view(), name='signup'),
     path('login/', LoginView.as_view(), name='login'),
     path("user/all/", AllUsersView.as_view(), name="all-users"),
     path("user/delete/<uuid:user_id>/", DeleteUserView.as_view(), name="delete-user"),
+    path("user/bulk/", BulkUserView.as_view(), name="bulk-user"),
+    path("user/bulk/jobs/<uuid:pk>/", BulkJobView.as_view(), name="bulk-user-job"),
     path('user/update/<uuid:id>/', UpdateUserView.as_view()),
     path('user/me/', CurrentUserView.as_view(), name='current-user'),
+    path('user/me/recommendations/', RecommendationsView.as_view(), name='user-recommendations'),
     path('user/update/me/', CurrentUserUpdateView.as_view(), name='user-update-me'),
     path("logout/", LogoutView.as_view(), name="logout"),
     path('chapters/', ChapterListView.as_view(), name='chapter-list'),
     path('search/', UserSearchView.as_view(), name='user-search'),
+    path('skills/autocomplete/', TaxonomyAutocompleteView.as_view(kind='skill'), name='skill-autocomplete'),
+    path('industries/autocomplete/', TaxonomyAutocompleteView.as_view(kind='industry'), name='industry-autocomplete'),
     path('articles/', ArticleListView.as_view(), name='article-list'),
+    path('tags/', TagCloudView.as_view(), name='tag-cloud'),
+    path('sync/', SyncView.as_view(), name='sync'),
     path('articles/<slug:slug>/', ArticleWithRelatedView.as_view(), name='article-detail'),
     path('create/articles/', AdminArticleCreateView.as_view()),
     path('update/articles/<uuid:pk>/', AdminArticleDetailView.as_view()),
     path('events/create/', CreateEventView.as_view(), name='create-event'),
     path('events/', EventListAPIView.as_view(), name='event-list'),
+    path('events/calendar/', EventCalendarView.as_view(), name='event-calendar'),
+    path('events/feed.ics', EventFeedView.as_view(), name='event-feed'),
+    path('chapters/<str:chapter_id>/events.ics', EventFeedView.as_view(), name='chapter-event-feed'),
     # path('events/<uuid:pk>/', EventDetailView.as_view(), name='event-detail'),
     # path('events/<slug:slug>/', EventDetailBySlug.as_view(), name='event-detail-by-slug'),
     path('articles/admin/<uuid:pk>/', AdminArticleView.as_view()),
+    path('content/restore/', RestoreContentView.as_view(), name='content-restore'),
     path('events/<uuid:pk>/', EventRetrieveView.as_view(), name='event-detail-pk'),
+    path('events/<uuid:pk>/rsvp/', EventRSVPView.as_view(), name='event-rsvp'),
+    path('events/<uuid:pk>/attendees/', EventAttendeesView.as_view(), name='event-attendees'),
     path('events/slug/<slug:slug>/', EventRetrieveView.as_view(), name='event-detail-slug'),
     path('editor-dashboard/', EditorDashboardView.as_view(), name='editor-dashboard'),
     path('subscribe/', NewsletterSubscribeView.as_view(), name='newsletter-subscribe'),
+    path('subscribe/import/', NewsletterImportView.as_view(), name='newsletter-import'),
+    path('uploads/presign/', UploadPresignView.as_view(), name='upload-presign'),
+    path('uploads/local/<str:target>/', LocalUploadView.as_view(), name='upload-local'),
     path('editor/articles/', EditorArticleListView.as_view(), name='editor-articles'),
     path('editor/events/', EditorEventListView.as_view(), name='editor-events'),
     
 ]
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Media (and collected static files) are served by files.FileServingMiddleware.
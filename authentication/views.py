@@ -3,25 +3,109 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, generics, permissions
 from .serializers import *
-from django.contrib.auth import login
+from django.contrib.auth.models import update_last_login
 from django.shortcuts import get_object_or_404
 from rest_framework.permissions import IsAdminUser,IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.permissions import AllowAny
-from django.db.models import Q
+from django.db.models import Count, Q
 from rest_framework.permissions import AllowAny
 from authentication.models import User
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.parsers import MultiPartParser, FormParser,JSONParser 
+from .fastpath import FastListMixin, compile_serializer
+from .upload_handlers import ImageMultiPartParser
+from datetime import datetime, time, timedelta
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.urls import reverse
+from django.views import View
+from . import bulk, changefeed, chapter_cache, geo, ics, lifecycle, newsletter, rsvp, storage as uploads, tags, taxonomy
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.storage import default_storage
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
+from django.conf import settings
 
 class NewsletterSubscribeView(APIView):
     def post(self, request):
+        if getattr(settings, "NEWSLETTER_BUFFERED_INGEST", False):
+            email = newsletter.normalize(request.data.get("email"))
+            if email is None:
+                return Response({"email": ["Enter a valid email address."]}, status=status.HTTP_400_BAD_REQUEST)
+            newsletter.enqueue(email)
+            return Response({"message": "Subscribed successfully."}, status=status.HTTP_202_ACCEPTED)
+
         serializer = SubscriptionSerializer(data=request.data)
         if serializer.is_valid():
             serializer.save()
             return Response({"message": "Subscribed successfully."}, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+class NewsletterImportView(APIView):
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"file": ["Upload a CSV file."]}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            stats = newsletter.import_csv(upload.file)
+        except UnicodeDecodeError:
+            return Response({"file": ["File must be UTF-8 encoded CSV."]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(stats, status=status.HTTP_200_OK)
+
+
+class UploadPresignView(APIView):
+    """Issues a direct-to-storage upload target for a profile image."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = PresignUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        target = uploads.presign_upload(
+            request.user, serializer.validated_data["content_type"], serializer.validated_data["size"], request,
+        )
+        return Response(target, status=status.HTTP_201_CREATED)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class LocalUploadView(View):
+    """
+    Receiver for presigned uploads when files are stored locally. The signed
+    URL is the credential, as with an S3 presigned request; the body is
+    streamed to storage in chunks. Clients should attach the `upload` token
+    from this response, which names the file as actually stored.
+    """
+
+    def put(self, request, target):
+        try:
+            target = uploads.load_target(target)
+        except DjangoValidationError as exc:
+            return JsonResponse({"detail": exc.messages[0]}, status=status.HTTP_403_FORBIDDEN)
+        if request.content_type != target["type"]:
+            return JsonResponse({"detail": f"Content-Type must be {target['type']}."}, status=status.HTTP_400_BAD_REQUEST)
+        if default_storage.exists(target["key"]):
+            return JsonResponse({"detail": "This upload URL has already been used."}, status=status.HTTP_409_CONFLICT)
+        try:
+            key, size = uploads.save_stream(target["key"], request, target["size"])
+        except DjangoValidationError as exc:
+            return JsonResponse({"detail": exc.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        # A concurrent PUT may have taken the key first; the token must name
+        # the file this request actually stored.
+        return JsonResponse(
+            {"key": key, "size": size, "upload": uploads.upload_token(target["user"], key)},
+            status=status.HTTP_201_CREATED,
+        )
+
+    
 class EditorDashboardView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -37,8 +121,9 @@ class EditorDashboardView(APIView):
         articles = Article.objects.filter(chapter=user.chapter)
         events = Event.objects.filter(chapter=user.chapter)
 
+        card = UserCardProjection.from_request(request)
         return Response({
-            "users": UserListSerializer(users, many=True).data,
+            "users": card.serialize(users) if card else UserListSerializer(users, many=True).data,
             "articles": ArticleSerializer(articles, many=True).data,
             "events": EventSerializer(events, many=True).data,
         })
@@ -62,14 +147,69 @@ class EventRetrieveView(APIView):
         serializer = EventAllSerializer(event, data=request.data)
         if serializer.is_valid():
             serializer.save()
+            # A raised capacity seats the waitlist.
+            if rsvp.fill(event.pk):
+                event.refresh_from_db(fields=["seats_taken"])
+                return Response(EventAllSerializer(event).data)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def delete(self, request, pk):
         event = get_object_or_404(Event, pk=pk)
-        event.delete()
+        event.soft_delete()
         return Response({"detail": "Event deleted successfully."}, status=status.HTTP_204_NO_CONTENT)
 
+
+class EventRSVPView(APIView):
+    """
+    The current user's RSVP to an event. POST is idempotent: it returns the
+    active RSVP (200) or makes one, going or waitlisted (201). DELETE cancels
+    it, passing a held seat to the first member on the waitlist.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def respond(self, event, attendance, code=status.HTTP_200_OK):
+        event.refresh_from_db(fields=["capacity", "seats_taken"])
+        attendance.event = event
+        return Response(EventRSVPSerializer(attendance).data, status=code)
+
+    def get(self, request, pk):
+        event = get_object_or_404(Event, pk=pk)
+        attendance = get_object_or_404(EventRSVP, event=event, user=request.user)
+        return self.respond(event, attendance)
+
+    def post(self, request, pk):
+        event = get_object_or_404(Event, pk=pk)
+        if event.end_datetime < timezone.now():
+            return Response({"detail": "This event has ended."}, status=status.HTTP_400_BAD_REQUEST)
+        attendance, created = rsvp.request(event, request.user)
+        return self.respond(event, attendance, status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+    def delete(self, request, pk):
+        event = get_object_or_404(Event, pk=pk)
+        attendance = rsvp.cancel(event, request.user)
+        if attendance is None:
+            raise Http404("No RSVP for this event.")
+        return self.respond(event, attendance)
+
+
+class EventAttendeesView(APIView):
+    """Going and waitlisted members of an event as profile cards, in seat/waitlist order."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, pk):
+        event = get_object_or_404(Event, pk=pk)
+        card = UserCardProjection.from_request(request) or UserCardProjection()
+        rows = list(
+            EventRSVP.objects.filter(event=event, status__in=[rsvp.GOING, rsvp.WAITLISTED])
+            .order_by("status", "requested_at", "pk")
+            .values_list("status", *[f"user__{card.FIELDS[name]}" for name in card.fields])
+        )
+        data = card.to_dicts(row[1:] for row in rows)
+        for item, row in zip(data, rows):
+            item["rsvp_status"] = row[0]
+        return Response(data)
+
 # class EventDetailView(APIView):
 #     def get(self, request, pk):
 #         return Response({"message": "EventDetailView GET reached"})
@@ -102,11 +242,201 @@ class EditorEventListView(generics.ListAPIView):
             return Event.objects.filter(chapter=user.chapter)
         return Event.objects.none()
     
-class EventListAPIView(generics.ListAPIView):
-    queryset = Event.objects.all().order_by('start_datetime')
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _parse_calendar_bound(value, name):
+    """
+    Accepts an ISO datetime or a plain date. Returns (datetime, is_date) where
+    a plain date maps to midnight in the current timezone.
+    """
+    try:
+        # Both parsers raise ValueError for well-formed but impossible values.
+        parsed = parse_datetime(value)
+        day = None if parsed is not None else parse_date(value)
+    except ValueError:
+        parsed = day = None
+    if parsed is not None:
+        return (timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed), False
+    if day is None:
+        raise ValidationError({name: "Expected an ISO date or datetime."})
+    return _start_of_day(day), True
+
+
+def filter_events(queryset, params):
+    """
+    Calendar filters shared by the event list and calendar endpoints.
+
+    ?from= / ?to= bound start_datetime (to is exclusive; a plain date means
+    the whole day), ?when=upcoming|this_week are shortcuts, and ?chapter= /
+    ?category= narrow the range so the (chapter, start_datetime) and
+    (category, start_datetime) indexes are used.
+    """
+    when = params.get("when", "").strip().lower()
+    start = params.get("from", "").strip()
+    end = params.get("to", "").strip()
+    chapter = params.get("chapter", "").strip()
+    category = params.get("category", "").strip()
+
+    if when == "upcoming":
+        queryset = queryset.filter(start_datetime__gte=timezone.now())
+    elif when == "this_week":
+        today = timezone.localdate()
+        monday = _start_of_day(today - timedelta(days=today.weekday()))
+        queryset = queryset.filter(start_datetime__gte=monday, start_datetime__lt=monday + timedelta(days=7))
+    elif when:
+        raise ValidationError({"when": "Expected 'upcoming' or 'this_week'."})
+
+    if start:
+        queryset = queryset.filter(start_datetime__gte=_parse_calendar_bound(start, "from")[0])
+    if end:
+        bound, is_date = _parse_calendar_bound(end, "to")
+        if is_date:
+            bound += timedelta(days=1)
+        queryset = queryset.filter(start_datetime__lt=bound)
+
+    if chapter:
+        chapter_id = chapter_cache.parse_id(chapter)
+        if chapter_id is None:
+            raise ValidationError({"chapter": "Expected a chapter id."})
+        queryset = queryset.filter(chapter_id=chapter_id)
+    if category:
+        queryset = queryset.filter(category=category)
+    return queryset
+
+
+def _parse_point(value):
+    """(lat, lon) from "<lat>,<lon>" or a place name in the gazetteer."""
+    parts = value.split(",")
+    if len(parts) == 2:
+        try:
+            lat, lon = float(parts[0]), float(parts[1])
+        except ValueError:
+            pass
+        else:
+            if -90 <= lat <= 90 and -180 <= lon <= 180:
+                return lat, lon
+            raise ValidationError({"near": "Latitude or longitude out of range."})
+    point = geo.geocode(value)
+    if point is None:
+        raise ValidationError({"near": "Unknown place; send <lat>,<lon> instead."})
+    return point
+
+
+def filter_nearby(queryset, params, prefix=""):
+    """
+    Geo filters for rows with coordinates at `prefix`latitude/longitude.
+
+    ?near=<lat>,<lon> (or a place name) with ?radius_km= (default 50, at most
+    500) keeps rows that close, nearest first, annotated with distance_km.
+    ?bbox=<min_lat>,<min_lon>,<max_lat>,<max_lon> keeps rows inside the box.
+    Returns (queryset, whether distance_km was added).
+    """
+    near = params.get("near", "").strip()
+    bbox = params.get("bbox", "").strip()
+
+    if bbox:
+        try:
+            box = [float(part) for part in bbox.split(",")]
+        except ValueError:
+            box = []
+        if len(box) != 4 or box[0] > box[2] or box[1] > box[3]:
+            raise ValidationError({"bbox": "Expected <min_lat>,<min_lon>,<max_lat>,<max_lon>."})
+        queryset = geo.within(queryset, box, prefix)
+
+    if not near:
+        return queryset, False
+    try:
+        radius = float(params.get("radius_km", geo.DEFAULT_RADIUS_KM))
+    except ValueError:
+        radius = 0
+    if not 0 < radius <= geo.MAX_RADIUS_KM:
+        raise ValidationError({"radius_km": f"Expected a distance up to {geo.MAX_RADIUS_KM} km."})
+    return geo.nearby(queryset, *_parse_point(near), radius, prefix), True
+
+
+class EventListAPIView(FastListMixin, generics.ListAPIView):
     serializer_class = EventSerializer
     permission_classes = [permissions.AllowAny]  
 
+    def get_queryset(self):
+        queryset = filter_events(Event.objects.all(), self.request.query_params)
+        queryset, self.by_distance = filter_nearby(queryset, self.request.query_params)
+        return queryset.order_by('distance_km', 'start_datetime') if self.by_distance else queryset.order_by('start_datetime')
+
+    def get_extra_values(self):
+        return ('distance_km',) if self.by_distance else ()
+
+
+class EventCalendarView(APIView):
+    """Per-day event counts for one month (?month=YYYY-MM), in a single GROUP BY."""
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        month = request.query_params.get("month", "").strip()
+        try:
+            first = parse_date(f"{month}-01") if month else timezone.localdate().replace(day=1)
+        except ValueError:  # e.g. 2024-13
+            first = None
+        if first is None:
+            return Response({"month": "Expected YYYY-MM."}, status=status.HTTP_400_BAD_REQUEST)
+        next_month = (first + timedelta(days=32)).replace(day=1)
+
+        start, end = _start_of_day(first), _start_of_day(next_month)
+        params = {k: v for k, v in request.query_params.items() if k in ("chapter", "category")}
+        buckets = (
+            filter_events(Event.objects.all(), params)
+            .filter(start_datetime__gte=start, start_datetime__lt=end)
+            .annotate(day=TruncDate("start_datetime"))
+            .values("day")
+            .annotate(count=Count("id"))
+            .order_by("day")
+        )
+        days = [{"date": row["day"], "count": row["count"]} for row in buckets]
+        return Response({
+            "month": first.strftime("%Y-%m"),
+            "total": sum(day["count"] for day in days),
+            "days": days,
+        })
+
+class EventFeedView(View):
+    """
+    Subscribable .ics feed of all events, or of one chapter's events.
+
+    Supports conditional GET (ETag / Last-Modified) so polling clients mostly
+    get a 304 after one aggregate query; otherwise the body comes from the
+    cache, or is streamed from the database and cached for the next poll.
+    """
+    content_type = "text/calendar; charset=utf-8"
+
+    def get(self, request, chapter_id=None):
+        name = "Linq events"
+        if chapter_id is not None:
+            chapter = chapter_cache.get(chapter_id)
+            if chapter is None:
+                raise Http404("Chapter not found.")
+            name = f"Linq {chapter.name} events"
+
+        etag, last_modified = ics.feed_version(chapter_id)
+        quoted_etag = f'"{etag}"'
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+        not_modified = get_conditional_response(request, etag=quoted_etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        body = cache.get(ics.cache_key(chapter_id, etag))
+        if body is not None:
+            response = HttpResponse(body, content_type=self.content_type)
+        else:
+            response = StreamingHttpResponse(ics.stream_feed(chapter_id, name, etag), content_type=self.content_type)
+        response["ETag"] = quoted_etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        response["Cache-Control"] = "public, max-age=300"
+        return response
+
+
 class CreateEventView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -128,7 +458,7 @@ class AdminArticleView(generics.RetrieveUpdateDestroyAPIView):
         serializer.save()
 
     def perform_destroy(self, instance):
-        instance.delete()
+        instance.soft_delete()
 
 class AdminArticleCreateView(APIView):
     permission_classes = [IsAuthenticated]
@@ -156,7 +486,7 @@ class AdminArticleDetailView(APIView):
 
     def delete(self, request, pk):
         article = get_object_or_404(Article, pk=pk)
-        article.delete()
+        article.soft_delete()
         return Response({"detail": "Article deleted"}, status=status.HTTP_204_NO_CONTENT)
 
 class ArticlePagination(PageNumberPagination):
@@ -164,8 +494,8 @@ class ArticlePagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 100
 
-class ArticleListView(generics.ListAPIView):
-    serializer_class = ArticleSerializer
+class ArticleListView(FastListMixin, generics.ListAPIView):
+    serializer_class = ArticleListSerializer
     permission_classes = [permissions.AllowAny]
     pagination_class = ArticlePagination  # ✅ Add this
 
@@ -180,8 +510,11 @@ class ArticleListView(generics.ListAPIView):
         if search:
             queryset = queryset.filter(
                 Q(title__icontains=search) |
-                Q(tags__icontains=search)
+                Q(pk__in=ArticleTag.objects.filter(tag__name=tags.normalize(search)).values("article_id"))
             )
+        queryset = tags.filter_articles(
+            queryset, request.query_params.get("tag"), request.query_params.get("tag_prefix"),
+        )
 
         if category and category.lower() != "all categories":
             queryset = queryset.filter(category__iexact=category)
@@ -189,7 +522,7 @@ class ArticleListView(generics.ListAPIView):
         if sort_by == "popular":
             queryset = queryset.order_by("-views")  # Ensure `views` exists
         elif sort_by == "read-time":
-            queryset = queryset.order_by("read_time")  # Ensure `read_time` exists
+            queryset = queryset.order_by("word_count", "-created_at")
         else:
             queryset = queryset.order_by("-created_at")
 
@@ -199,6 +532,38 @@ class ArticleListView(generics.ListAPIView):
 #     serializer_class = ArticleSerializer
 #     permission_classes = [permissions.AllowAny] 
 
+class SyncView(APIView):
+    """
+    Changes to articles, events, chapters and public profiles since ?cursor=
+    (see changefeed.py). Without a cursor, or with one too old to serve, the
+    response has reset=true: load everything, then poll from its cursor.
+    Follow has_more=true with the returned cursor right away.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params.get("limit", 500)), 1), 1000)
+        except ValueError:
+            return Response({"limit": ["A valid integer is required."]}, status=status.HTTP_400_BAD_REQUEST)
+        cursor = request.query_params.get("cursor", "").strip()
+        if cursor and changefeed.decode_cursor(cursor) is None:
+            return Response({"cursor": ["Invalid cursor."]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(changefeed.read(cursor, limit))
+
+
+class TagCloudView(APIView):
+    """Most used tags with their live article counts (?limit=, default 50)."""
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params.get("limit", 50)), 1), tags.CLOUD_SIZE)
+        except ValueError:
+            return Response({"limit": ["A valid integer is required."]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(tags.cloud(limit))
+
+
 class ArticleWithRelatedView(APIView):
     permission_classes = [permissions.AllowAny]
 
@@ -215,7 +580,7 @@ class ArticleWithRelatedView(APIView):
             category=article.category
         ).exclude(id=article.id)[:5]
 
-        related_data = ArticleSerializer(related_qs, many=True).data
+        related_data = compile_serializer(ArticleListSerializer).serialize(related_qs)
 
         return Response({
             "article": article_data,
@@ -242,14 +607,26 @@ class UserSearchView(APIView):
                 Q(profile__title__icontains=search) |
                 Q(profile__company_name__icontains=search) |
                 Q(profile__bio__icontains=search) |
-                Q(profile__skills__icontains=search)  # Optional: add if skills are a string
+                Q(profile__in=ProfileSkill.objects.filter(skill__key=taxonomy.skill_key(search)).values("profile_id"))
             )
 
         if industry:
-            queryset = queryset.filter(profile__industry__iexact=industry)
+            queryset = queryset.filter(profile__industry_ref__key=taxonomy.industry_key(industry))
+
+        # ?industry_id=<id>[,<id>]: any of them. ?skill=<id>&skill=<id>: every one.
+        industry_ids = taxonomy.parse_ids(request.query_params.getlist('industry_id'))
+        skill_ids = taxonomy.parse_ids(request.query_params.getlist('skill'))
+        if industry_ids is None or skill_ids is None:
+            queryset = queryset.none()
+        else:
+            if industry_ids:
+                queryset = queryset.filter(profile__industry_ref_id__in=industry_ids)
+            for skill_id in skill_ids:
+                queryset = queryset.filter(profile__in=ProfileSkill.objects.filter(skill_id=skill_id).values("profile_id"))
 
         if location:
-            queryset = queryset.filter(chapter_id=location)
+            chapter_id = chapter_cache.parse_id(location)
+            queryset = queryset.filter(chapter_id=chapter_id) if chapter_id else queryset.none()
 
         if experience and experience.lower() != "all levels":
             queryset = queryset.filter(profile__experience_level__iexact=experience)
@@ -257,10 +634,24 @@ class UserSearchView(APIView):
         if verified:
             queryset = queryset.filter(is_verified=True)
 
-        queryset = queryset.distinct()
-
-        serializer = self.serializer_class(queryset, many=True)
-        return Response(serializer.data)
+        queryset, by_distance = filter_nearby(queryset.distinct(), request.query_params, "profile__")
+
+        card = UserCardProjection.from_request(request)
+        if card and by_distance:
+            rows = list(queryset.values_list(*[card.FIELDS[name] for name in card.fields], "distance_km"))
+            data = card.to_dicts(row[:-1] for row in rows)
+            for item, row in zip(data, rows):
+                item["distance_km"] = row[-1]
+            return Response(data)
+        if card:
+            return Response(card.serialize(queryset))
+
+        users = list(queryset)
+        data = self.serializer_class(users, many=True).data
+        if by_distance:
+            for item, user in zip(data, users):
+                item["distance_km"] = user.distance_km
+        return Response(data)
 # class UserSearchView(APIView):
 #     permission_classes = [AllowAny]
 #     serializer_class = UserListSerializer
@@ -293,14 +684,36 @@ class UserSearchView(APIView):
 #         return Response(serializer.data)
     
     
+class TaxonomyAutocompleteView(APIView):
+    """Skill or industry suggestions for ?q= (word prefix), most used first."""
+    permission_classes = [AllowAny]
+    kind = None
+
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), taxonomy.MAX_SUGGESTIONS)
+        except ValueError:
+            return Response({"limit": ["A valid integer is required."]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(taxonomy.autocomplete(self.kind, request.query_params.get("q", ""), limit))
+
+
 class ChapterListView(generics.ListAPIView):
-    queryset = Chapter.objects.all()
-    serializer_class = ChapterSerializer
     permission_classes = [AllowAny]  # Or customize for auth
 
+    def with_stats(self):
+        return self.request.query_params.get("with_stats", "").strip().lower() in ("1", "true")
+
+    def get_queryset(self):
+        if self.with_stats():
+            return Chapter.objects.order_by("name").select_related("stats")
+        return chapter_cache.all_chapters()
+
+    def get_serializer_class(self):
+        return ChapterWithStatsSerializer if self.with_stats() else ChapterSerializer
+
 
 class SignupView(APIView):
-    parser_classes = [MultiPartParser, FormParser,JSONParser ]
+    parser_classes = [ImageMultiPartParser, FormParser,JSONParser ]
     
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
@@ -320,7 +733,8 @@ class LoginView(APIView):
             refresh = RefreshToken.for_user(user)
             access_token = str(refresh.access_token)
 
-            login(request, user)  # optional
+            # JWTs only: production may run without sessions, so no login().
+            update_last_login(None, user)
 
             return Response({
                 "message": "Login successful",
@@ -373,9 +787,14 @@ class AllUsersView(APIView):
             users = users.filter(query)
             
         paginator = AllUsersPagination()
-        paginated_users = paginator.paginate_queryset(users, request)
-        serializer = UserListSerializer(paginated_users, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        card = UserCardProjection.from_request(request)
+        if card:
+            rows = paginator.paginate_queryset(card.project(users), request)
+            return paginator.get_paginated_response(card.to_dicts(rows))
+
+        compiled = compile_serializer(UserListSerializer)
+        paginated_users = paginator.paginate_queryset(compiled.values(users), request)
+        return paginator.get_paginated_response(compiled.to_representation(paginated_users))
 # class AllUsersView(APIView):
 #     permission_classes = [AllowAny]  # Public access
 
@@ -390,10 +809,51 @@ class DeleteUserView(APIView):
 
     def delete(self, request, user_id):
         user = get_object_or_404(User, id=user_id)
-        user.delete()
+        bulk.delete_users([user.pk])
         return Response({"message": "User deleted successfully."}, status=status.HTTP_204_NO_CONTENT)
     
 
+class BulkUserView(APIView):
+    """
+    Role change, chapter move or delete for many users at once. Large batches
+    (or "background": true) run as a BulkJob; poll its URL for progress.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        serializer = BulkUserActionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        action, ids = serializer.validated_data["action"], serializer.validated_data["ids"]
+        if action == "delete" and request.user.pk in ids:
+            return Response({"ids": ["You cannot delete your own account."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        if serializer.validated_data["background"] or len(ids) > bulk.async_threshold():
+            job = bulk.start_job(action, ids, serializer.get_params(), created_by=request.user)
+            response = Response(BulkJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+            response["Location"] = reverse("bulk-user-job", args=[job.pk])
+            return response
+
+        affected = bulk.run(action, ids, serializer.get_params())
+        return Response({"action": action, "requested": len(ids), "affected": affected}, status=status.HTTP_200_OK)
+
+
+class RestoreContentView(APIView):
+    """Restores soft-deleted or archived articles and events by id."""
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        serializer = RestoreContentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        restored = lifecycle.restore(serializer.validated_data["ids"])
+        return Response({"restored": restored}, status=status.HTTP_200_OK)
+
+
+class BulkJobView(generics.RetrieveAPIView):
+    permission_classes = [IsAdminUser]
+    queryset = BulkJob.objects.all()
+    serializer_class = BulkJobSerializer
+
+
 class UpdateUserView(APIView):
     permission_classes = [IsAdminUser]
 
@@ -406,7 +866,15 @@ class UpdateUserView(APIView):
         user.first_name = request.data.get("first_name", user.first_name)
         user.last_name = request.data.get("last_name", user.last_name)
         user.email = request.data.get("email", user.email)
-        user.chapter_id = request.data.get("chapter", user.chapter_id)
+        if "chapter" in request.data:
+            # null (or "" from a form) takes the user out of their chapter.
+            if request.data["chapter"] in (None, ""):
+                user.chapter_id = None
+            else:
+                chapter = chapter_cache.get(request.data["chapter"])
+                if chapter is None:
+                    return Response({"chapter": "Chapter not found."}, status=status.HTTP_400_BAD_REQUEST)
+                user.chapter_id = chapter.pk
         user.role=request.data.get("role", user.role)
         if(user.role == "admin" or user.role == "editor"):
             print("user  is a suepr user")
@@ -441,6 +909,26 @@ class UpdateUserView(APIView):
 
         return Response({"message": "User updated successfully."}, status=200)
 
+class RecommendationsView(APIView):
+    """
+    "People you should meet" for the current user, best match first, as
+    profile cards plus a similarity score (?fields= picks card fields).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        card = UserCardProjection.from_request(request) or UserCardProjection()
+        rows = list(
+            Recommendation.objects.filter(user=request.user, recommended__profile__is_public=True)
+            .order_by("rank")
+            .values_list("score", *[f"recommended__{card.FIELDS[name]}" for name in card.fields])
+        )
+        data = card.to_dicts(row[1:] for row in rows)
+        for item, row in zip(data, rows):
+            item["score"] = round(row[0], 4)
+        return Response(data)
+
+
 class CurrentUserView(APIView):
     permission_classes = [IsAuthenticated]
     
@@ -551,6 +1039,13 @@ class CurrentUserUpdateView(APIView):
     def put(self, request):
         user = request.user
 
+        upload_key = None
+        if "profile_image" not in request.FILES and request.data.get("profile_image_upload"):
+            try:
+                upload_key = uploads.confirm_upload(user, request.data["profile_image_upload"])
+            except DjangoValidationError as exc:
+                return Response({"profile_image_upload": exc.messages}, status=status.HTTP_400_BAD_REQUEST)
+
         # Update basic user fields
         user.first_name = request.data.get("first_name", user.first_name)
         user.last_name = request.data.get("last_name", user.last_name)
@@ -566,9 +1061,11 @@ class CurrentUserUpdateView(APIView):
         profile.location = request.data.get("location", profile.location)
         profile.experience = request.data.get("experience", profile.experience)
 
-        # Handle profile_image
+        # Handle profile_image, uploaded here or directly to storage
         if "profile_image" in request.FILES:
             profile.profile_image = request.FILES["profile_image"]
+        elif upload_key:
+            profile.profile_image.name = upload_key
 
         # Parse JSON fields
         try:
@@ -0,0 +1,132 @@
+"""
+Gunicorn configuration for backend project.
+
+Used as ``gunicorn -c python:backend.server``. Worker and thread counts are
+derived from the CPUs and memory actually available to the container (cgroup
+limits first, then the host), and every value can be pinned with an
+environment variable:
+
+    PORT                     port to bind (default 8000)
+    WEB_WORKER_CLASS         sync | gthread | asgi (default gthread; asgi runs uvicorn-worker)
+    WEB_CONCURRENCY          worker processes (default: autotuned)
+    WEB_THREADS              threads per gthread worker (default 4)
+    WEB_WORKER_MEMORY_MB     expected resident size of one worker (default 160)
+    WEB_TIMEOUT              worker timeout in seconds (default 30)
+    WEB_MAX_REQUESTS         recycle a worker after this many requests (default 1000)
+    WEB_MAX_REQUESTS_JITTER  random spread added to WEB_MAX_REQUESTS (default 100)
+"""
+import os
+
+WORKER_CLASSES = {
+    "sync": "sync",
+    "gthread": "gthread",
+    "asgi": "uvicorn_worker.UvicornWorker",
+}
+
+# Share of the memory limit that workers may use; the rest is left for the
+# master process, page cache and spikes.
+MEMORY_HEADROOM = 0.75
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cpu_count():
+    """CPUs available to this process, honouring affinity and cgroup quotas."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    quota = _read("/sys/fs/cgroup/cpu.max")  # cgroup v2: "<quota> <period>"
+    if quota:
+        limit, period = quota.split()
+        if limit != "max":
+            cpus = min(cpus, int(limit) / int(period))
+    else:  # cgroup v1
+        limit = _read("/sys/fs/cgroup/cpu/cpu.cfs_quota_us")
+        period = _read("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+        if limit and period and int(limit) > 0:
+            cpus = min(cpus, int(limit) / int(period))
+    return max(1, round(cpus))
+
+
+def memory_mb():
+    """Memory limit for this container in MiB, or None if it cannot be found."""
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        value = _read(path)
+        # cgroup v1 reports "no limit" as a huge number close to 2**63.
+        if value and value != "max" and int(value) < 2 ** 60:
+            return int(value) // 2 ** 20
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // 2 ** 20
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def worker_count(worker_class, cpus, memory=None, worker_memory=160):
+    """
+    sync workers handle one request at a time, so they get the classic
+    2 * CPUs + 1; gthread and ASGI workers overlap I/O themselves and need
+    only one process per CPU plus one. Either way the count is capped so
+    all workers fit in the memory budget.
+    """
+    if worker_class == "sync":
+        workers = 2 * cpus + 1
+    else:
+        workers = cpus + 1
+    if memory:
+        workers = min(workers, int(memory * MEMORY_HEADROOM) // worker_memory)
+    return max(1, workers)
+
+
+def thread_count(worker_class, default=4):
+    return default if worker_class == "gthread" else 1
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+_kind = os.getenv("WEB_WORKER_CLASS", "gthread")
+if _kind not in WORKER_CLASSES:
+    raise ValueError(f"WEB_WORKER_CLASS must be one of {', '.join(WORKER_CLASSES)}, not {_kind!r}")
+
+wsgi_app = "backend.asgi:application" if _kind == "asgi" else "backend.wsgi:application"
+worker_class = WORKER_CLASSES[_kind]
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = _env_int("WEB_CONCURRENCY", None) or worker_count(
+    _kind, cpu_count(), memory_mb(), _env_int("WEB_WORKER_MEMORY_MB", 160)
+)
+threads = _env_int("WEB_THREADS", None) or thread_count(_kind)
+
+# Import Django and the project once in the master; workers are forked with
+# it already loaded (copy-on-write), which speeds up boots and recycling.
+preload_app = True
+
+# Recycle workers periodically so slow leaks cannot grow unbounded; the
+# jitter keeps all workers from restarting at the same moment.
+max_requests = _env_int("WEB_MAX_REQUESTS", 1000)
+max_requests_jitter = _env_int("WEB_MAX_REQUESTS_JITTER", 100)
+
+timeout = _env_int("WEB_TIMEOUT", 30)
+graceful_timeout = timeout
+keepalive = 5
+accesslog = "-"
+
+# The heartbeat file is touched on every request; keep it off overlay disks.
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+
+def post_fork(server, worker):
+    # Nothing opened in the master before the fork may be shared by workers.
+    from django.db import connections
+
+    connections.close_all()
@@ -0,0 +1,12 @@
+"""
+Settings package for backend project.
+
+DJANGO_ENV selects the layer: "production" loads prod.py, anything else
+(the default) loads dev.py. Both build on base.py.
+"""
+import os
+
+if os.getenv('DJANGO_ENV', 'development') == 'production':
+    from .prod import *  # noqa: F401,F403
+else:
+    from .dev import *  # noqa: F401,F403
@@ -0,0 +1,13 @@
+"""Local development settings: DEBUG on, in-process cache, media served by Django."""
+from .base import *  # noqa: F401,F403
+from .base import env_bool
+
+DEBUG = env_bool('DJANGO_DEBUG', True)
+
+ALLOWED_HOSTS = ALLOWED_HOSTS + ['127.0.0.1']
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
@@ -0,0 +1,80 @@
+"""
+Production settings.
+
+DEBUG is off (so connection.queries no longer records every statement),
+templates are compiled once per process, database connections are kept open
+between requests, and the cache is shared by all workers. The API
+authenticates with JWTs, so the session, message and auth middleware only run
+when the Django admin is enabled with DJANGO_ADMIN_ENABLED.
+"""
+import os
+
+from .base import *  # noqa: F401,F403
+from .base import BASE_DIR, DATABASES, INSTALLED_APPS, MIDDLEWARE, REST_FRAMEWORK, STORAGES, TEMPLATES, env_bool
+
+DEBUG = env_bool('DJANGO_DEBUG')
+
+SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+
+ADMIN_ENABLED = env_bool('DJANGO_ADMIN_ENABLED')
+
+if not ADMIN_ENABLED:
+    INSTALLED_APPS = [
+        app for app in INSTALLED_APPS
+        if app not in ('django.contrib.admin', 'django.contrib.sessions', 'django.contrib.messages')
+    ]
+    MIDDLEWARE = [
+        m for m in MIDDLEWARE if m not in (
+            'django.contrib.sessions.middleware.SessionMiddleware',
+            'django.contrib.auth.middleware.AuthenticationMiddleware',
+            'django.contrib.messages.middleware.MessageMiddleware',
+        )
+    ]
+
+# Compress responses (JSON lists, iCalendar feeds) below FileServingMiddleware,
+# which sends static files precompressed and media as-is.
+MIDDLEWARE = list(MIDDLEWARE)
+MIDDLEWARE.insert(MIDDLEWARE.index('authentication.files.FileServingMiddleware') + 1,
+                  'django.middleware.gzip.GZipMiddleware')
+
+# Hashed, gzip/brotli precompressed copies written by collectstatic.
+STORAGES = dict(STORAGES, staticfiles={'BACKEND': 'authentication.files.CompressedManifestStaticFilesStorage'})
+
+TEMPLATES = [dict(TEMPLATES[0], APP_DIRS=False)]
+TEMPLATES[0]['OPTIONS'] = dict(
+    TEMPLATES[0]['OPTIONS'],
+    context_processors=[
+        processor for processor in TEMPLATES[0]['OPTIONS']['context_processors']
+        if ADMIN_ENABLED or processor != 'django.contrib.messages.context_processors.messages'
+    ],
+    loaders=[
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ],
+)
+
+# The browsable API is a development aid; production only speaks JSON.
+REST_FRAMEWORK = dict(REST_FRAMEWORK, DEFAULT_RENDERER_CLASSES=('authentication.renderers.FastJSONRenderer',))
+
+DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', '60'))
+
+# Chapter cache versions and newsletter de-duplication must be visible to
+# every worker, so the cache cannot be process-local. Redis when REDIS_URL is
+# set (needs the redis package), otherwise a file cache shared by the workers
+# of this instance.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_DIR', os.path.join(BASE_DIR, '.cache')),
+        }
+    }
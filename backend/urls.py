@@ -9,10 +9,14 @@
 # ]
 # backend/urls.py
 
+from django.apps import apps
 from django.contrib import admin
 from django.urls import path, include
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('', include('authentication.urls')),  # 👈 This line includes your app's URLs
 ]
+# Production leaves the admin (and the session middleware it needs) out
+# unless DJANGO_ADMIN_ENABLED is set.
+if apps.is_installed('django.contrib.admin'):
+    urlpatterns.insert(0, path('admin/', admin.site.urls))